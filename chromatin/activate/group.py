@@ -0,0 +1,59 @@
+import os
+import json
+import typing
+
+from amino import do, Do, Path, List, IO, Maybe, Nothing
+from amino.dat import Dat
+from amino.logging import module_log
+
+from chromatin.model.rplugin import Rplugin
+from chromatin.model.venv import Venv
+from chromatin.venv import venv_site
+from chromatin.activate.host import HostSettings, HostCmdline
+from chromatin.host import pycache_args
+
+log = module_log()
+group_host_script = Path(__file__).parent.parent / 'group_host.py'
+
+
+class PythonHost(Dat['PythonHost']):
+
+    def __init__(self, rplugin: Rplugin, venv: Venv, plugin_path: Path, pythonpath: List[str]) -> None:
+        self.rplugin = rplugin
+        self.venv = venv
+        self.plugin_path = plugin_path
+        self.pythonpath = pythonpath
+
+    @property
+    def interpreter(self) -> str:
+        return os.path.realpath(str(self.venv.meta.python_executable))
+
+
+@do(IO[dict])
+def group_member(host: PythonHost) -> Do:
+    site_e = yield venv_site(host.venv)
+    site = yield IO.from_either(site_e)
+    pythonpath = host.pythonpath + host.rplugin.pythonpath
+    return dict(name=host.rplugin.name, plugin=str(host.plugin_path), pythonpath=list(pythonpath), site=str(site))
+
+
+def group_host_cmdline(python_exe: Path, address: str, members: List[dict], pycache_prefix: Maybe[Path]=Nothing
+                       ) -> typing.List[str]:
+    options = ['-E'] + pycache_args(pycache_prefix)
+    return [str(python_exe)] + options + [str(group_host_script), address, json.dumps(list(members))]
+
+
+@do(IO[HostCmdline])
+def group_host_command(settings: HostSettings, group: str, hosts: List[PythonHost]) -> Do:
+    '''run the plugins in `hosts` in a single process, which must use the same interpreter.
+    All members are assigned the job's channel, which is only used for stopping the process.
+    '''
+    members = yield hosts.traverse(group_member, IO)
+    address = yield IO.from_maybe(settings.address, 'no server address for host groups')
+    exe = yield IO.from_maybe(hosts.head.map(lambda a: a.venv.meta.python_executable), f'empty host group `{group}`')
+    log.debug(f'starting host group `{group}` with {hosts.map(lambda a: a.rplugin.name).join_comma}')
+    cmdline = group_host_cmdline(exe, address, members, settings.pycache_prefix)
+    return HostCmdline(hosts.map(lambda a: a.rplugin), cmdline, False, False)
+
+
+__all__ = ('PythonHost', 'group_host_cmdline', 'group_host_command',)
@@ -1,24 +1,21 @@
 import os
 
-from amino import Path, do, Do
+from amino import Path, do, Do, IO
 
-from ribosome.nvim.io.api import N
 from ribosome.process import Subprocess
-from ribosome.nvim.io.compute import NvimIO
 
 from chromatin.util.interpreter import stack_exe
-from chromatin.model.rplugin import ActiveRplugin, Rplugin
-from chromatin.activate.host import start_rplugin_host
-from chromatin.host import start_host
+from chromatin.model.rplugin import Rplugin
+from chromatin.activate.host import HostSettings, HostCmdline
 
 
-@do(NvimIO[ActiveRplugin])
-def activate_stack_plugin(rplugin: Rplugin, dir: Path) -> Do:
-    stack = yield N.from_io(stack_exe())
-    code, out, err = yield N.from_io(Subprocess.popen(stack, 'path', '--local-bin', cwd=dir, env=None))
-    bin_path = yield N.m(out.head, lambda: f'error running `stack path --local-bin: {err.join_lines}`')
+@do(IO[HostCmdline])
+def stack_host_command(settings: HostSettings, rplugin: Rplugin, dir: Path) -> Do:
+    stack = yield stack_exe()
+    code, out, err = yield Subprocess.popen(stack, 'path', '--local-bin', cwd=dir, env=None)
+    bin_path = yield IO.from_maybe(out.head, f'error running `stack path --local-bin`: {err.join_lines}')
     exe = Path(bin_path) / rplugin.name
-    yield start_rplugin_host(rplugin, lambda debug: start_host(str(exe), debug))
+    return HostCmdline.single(rplugin, str(exe), settings.rplugin_debug(rplugin))
 
 
 def cabal_rplugin_executable(rplugin: Rplugin) -> Path:
@@ -34,10 +31,10 @@ def cabal_rplugin_cmdline(exe: Path, name: str, debug: bool) -> str:
     return f'{exe} {extra}'
 
 
-@do(NvimIO[ActiveRplugin])
-def activate_cabal_plugin(rplugin: Rplugin, dir: Path) -> Do:
+def cabal_host_command(settings: HostSettings, rplugin: Rplugin) -> IO[HostCmdline]:
     exe = cabal_rplugin_executable(rplugin)
-    yield start_rplugin_host(rplugin, lambda debug: start_host(cabal_rplugin_cmdline(exe, rplugin.name, debug), debug))
+    debug = settings.rplugin_debug(rplugin)
+    return IO.pure(HostCmdline.single(rplugin, cabal_rplugin_cmdline(exe, rplugin.name, debug), debug))
 
 
-__all__ = ('activate_stack_plugin', 'activate_cabal_plugin', 'cabal_rplugin_executable',)
+__all__ = ('stack_host_command', 'cabal_host_command', 'cabal_rplugin_executable',)
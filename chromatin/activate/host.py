@@ -1,33 +1,99 @@
-from typing import Callable, Tuple
+from typing import Any
 
-from amino import do, Do, Path, List
+from amino import do, Do, Path, List, Maybe, Nothing, Just
+from amino.dat import Dat
 
 from ribosome.nvim.io.compute import NvimIO
+from ribosome.nvim.io.api import N
+from ribosome.nvim.api.function import nvim_call_tpe
 
 from chromatin.model.rplugin import ActiveRplugin, Rplugin, ActiveRpluginMeta
-from chromatin.settings import debug_pythonpath
-from chromatin.host import start_python_host
+from chromatin.settings import debug_pythonpath, zygote, venv_dir, pycache_prefix
+from chromatin.host import host_cmdline, define_stderr_handler, start_host_job
 
 
-@do(NvimIO[ActiveRplugin])
-def start_rplugin_host(rplugin: Rplugin, start: Callable[[bool], NvimIO[Tuple[int, int]]]) -> Do:
-    debug_global = yield debug_pythonpath.value
-    debug = debug_global.get_or_strict(rplugin.debug)
-    channel, pid = yield start(debug)
-    return ActiveRplugin(rplugin, ActiveRpluginMeta(rplugin.name, channel, pid))
+class HostSettings(Dat['HostSettings']):
+    '''settings that are needed to construct host command lines, read once per activation.
+    '''
 
+    def __init__(
+            self,
+            venv_dir: Path,
+            debug: Maybe[bool],
+            zygote: bool,
+            address: Maybe[str],
+            pycache_prefix: Maybe[Path],
+    ) -> None:
+        self.venv_dir = venv_dir
+        self.debug = debug
+        self.zygote = zygote
+        self.address = address
+        self.pycache_prefix = pycache_prefix
 
-@do(NvimIO[ActiveRplugin])
-def start_python_rplugin_host(
+    def rplugin_debug(self, rplugin: Rplugin) -> bool:
+        return self.debug.get_or_strict(rplugin.debug)
+
+
+class HostCmdline(Dat['HostCmdline']):
+    '''a host process that is started with `jobstart`, running one plugin or, if `rpc` is false, a host group.
+    '''
+
+    def __init__(self, rplugins: List[Rplugin], cmdline: Any, debug: bool, rpc: bool) -> None:
+        self.rplugins = rplugins
+        self.cmdline = cmdline
+        self.debug = debug
+        self.rpc = rpc
+
+    @staticmethod
+    def single(rplugin: Rplugin, cmdline: Any, debug: bool) -> 'HostCmdline':
+        return HostCmdline(List(rplugin), cmdline, debug, True)
+
+
+@do(NvimIO[str])
+def server_address() -> Do:
+    address = yield nvim_call_tpe(str, 'eval', 'v:servername')
+    yield N.pure(address) if address else nvim_call_tpe(str, 'serverstart')
+
+
+@do(NvimIO[HostSettings])
+def host_settings(groups: bool) -> Do:
+    from chromatin.bytecode import pycache_dir
+    dir = yield venv_dir.value_or_default()
+    debug = yield debug_pythonpath.value
+    use_zygote = yield zygote.value_or_default()
+    address = yield server_address().map(Just) if groups else N.pure(Nothing)
+    use_prefix = yield pycache_prefix.value_or_default()
+    prefix = Just(pycache_dir(dir)) if use_prefix else Nothing
+    return HostSettings(dir, debug.to_maybe, use_zygote, address, prefix)
+
+
+def python_host_command(
+        settings: HostSettings,
         rplugin: Rplugin,
         python_exe: Path,
         bin_path: Path,
         plugin_path: Path,
         pythonpath: List[str],
-) -> Do:
-    yield start_rplugin_host(
-        rplugin,
-        lambda debug: start_python_host(python_exe, bin_path, plugin_path, debug, pythonpath + rplugin.pythonpath),
-    )
+) -> HostCmdline:
+    debug = settings.rplugin_debug(rplugin)
+    cmdline = host_cmdline(python_exe, bin_path, plugin_path, debug, pythonpath + rplugin.pythonpath, settings.zygote,
+                           settings.pycache_prefix)
+    return HostCmdline.single(rplugin, cmdline, debug)
+
+
+@do(NvimIO[List[ActiveRplugin]])
+def start_host_cmdline(stderr_handler_name: str, host: HostCmdline) -> Do:
+    channel, pid = yield start_host_job(host.cmdline, stderr_handler_name, host.debug, host.rpc)
+    return host.rplugins.map(lambda a: ActiveRplugin(a, ActiveRpluginMeta(a.name, channel, pid)))
+
+
+@do(NvimIO[List[ActiveRplugin]])
+def start_hosts(hosts: List[HostCmdline]) -> Do:
+    '''start all hosts back to back, using a single stderr handler.
+    '''
+    stderr_handler_name = yield define_stderr_handler()
+    active = yield hosts.traverse(lambda a: start_host_cmdline(stderr_handler_name, a), NvimIO)
+    return active.join
+
 
-__all__ = ('start_rplugin_host', 'start_python_rplugin_host',)
+__all__ = ('HostSettings', 'HostCmdline', 'host_settings', 'python_host_command', 'start_hosts',)
@@ -0,0 +1,102 @@
+from typing import Tuple
+
+from amino import do, Do, List, Nil, Path, Map, IO
+from amino.util.string import camelcase
+
+from ribosome.nvim.io.compute import NvimIO, NRParams
+from ribosome.nvim.io.api import N
+from ribosome.nvim.api.command import nvim_atomic_commands, nvim_command
+from ribosome.nvim.api.exists import command_exists, nvim_exists
+
+from chromatin.model.rplugin import Rplugin
+from chromatin.handlers import read_handlers
+from chromatin.util import resources
+
+
+def lazy_group(name: str) -> str:
+    return f'CrmLazy{camelcase(name)}'
+
+
+def parse_event(spec: str) -> Tuple[str, str]:
+    event, _, pattern = spec.strip().partition(' ')
+    return event, pattern.strip() or '*'
+
+
+def lazy_events(rplugin: Rplugin) -> List[Tuple[str, str]]:
+    return rplugin.lazy.filetypes.map(lambda a: ('FileType', a)) + rplugin.lazy.events.map(parse_event)
+
+
+def command_stub(name: str, command: str) -> str:
+    '''the user's arguments are passed as a single argument with its whitespace escaped, since `CrmLazyCommand`
+    receives `<f-args>`, which would split quoted arguments and collapse whitespace.
+    '''
+    trigger = f'CrmLazyCommand {name} <range> <line1> <line2> {command}<bang> '
+    return f'''command! -nargs=* -range -bang {command} execute '{trigger}' . escape(<q-args>, "\\\\ \\t")'''
+
+
+def event_stub(name: str, event: str, pattern: str) -> str:
+    trigger = f"execute 'CrmLazyEvent {name} {event} ' . fnameescape(expand('<amatch>'))"
+    return f'autocmd {lazy_group(name)} {event} {pattern} {trigger}'
+
+
+def lazy_stubs(rplugin: Rplugin, commands: List[str]) -> List[str]:
+    group = lazy_group(rplugin.name)
+    events = lazy_events(rplugin)
+    autocmds = (
+        List(f'augroup {group}', 'autocmd!', 'augroup END') + events.map(lambda a: event_stub(rplugin.name, *a))
+        if events else
+        Nil
+    )
+    return commands.map(lambda a: command_stub(rplugin.name, a)) + autocmds
+
+
+def stub_commands(handlers: Map[str, List[str]], rplugin: Rplugin) -> List[str]:
+    return (rplugin.lazy.commands + handlers.lift(rplugin.name).get_or_strict(Nil)).distinct
+
+
+@do(IO[List[str]])
+def lazy_commands(venv_dir: Path, rplugin: Rplugin) -> Do:
+    '''the commands from the plugin's config and those it defined when it was last activated.
+    '''
+    handlers = yield read_handlers(venv_dir)
+    return stub_commands(handlers, rplugin)
+
+
+@do(NvimIO[None])
+def define_lazy_stubs(venv_dir: Path, rplugins: List[Rplugin]) -> Do:
+    '''define commands and autocmds that activate a plugin when it is used for the first time.
+    '''
+    handlers = yield N.from_io(read_handlers(venv_dir))
+    yield nvim_atomic_commands(rplugins.flat_map(lambda a: lazy_stubs(a, stub_commands(handlers, a))))
+
+
+def remove_lazy_stubs(rplugin: Rplugin, commands: List[str]) -> NvimIO[None]:
+    lines = commands.map(lambda a: f'silent! delcommand {a}').cat(f'silent! autocmd! {lazy_group(rplugin.name)}')
+    return nvim_atomic_commands(lines).replace(None)
+
+
+@do(NvimIO[None])
+def redispatch_command(name: str, range: str, line1: str, line2: str, command: str, args: str) -> Do:
+    '''run the command that triggered the activation again, now that the plugin has defined it.
+    `args` is the verbatim argument string of the original invocation.
+    '''
+    command_name = command.rstrip('!')
+    exists = yield command_exists(command_name)
+    prefix = '' if str(range) == '0' else f'{line1},{line2}'
+    yield (
+        nvim_command(f'{prefix}{command}', *List(args).filter(bool), params=NRParams.cons(verbose=True, sync=False))
+        if exists else
+        N.error(resources.lazy_command_undefined(name, command_name))
+    )
+
+
+@do(NvimIO[None])
+def redispatch_event(name: str, event: str, pattern: List[str]) -> Do:
+    '''trigger the event that caused the activation again for the plugin's autocmds only.
+    '''
+    exists = yield nvim_exists(f'#{name}#{event}')
+    if exists:
+        yield nvim_command('doautocmd', '<nomodeline>', name, event, *pattern)
+
+
+__all__ = ('define_lazy_stubs', 'lazy_commands', 'remove_lazy_stubs', 'redispatch_command', 'redispatch_event',)
@@ -0,0 +1,86 @@
+from typing import Tuple
+
+from amino import do, Do, List, Lists, Nil
+from amino.util.string import camelcase
+from amino.list import split_by_status
+
+from ribosome.nvim.io.compute import NvimIO
+from ribosome.nvim.io.api import N
+from ribosome.nvim.api.exists import function_exists
+from ribosome.nvim.api.function import nvim_call_function, nvim_call_tpe
+
+from chromatin.model.rplugin import ActiveRplugin
+from chromatin.timing import now
+
+init_timeout = 20.
+poll_interval = .01
+# maximum duration of a single `wait()` call, after which plugins that don't set `g:<name>_started` are polled
+wait_slice = 1.
+
+
+def started_expr(rplugin: ActiveRplugin) -> str:
+    return f"get(g:, '{rplugin.name}_started', 0)"
+
+
+@do(NvimIO[List[bool]])
+def started_statuses(rplugins: List[ActiveRplugin]) -> Do:
+    '''read the flags that ribosome sets at the end of a host's initialization, in a single request.
+    '''
+    result = yield N.recover_failure(
+        nvim_call_tpe(list, 'eval', f'[{rplugins.map(started_expr).join_comma}]'),
+        lambda a: N.pure(rplugins.map(lambda r: False)),
+    )
+    return Lists.wrap(result).map(bool)
+
+
+def wait_for_started(rplugins: List[ActiveRplugin], timeout: float) -> NvimIO[None]:
+    '''block inside of neovim until one of `rplugins` has set its started flag, while neovim keeps processing the
+    hosts' requests.
+    '''
+    condition = rplugins.map(started_expr).mk_string(' || ')
+    return N.recover_failure(
+        nvim_call_function('wait', max(int(timeout * 1000), 0), condition, 10).replace(None),
+        lambda a: N.sleep(poll_interval),
+    )
+
+
+@do(NvimIO[bool])
+def rplugin_polled(rplugin: ActiveRplugin) -> Do:
+    name = f'{camelcase(rplugin.name)}Poll'
+    exists = yield function_exists(name)
+    ready = yield N.recover_failure(nvim_call_function(name), lambda a: N.pure(False)) if exists else N.pure(False)
+    return ready is True
+
+
+def rplugin_ready(rplugin: ActiveRplugin, started: bool) -> NvimIO[bool]:
+    return N.pure(True) if started else rplugin_polled(rplugin)
+
+
+@do(NvimIO[Tuple[List[Tuple[ActiveRplugin, float]], List[ActiveRplugin]]])
+def await_ready(rplugins: List[ActiveRplugin], timeout: float=init_timeout) -> Do:
+    '''wait until each plugin is ready or the timeout has expired, returning the ready plugins with the time at which
+    they were detected and the pending plugins.
+    Hosts signal readiness by setting `g:<name>_started`, which is awaited in neovim with `wait()`, so that chromatin
+    only sends a request when a plugin has started. Plugins without the flag are detected by calling their `Poll`
+    function once per `wait_slice`; if neovim doesn't support `wait()`, all plugins are polled.
+    '''
+    start = yield N.simple(now)
+    push = yield function_exists('wait')
+    @do(NvimIO[Tuple[List[Tuple[ActiveRplugin, float]], List[ActiveRplugin]]])
+    def check(ready: List[Tuple[ActiveRplugin, float]], pending: List[ActiveRplugin]) -> Do:
+        started = yield started_statuses(pending) if push else N.pure(pending.map(lambda a: False))
+        statuses = yield Lists.wrap(zip(pending, started)).traverse(lambda a: rplugin_ready(*a), NvimIO)
+        detected = now()
+        ready_now, waiting = split_by_status(pending, statuses)
+        new_ready = ready_now.map(lambda a: (a, detected))
+        remaining = timeout - (detected - start)
+        pause = wait_for_started(waiting, min(remaining, wait_slice)) if push else N.sleep(poll_interval)
+        yield (
+            N.pure((ready + new_ready, waiting))
+            if waiting.empty or remaining <= 0 else
+            pause.flat_map(lambda a: check(ready + new_ready, waiting))
+        )
+    yield check(Nil, rplugins)
+
+
+__all__ = ('init_timeout', 'await_ready',)
@@ -0,0 +1,51 @@
+'''byte-compilation of plugin venvs after installation.
+pip is run with `--no-compile`, and each venv's site dir is compiled with `compileall -j0`, which uses all cores.
+If `g:chromatin_pycache_prefix` is set, the bytecode is written to `.pycache` below `venv_dir` instead of the
+`__pycache__` dirs of the packages, and hosts are started with the same prefix, so that they find it even if they
+can't write to the package dirs. The prefix is supported by python 3.8 and later and ignored by older interpreters.
+'''
+from amino import Path, IO, do, Do, List, Maybe
+from amino.logging import module_log
+
+from ribosome.process import Subprocess
+
+from chromatin.venv import cons_venv_under, venv_site, site_layers
+
+log = module_log()
+pycache_name = '.pycache'
+
+
+def pycache_dir(venv_dir: Path) -> Path:
+    return venv_dir / pycache_name
+
+
+def pycache_option(prefix: Maybe[Path]) -> List[str]:
+    return prefix.map(lambda a: List('-X', f'pycache_prefix={a}')).get_or_strict(List())
+
+
+@do(IO[None])
+def compile_dir(python: Path, dir: Path, prefix: Maybe[Path]) -> Do:
+    args = pycache_option(prefix).cons(str(python)) + List('-m', 'compileall', '-q', '-j0', str(dir))
+    retval, out, err = yield Subprocess.popen(*args, timeout=300)
+    if retval != 0:
+        log.debug(f'compiling {dir} failed: {out.join_lines} {err.join_lines}')
+
+
+@do(IO[None])
+def compile_venv(venv_dir: Path, name: str, prefix: Maybe[Path]) -> Do:
+    '''compile the venv's site dir and the layers it links, whose bytecode is missing from the shared pycache dir
+    after the first installation with a new prefix.
+    '''
+    venv = cons_venv_under(venv_dir, name)
+    site = yield venv_site(venv)
+    dirs = site.cata(lambda a: List(), lambda a: site_layers(a).cons(a))
+    yield dirs.traverse(lambda a: compile_dir(venv.meta.python_executable, a, prefix), IO)
+
+
+def compile_venvs(venv_dir: Path, names: List[str], prefix: Maybe[Path]) -> IO[None]:
+    '''byte-compile the site dirs of the venvs in `names` one after the other, each one in parallel.
+    '''
+    return names.traverse(lambda a: compile_venv(venv_dir, a, prefix), IO).replace(None)
+
+
+__all__ = ('pycache_dir', 'pycache_option', 'compile_dir', 'compile_venvs',)
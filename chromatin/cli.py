@@ -1,8 +1,10 @@
-from typing import Any
+from typing import Any, List
 
 import sys
 import traceback
 
+host_flag = '--host'
+
 
 def echo(nvim: Any, msg: str) -> None:
     safe = msg.replace('"', '\\"')
@@ -19,20 +21,23 @@ def tmpfile_error(msg: str) -> None:
         pass
 
 
+def host_mode(argv: List[str]) -> bool:
+    '''whether `crm_run` was called with `--host`, in which case it runs chromatin itself instead of starting a second
+    interpreter for it.
+    '''
+    return host_flag in argv[1:]
+
+
 def run() -> int:
     try:
         from amino.logging import amino_root_logger, amino_root_file_logging
         amino_root_file_logging()
         amino_root_logger.debug('starting chromatin, stage amino')
         try:
-            from ribosome.rpc.start import start_external
             from ribosome.rpc.io.start import cons_asyncio_stdio
-            from ribosome.logging import nvim_logging
             asio, rpc_comm = cons_asyncio_stdio()
-            nvim_api = start_external('define_handlers', rpc_comm).attempt.get_or_raise()
-            nvim_logging(nvim_api)
             amino_root_logger.debug('starting chromatin, stage ribosome')
-            return stage2(nvim_api)
+            return host(rpc_comm) if host_mode(sys.argv) else external(rpc_comm)
         except Exception as e:
             amino_root_logger.caught_exception_error(f'importing ribosome in chromatin bootstrap', e)
             raise
@@ -46,6 +51,28 @@ def run() -> int:
         return 3
 
 
+def host(rpc_comm: Any) -> int:
+    '''run chromatin's plugin host in the bootstrap process, avoiding the startup of a second interpreter.
+    Readiness is signalled by chromatin itself through the `User ChromatinReady` autocmd once its handlers are defined.
+    '''
+    from ribosome.rpc.start import start_plugin_sync
+    from ribosome.logging import ribo_log
+    from chromatin.config.config import chromatin_config
+    ribo_log.debug(f'starting chromatin in the bootstrap process: {sys.argv}')
+    def error(e: Exception) -> int:
+        ribo_log.caught_exception_error('running chromatin host', e)
+        return 1
+    return start_plugin_sync(chromatin_config, rpc_comm).attempt.cata(error, lambda a: 0)
+
+
+def external(rpc_comm: Any) -> int:
+    from ribosome.rpc.start import start_external
+    from ribosome.logging import nvim_logging
+    nvim_api = start_external('define_handlers', rpc_comm).attempt.get_or_raise()
+    nvim_logging(nvim_api)
+    return stage2(nvim_api)
+
+
 def stage2(nvim: Any) -> int:
     try:
         from amino import Path, Lists, do, Do
@@ -1,6 +1,6 @@
 from typing import Tuple, Callable
 
-from amino import do, Just, List, Either, Nil, Boolean, Path, Lists, IO
+from amino import do, Just, List, Either, Nil, Boolean, Path, Lists, IO, Maybe, Nothing
 from amino.do import Do
 from amino.state import State
 from amino.io import IOException
@@ -8,17 +8,18 @@ from amino.func import ReplaceVal
 from amino.util.string import camelcaseify, camelcase
 from amino.case import Case
 from amino.logging import module_log
-from amino.list import split_by_status_zipped, split_either_list
+from amino.list import split_by_status_zipped, split_either_list, split_by_status
 
 from ribosome.nvim.io.state import NS
 from ribosome.process import SubprocessResult, Subprocess
 from ribosome.nvim.io.compute import NvimIO
 from ribosome.compute.api import prog
 from ribosome.compute.output import (GatherSubprocesses, GatherIOResult, GatherItem, GatherResult,
-                                     GatherSubprocessResult, GatherIO, GatherSubprocess, Gather)
+                                     GatherSubprocessResult, GatherIO, GatherSubprocess, Gather, GatherIOs)
+from ribosome.compute.interpret import gather_ios
 from ribosome.nvim.io.api import N
 from ribosome.nvim.api.command import runtime, nvim_command
-from ribosome.nvim.api.exists import command_exists, wait_until_function_produces, wait_for_function, function_exists
+from ribosome.nvim.api.exists import command_exists, function_exists
 from ribosome.nvim.api.function import nvim_call_json, nvim_call_function
 from ribosome.rpc.define import ActiveRpcTrigger, undef_command
 from ribosome.compute.ribosome_api import Ribo
@@ -32,15 +33,24 @@ from chromatin.model.rplugin import (Rplugin, ActiveRplugin, DirRplugin, DistRpl
                                      HsDirRplugin, VenvRplugin, HsInstallableRplugin, HsRpluginMeta, VenvRpluginMeta,
                                      HsStackageRplugin, HsStackDirRplugin, HackageRplugin, HsHackageRplugin)
 from chromatin.env import Env
+from chromatin.model.timing import Timing
+from chromatin.timing import now, timed_io, timed_nvim
 from chromatin.components.core.trans.tpe import CrmRibosome
-from chromatin.settings import handle_crm, venv_dir, rplugins
+from chromatin.settings import (handle_crm, venv_dir, rplugins, package_store, pycache_prefix, wheelhouse_size,
+                                install_jobs)
 from chromatin.util.interpreter import join_pythonpath
-from chromatin.venv import cons_venv, venv_plugin_path, venv_package_installed, venv_from_rplugin
-from chromatin.model.venv import Venv
+from chromatin.venv import cons_venv, venv_plugin_path, venv_package_installed, venv_from_rplugin, cons_venv_under
+from chromatin.model.venv import Venv, VenvOptions
 from chromatin.components.core.rplugin import installable_rplugin_from_name, installable_rplugins_from_names
-from chromatin.install.main import install_rplugin_subproc
-from chromatin.activate.haskell import activate_stack_plugin, activate_cabal_plugin, cabal_rplugin_executable
-from chromatin.activate.host import start_rplugin_host, start_python_rplugin_host
+from chromatin.install.python import venv_rplugin_reqs
+from chromatin.activate.host import HostSettings, HostCmdline, host_settings, python_host_command, start_hosts
+from chromatin.activate.group import PythonHost, group_host_command
+from chromatin.activate.ready import await_ready, init_timeout
+from chromatin.manifest import trusted_rplugins, record_manifest
+from chromatin.activate.lazy import define_lazy_stubs, lazy_commands, remove_lazy_stubs
+from chromatin.handlers import record_handlers, handler_commands
+from chromatin.model.lock import Lockfile, PluginLock
+from chromatin.model.outdated import PackageVersion
 
 log = module_log()
 
@@ -70,43 +80,133 @@ def activated(active_rplugin: ActiveRplugin) -> Do:
     yield NS.modify(lambda a: a.host_started(active_rplugin.meta))
 
 
-class activate_rplugin_io(Case[Rplugin, NvimIO[ActiveRplugin]], alg=Rplugin):
+class python_host(Case[Rplugin, IO[PythonHost]], alg=Rplugin):
 
-    @do(NvimIO[ActiveRplugin])
-    def dir_rplugin(self, rplugin: DirRplugin) -> Do:
-        venv = yield venv_from_rplugin(rplugin)
-        python_exe = venv.meta.python_executable
-        bin_path = venv.meta.bin_path
+    def __init__(self, venv_dir: Path) -> None:
+        self.venv_dir = venv_dir
+
+    def dir_rplugin(self, rplugin: DirRplugin) -> IO[PythonHost]:
+        venv = cons_venv_under(self.venv_dir, rplugin.name)
         plugin_path = Path(rplugin.spec) / rplugin.name / '__init__.py'
-        yield start_python_rplugin_host(rplugin, python_exe, bin_path, plugin_path, List(rplugin.spec))
+        return IO.pure(PythonHost(rplugin, venv, plugin_path, List(rplugin.spec)))
 
-    @do(NvimIO[ActiveRplugin])
+    @do(IO[PythonHost])
     def dist_rplugin(self, rplugin: DistRplugin) -> Do:
-        venv = yield venv_from_rplugin(rplugin)
-        plugin_path_e = yield N.from_io(venv_plugin_path(venv))
-        plugin_path = yield N.e(plugin_path_e)
-        python_exe = venv.meta.python_executable
-        bin_path = venv.meta.bin_path
-        yield start_python_rplugin_host(rplugin, python_exe, bin_path, plugin_path, Nil)
+        venv = cons_venv_under(self.venv_dir, rplugin.name)
+        plugin_path_e = yield venv_plugin_path(venv)
+        plugin_path = yield IO.from_either(plugin_path_e)
+        return PythonHost(rplugin, venv, plugin_path, Nil)
+
+    def site_rplugin(self, rplugin: SiteRplugin) -> IO[PythonHost]:
+        return IO.failed('site rplugins not implemented yet')
+
+    def hackage(self, rplugin: HackageRplugin) -> IO[PythonHost]:
+        return IO.failed(f'`{rplugin.name}` is not a python plugin')
+
+    def stackage(self, rplugin: StackageRplugin) -> IO[PythonHost]:
+        return IO.failed(f'`{rplugin.name}` is not a python plugin')
+
+    def hs_dir_rplugin(self, rplugin: HsDirRplugin) -> IO[PythonHost]:
+        return IO.failed(f'`{rplugin.name}` is not a python plugin')
+
+
+def python_host_cmdline(settings: HostSettings, host: PythonHost) -> HostCmdline:
+    meta = host.venv.meta
+    return python_host_command(settings, host.rplugin, meta.python_executable, meta.bin_path, host.plugin_path,
+                               host.pythonpath)
+
+
+class rplugin_host_command(Case[Rplugin, IO[HostCmdline]], alg=Rplugin):
+    '''construct the command line for a plugin's host without communicating with neovim, so that this can be done
+    concurrently for all plugins.
+    '''
+
+    def __init__(self, settings: HostSettings) -> None:
+        self.settings = settings
+
+    def dir_rplugin(self, rplugin: DirRplugin) -> IO[HostCmdline]:
+        return python_host(self.settings.venv_dir)(rplugin).map(lambda a: python_host_cmdline(self.settings, a))
+
+    def dist_rplugin(self, rplugin: DistRplugin) -> IO[HostCmdline]:
+        return python_host(self.settings.venv_dir)(rplugin).map(lambda a: python_host_cmdline(self.settings, a))
 
     # TODO start all plugins by passing the module path to ribosome_start_plugin instead of __init__.py
-    def site_rplugin(self, rplugin: SiteRplugin) -> NvimIO[ActiveRplugin]:
-        return N.error('site rplugins not implemented yet')
+    def site_rplugin(self, rplugin: SiteRplugin) -> IO[HostCmdline]:
+        return IO.failed('site rplugins not implemented yet')
+
+    def hackage(self, rplugin: HackageRplugin) -> IO[HostCmdline]:
+        from chromatin.activate.haskell import cabal_host_command
+        return cabal_host_command(self.settings, rplugin)
+
+    def stackage(self, rplugin: StackageRplugin) -> IO[HostCmdline]:
+        from chromatin.activate.haskell import stack_host_command
+        return stack_host_command(self.settings, rplugin, Path.home())
+
+    def hs_dir_rplugin(self, rplugin: HsDirRplugin) -> IO[HostCmdline]:
+        from chromatin.activate.haskell import stack_host_command
+        return stack_host_command(self.settings, rplugin, rplugin.spec)
 
-    def hackage(self, rplugin: HackageRplugin) -> NvimIO[ActiveRplugin]:
-        return activate_cabal_plugin(rplugin, Path.home())
 
-    def stackage(self, rplugin: StackageRplugin) -> NvimIO[ActiveRplugin]:
-        return activate_stack_plugin(rplugin, Path.home())
+def shareable(settings: HostSettings, rplugin: Rplugin) -> bool:
+    return isinstance(rplugin, (DistRplugin, DirRplugin)) and not settings.rplugin_debug(rplugin)
 
-    def hs_dir_rplugin(self, rplugin: HsDirRplugin) -> NvimIO[ActiveRplugin]:
-        return activate_stack_plugin(rplugin, rplugin.spec)
+
+def interpreter_host_command(settings: HostSettings, group: str, hosts: List[PythonHost]) -> IO[HostCmdline]:
+    return (
+        group_host_command(settings, group, hosts)
+        if hosts.length > 1 else
+        IO.from_maybe(hosts.head.map(lambda a: python_host_cmdline(settings, a)), f'empty host group `{group}`')
+    )
+
+
+@do(IO[List[HostCmdline]])
+def group_host_commands(settings: HostSettings, group: str, rplugins: List[Rplugin]) -> Do:
+    '''start the python plugins in `rplugins` in one host process per interpreter.
+    Plugins that cannot share a process, like haskell or debug plugins, are started separately.
+    '''
+    shared, single = rplugins.split(lambda a: shareable(settings, a))
+    single_commands = yield single.traverse(rplugin_host_command(settings), IO)
+    hosts = yield shared.traverse(python_host(settings.venv_dir), IO)
+    by_interpreter = hosts.group_by(lambda a: a.interpreter).v
+    group_commands = yield by_interpreter.traverse(lambda a: interpreter_host_command(settings, group, a), IO)
+    return single_commands + group_commands
+
+
+def host_command_ios(settings: HostSettings, rplugins: List[Rplugin]) -> List[IO[List[HostCmdline]]]:
+    single, grouped = rplugins.split(lambda a: a.host_group.empty)
+    groups = grouped.group_by(lambda a: a.host_group.get_or_strict(''))
+    return (
+        single.map(lambda a: rplugin_host_command(settings)(a).map(List)) +
+        groups.to_list.map(lambda a: group_host_commands(settings, *a))
+    )
+
+
+def activation_order(rplugins: List[Rplugin]) -> Callable[[HostCmdline], int]:
+    return lambda a: a.rplugins.head.flat_map(rplugins.index_of).get_or_strict(rplugins.length)
+
+
+def host_command_timings(commands: List[HostCmdline], start: float, end: float) -> List[Timing]:
+    return commands.flat_map(lambda a: a.rplugins).map(lambda a: Timing.cons('activate', start, end, a.name))
 
 
 @do(NS[CrmRibosome, None])
-def activate_rplugin(rplugin: Rplugin) -> Do:
-    active_rplugin = yield NS.lift(activate_rplugin_io.match(rplugin))
-    yield Ribo.zoom_main(activated(active_rplugin))
+def activate_rplugins(rplugins: List[Rplugin]) -> Do:
+    '''construct the host command lines of all plugins concurrently, then start the hosts back to back.
+    Plugins whose command line cannot be constructed are reported and skipped.
+    '''
+    start = yield NS.simple(now)
+    settings = yield NS.lift(host_settings(rplugins.exists(lambda a: a.host_group.present)))
+    ios = host_command_ios(settings, rplugins).map(timed_io)
+    results = yield NS.from_io(IO.delay(gather_ios, GatherIOs(ios, timeout=30)))
+    errors, timed_commands = split_either_list(results)
+    for error in errors:
+        ribo_log.error(f'failed to start rplugin host: {error}')
+    commands = timed_commands.flat_map(lambda a: a[0])
+    active = yield NS.lift(start_hosts(commands.sort_by(activation_order(rplugins))))
+    yield Ribo.zoom_main(active.traverse(activated, NS))
+    end = yield NS.simple(now)
+    timings = timed_commands.flat_map(lambda a: host_command_timings(*a)).cons(Timing.cons('activate', start, end))
+    yield Ribo.modify_main(lambda a: a.add_timings(timings))
 
 
 @do(NS[CrmRibosome, List[Rplugin]])
@@ -114,13 +214,15 @@ def activate_multi(new_rplugins: List[Rplugin]) -> Do:
     active = yield Ribo.zoom_main(NS.inspect_either(lambda a: a.active_rplugins))
     active_rplugins = active.map(lambda a: a.rplugin)
     already_active, inactive = new_rplugins.split(active_rplugins.contains)
-    yield inactive.traverse(activate_rplugin, NS).replace(already_active)
+    yield activate_rplugins(inactive) if inactive else NS.unit
+    return already_active
 
 
 @do(NS[CrmRibosome, List[Rplugin]])
 def activate_by_names(plugins: List[str]) -> Do:
     getter = (lambda a: a.ready_rplugins) if plugins.empty else (lambda a: a.ready_by_name(plugins))
     rplugins = yield Ribo.zoom_main(NS.inspect_either(getter))
+    yield Ribo.modify_main(lambda a: a.start_timings())
     yield (
         NS.error(resources.no_plugins_match_for_activation(plugins))
         if rplugins.empty else
@@ -139,11 +241,14 @@ def undef_trigger(trigger: RpcTrigger) -> Do:
 
 
 @do(NvimIO[None])
-def stop_rplugin(name: str, channel: int, triggers: List[RpcTrigger]) -> Do:
+def stop_rplugin(name: str, channel: int, triggers: List[RpcTrigger], shared: bool) -> Do:
+    '''reset the started flag, so that `await_ready` waits for the next host when the plugin is activated again.
+    '''
     yield nvim_command(f'{camelcase(name)}Quit')
+    yield nvim_command('unlet!', f'g:{name}_started')
     yield triggers.traverse(undef_trigger, NvimIO)
     yield nvim_command('autocmd!', name)
-    yield stop_host(channel)
+    yield N.unit if shared else stop_host(channel)
 
 
 @do(NS[Env, None])
@@ -154,7 +259,8 @@ def deactivate_rplugin(active_rplugin: ActiveRplugin) -> Do:
     rpc_triggers_fun = f'{cname}RpcTriggers'
     triggers = yield NS.lift(nvim_call_json(rpc_triggers_fun))
     yield NS.modify(lambda a: a.deactivate_rplugin(meta))
-    yield NS.lift(stop_rplugin(rplugin.name, meta.channel, triggers))
+    shared = yield NS.inspect(lambda a: a.channel_in_use(meta.channel))
+    yield NS.lift(stop_rplugin(rplugin.name, meta.channel, triggers, shared))
     log.debug(f'deactivated {active_rplugin}')
     yield NS.pure(None)
 
@@ -192,42 +298,105 @@ def rplugin_stage(prefix: str, num: int) -> Do:
             yield nvim_call_function(name)
 
 
-def init_stage(prefixes: List[str]) -> Callable[[int], NvimIO[None]]:
-    def init_stage(num: int) -> NvimIO[None]:
-        return prefixes.traverse(lambda a: rplugin_stage(a, num), NvimIO)
-    return init_stage
+def stage_failed(rplugin: ActiveRplugin, num: int, error: Exception) -> bool:
+    ribo_log.error(f'stage {num} of `{rplugin.name}` failed: {error}')
+    return False
 
 
-@do(NvimIO[None])
-def await_poll(prefix: str) -> Do:
-    yield wait_for_function(f'{prefix}Poll', 10)
-    yield wait_until_function_produces(True, f'{prefix}Poll')
+@do(NvimIO[bool])
+def rplugin_stage_safe(rplugin: ActiveRplugin, num: int) -> Do:
+    result = yield N.safe(rplugin_stage(camelcase(rplugin.name), num))
+    return result.to_either.cata(lambda e: stage_failed(rplugin, num, e), lambda a: True)
+
+
+@do(NvimIO[Tuple[List[ActiveRplugin], List[Timing]]])
+def init_stage(rplugins: List[ActiveRplugin], num: int) -> Do:
+    phase = f'stage {num}'
+    start = yield N.simple(now)
+    results = yield rplugins.traverse(lambda a: timed_nvim(rplugin_stage_safe(a, num)), NvimIO)
+    end = yield N.simple(now)
+    success, failed = split_by_status(rplugins, results.map(lambda a: a[0]))
+    timings = Lists.wrap(zip(rplugins, results)).map(lambda a: Timing.cons(phase, a[1][1], a[1][2], a[0].name))
+    return success, timings.cons(Timing.cons(phase, start, end))
+
 
+def next_stage(current: Tuple[List[ActiveRplugin], List[Timing]], num: int
+               ) -> NvimIO[Tuple[List[ActiveRplugin], List[Timing]]]:
+    active, timings = current
+    return init_stage(active, num).map(lambda r: (r[0], timings + r[1]))
 
-@do(NvimIO[List[str]])
-def initialize_plugins(rplugins: List[ActiveRplugin]) -> Do:
-    prefixes = rplugins.map(lambda a: camelcase(a.name))
-    yield prefixes.traverse(await_poll, NvimIO)
-    yield Lists.range(1, 6).traverse(init_stage(prefixes), NvimIO)
-    return Nil
+
+def ready_timings(ready: List[Tuple[ActiveRplugin, float]], start: float, end: float) -> List[Timing]:
+    return ready.map(lambda a: Timing.cons('ready', start, a[1], a[0].name)).cons(Timing.cons('ready', start, end))
+
+
+@do(NvimIO[Tuple[List[str], List[Timing]]])
+def initialize_plugins(rplugins: List[ActiveRplugin], timeout: float=init_timeout) -> Do:
+    '''wait for all plugins to be ready, then run the stages 1 to 5 for each of them.
+    The stages are barriers, so stage `n + 1` isn't run for any plugin before stage `n` has completed for all of them.
+    A plugin that doesn't start in time or whose stage fails is excluded from the subsequent stages.
+    Returns the names of the failed plugins and the timings of the phases.
+    '''
+    start = yield N.simple(now)
+    ready, pending = yield await_ready(rplugins, timeout)
+    end = yield N.simple(now)
+    pending.foreach(lambda a: ribo_log.error(f'`{a.name}` did not start within {timeout} seconds'))
+    initialized, timings = yield Lists.range(1, 6).fold_left(N.pure((ready.map(lambda a: a[0]), Nil)))(
+        lambda z, num: z.flat_map(lambda a: next_stage(a, num)))
+    return rplugins.remove_all(initialized).map(lambda a: a.name), ready_timings(ready, start, end) + timings
 
 
-# TODO don't fail if one plugin doesn't start
 @do(NS[Env, None])
 def activation_complete() -> Do:
     rplugins = yield NS.inspect_either(lambda a: a.uninitialized_rplugins)
     tracked = rplugins.filter(lambda a: a.rplugin.track)
-    failed = yield NS.lift(initialize_plugins(tracked))
-    yield NS.modify(lambda a: a.initialization_complete(failed))
+    failed, timings = yield NS.lift(initialize_plugins(tracked))
+    yield NS.modify(lambda a: a.initialization_complete(failed).add_timings(timings))
+
+
+@do(NS[CrmRibosome, None])
+def define_lazy_triggers(rplugins: List[Rplugin]) -> Do:
+    dir = yield Ribo.setting(venv_dir)
+    yield NS.lift(define_lazy_stubs(dir, rplugins))
 
 
 @do(NS[CrmRibosome, None])
 def activate_newly_installed() -> Do:
+    '''start the hosts of all installed plugins, except for those with lazy triggers, for which stubs are defined that
+    activate them on first use.
+    '''
     new = yield Ribo.zoom_main(NS.inspect_either(lambda a: a.inactive))
-    yield activate_multi(new)
+    lazy, eager = new.split(lambda a: not a.lazy.empty)
+    yield activate_multi(eager)
+    yield define_lazy_triggers(lazy) if lazy else NS.unit
     yield Ribo.zoom_main(activation_complete())
 
 
+@do(NS[CrmRibosome, None])
+def record_lazy_handlers(dir: Path, rplugin: Rplugin) -> Do:
+    triggers = yield NS.lift(N.recover_failure(nvim_call_json(f'{camelcaseify(rplugin.name)}RpcTriggers'),
+                                               lambda a: N.pure(Nil)))
+    yield NS.from_io(record_handlers(dir, rplugin.name, handler_commands(rplugin.name, Lists.wrap(triggers))))
+
+
+@do(NS[CrmRibosome, None])
+def activate_lazy(name: str) -> Do:
+    '''activate a plugin when one of its lazy triggers is used, removing the stubs before its host defines the real
+    handlers.
+    The plugin's commands are cached so that stubs for all of them can be defined in the next session.
+    '''
+    rplugin = yield Ribo.zoom_main(NS.inspect_either(lambda a: a.rplugin(name)))
+    active = yield Ribo.zoom_main(NS.inspect(lambda a: a.active_by_name(List(name))))
+    if active.empty:
+        yield Ribo.modify_main(lambda a: a.start_timings())
+        dir = yield Ribo.setting(venv_dir)
+        commands = yield NS.from_io(lazy_commands(dir, rplugin))
+        yield NS.lift(remove_lazy_stubs(rplugin, commands))
+        yield activate_multi(List(rplugin))
+        yield Ribo.zoom_main(activation_complete())
+        yield record_lazy_handlers(dir, rplugin)
+
+
 def add_venv(name: str) -> State[Env, None]:
     return State.modify(lambda s: s if name in s.venvs else s.append1.venvs(name))
 
@@ -244,14 +413,49 @@ def already_installed(venv_dir: Path, venv_rplugin: InstallableRplugin) -> Do:
     yield add_venv(venv.meta).nvim
 
 
+@do(NS[Env, None])
+def configure_jobs() -> Do:
+    from chromatin.schedule import job_scheduler
+    limits = yield NS.lift(install_jobs.value_or_default())
+    yield NS.from_io(IO.delay(job_scheduler().configure, limits))
+
+
+def install_job(rplugin: InstallableRplugin) -> str:
+    return 'haskell' if isinstance(rplugin.meta, HsInstallableRplugin) else 'pip'
+
+
 @prog.subproc.gather
 @do(NS[Env, GatherSubprocesses[Venv]])
-def install_plugins_procs(names: List[str], update: Boolean) -> Do:
+def install_plugins_procs(names: List[str], update: Boolean, relock: Boolean) -> Do:
+    '''run the installs in the scheduler's slots, with updates queued behind interactive installs and rebuilds.
+    The shared `pip wheel` passes run in `pip` slots as part of their groups' first install.
+    '''
+    from chromatin.install.main import install_rplugin_subproc, prefetch_wheels, PrefetchedSubprocess
+    from chromatin.lock import read_lock
+    from chromatin.schedule import ScheduledSubprocess, gather_timeout, interactive, background
     action = 'updating' if update else 'installing'
     log.debug(f'{action} rplugins: {names}')
     rplugins = yield installable_rplugins_from_names(names)
-    procs = yield NS.lift(rplugins.traverse(lambda a: install_rplugin_subproc(a)(a.meta), NvimIO))
-    return GatherSubprocesses(procs, timeout=600)
+    dir = yield NS.lift(venv_dir.value_or_default())
+    lock = yield NS.from_io(IO.pure(Lockfile.cons()) if relock else read_lock(dir))
+    priority = background if update else interactive
+    builds = yield NS.lift(prefetch_wheels(rplugins, lock, priority))
+    def subproc(rplugin: InstallableRplugin) -> NvimIO[Subprocess[str]]:
+        return install_rplugin_subproc(rplugin, update, lock)(rplugin.meta)
+    procs = yield NS.lift(rplugins.traverse(subproc, NvimIO))
+    yield configure_jobs()
+    jobs = rplugins.map(install_job)
+    def schedule(rplugin: InstallableRplugin, proc: Subprocess[str], job: str) -> Subprocess[str]:
+        return (
+            builds.lift(rplugin.rplugin.name)
+            .map(lambda a: PrefetchedSubprocess(proc, a[0], a[1], priority))
+            .get_or(ScheduledSubprocess, proc, job, priority)
+        )
+    scheduled = rplugins.zip(procs, jobs).map3(schedule)
+    wheel_jobs = Lists.wrap(builds.values()).map(lambda a: a[1]).distinct.map(lambda a: 'pip')
+    all_jobs = jobs + wheel_jobs
+    timeout = sum(all_jobs.distinct.map(lambda a: gather_timeout(a, all_jobs.count(a))))
+    return GatherSubprocesses(scheduled, timeout=timeout)
 
 
 @prog
@@ -266,8 +470,8 @@ def install_plugins_result(results: List[Either[IOException, SubprocessResult[st
 
 
 @prog.do(Tuple[List[SubprocessResult[str]], List[str]])
-def install_plugins(names: List[str], update: Boolean) -> Do:
-    result = yield install_plugins_procs(names, update)
+def install_plugins(names: List[str], update: Boolean, relock: Boolean) -> Do:
+    result = yield install_plugins_procs(names, update, relock)
     yield install_plugins_result(result)
 
 
@@ -320,6 +524,7 @@ class hs_rplugin_healthy(
         self.rplugin = rplugin
 
     def hackage(self, a: HsHackageRplugin) -> NS[CrmRibosome, GatherItem[Tuple[str, bool]]]:
+        from chromatin.activate.haskell import cabal_rplugin_executable
         exe = cabal_rplugin_executable(self.rplugin)
         return NS.pure(GatherIO(IO.pure((self.rplugin.name, exe.is_file()))))
 
@@ -358,26 +563,178 @@ class healthcheck_result(
         return a.result.data, a.result.retval == 0
 
 
-@prog.gather
-@do(NS[CrmRibosome, List[Either[IOException, GatherIOResult[Tuple[InstallableRplugin, bool]]]]])
-def health_statuses() -> Do:
+@prog
+@do(NS[CrmRibosome, Tuple[List[str], List[str]]])
+def manifest_statuses() -> Do:
     dir = yield Ribo.setting(venv_dir)
     all_venvs = yield Ribo.inspect_main(lambda a: a.venvs)
-    log.debug(f'running health check on venvs: {all_venvs.join_comma}')
     installable = yield Ribo.zoom_main(all_venvs.traverse(lambda a: installable_rplugin_from_name(dir, a), NS))
+    trusted = yield NS.from_io(trusted_rplugins(dir, installable))
+    log.debug(f'venvs with valid manifest entries: {trusted.join_comma}')
+    return trusted, all_venvs.remove_all(trusted)
+
+
+@prog.gather
+@do(NS[CrmRibosome, List[Either[IOException, GatherIOResult[Tuple[InstallableRplugin, bool]]]]])
+def health_statuses(venvs: List[str]) -> Do:
+    dir = yield Ribo.setting(venv_dir)
+    log.debug(f'running health check on venvs: {venvs.join_comma}')
+    installable = yield Ribo.zoom_main(venvs.traverse(lambda a: installable_rplugin_from_name(dir, a), NS))
     gather_items = yield installable.traverse(lambda a: rplugin_healthy(a.rplugin)(a.meta), NS)
     return Gather(gather_items, 5)
 
 
 @prog.do(Tuple[List[str], List[str]])
 def split_plugins_by_install_status() -> Do:
-    output = yield health_statuses()
+    trusted, unchecked = yield manifest_statuses()
+    output = yield health_statuses(unchecked)
     fatal, success = split_either_list(output)
     if fatal:
         ribo_log.error(f'failed to run healthcheck for plugins: {fatal.join_comma}')
     statuses = success.map(healthcheck_result.match)
     present, absent = split_by_status_zipped(statuses)
-    return present, absent
+    return trusted + present, absent
+
+
+@do(NS[Env, None])
+def record_manifest_entries(names: List[str]) -> Do:
+    dir = yield NS.lift(venv_dir.value_or_default())
+    installable = yield names.traverse(lambda a: installable_rplugin_from_name(dir, a), NS)
+    yield NS.from_io(record_manifest(dir, installable).recover(
+        lambda e: log.debug(f'failed to update install manifest: {e}')
+    ))
+
+
+@do(NS[Env, List[str]])
+def lock_plugins(names: List[str]) -> Do:
+    '''pin the installed distributions of the python plugins in `names` in the lockfile, returning the locked names.
+    '''
+    from chromatin.lock import read_lock, write_lock, lock_venv
+    dir = yield NS.lift(venv_dir.value_or_default())
+    installable = yield names.traverse(lambda a: installable_rplugin_from_name(dir, a), NS)
+    venv_rplugins = installable.filter(lambda a: isinstance(a.meta, VenvRplugin))
+    def failed(name: str, error: Exception) -> List[PluginLock]:
+        log.error(f'failed to lock `{name}`: {error}')
+        return List()
+    def lock_rplugin(rplugin: InstallableRplugin) -> IO[List[PluginLock]]:
+        name = rplugin.rplugin.name
+        return (
+            lock_venv(dir, name, venv_rplugin_reqs(rplugin, rplugin.meta))
+            .map(Lists.wrap)
+            .recover(lambda e: failed(name, e))
+        )
+    locks = yield NS.from_io(venv_rplugins.traverse(lock_rplugin, IO))
+    current = yield NS.from_io(read_lock(dir))
+    yield NS.from_io(write_lock(dir, current.update(locks.join)))
+    return locks.join.map(lambda a: a.name)
+
+
+@do(NS[Env, List[str]])
+def pinned_plugins(names: List[str]) -> Do:
+    '''the python plugins in `names` that would be installed from their lock entry, which an update doesn't change.
+    '''
+    from chromatin.lock import read_lock, matching_lock
+    dir = yield NS.lift(venv_dir.value_or_default())
+    installable = yield names.traverse(lambda a: installable_rplugin_from_name(dir, a), NS)
+    venv_rplugins = installable.filter(lambda a: isinstance(a.meta, VenvRplugin))
+    lock = yield NS.from_io(read_lock(dir))
+    def pinned(rplugin: InstallableRplugin) -> IO[List[str]]:
+        name = rplugin.rplugin.name
+        python = cons_venv_under(dir, name).meta.python_executable
+        entry = matching_lock(lock, name, python, venv_rplugin_reqs(rplugin, rplugin.meta))
+        return entry.map(lambda a: a.map(lambda b: name).to_list)
+    result = yield NS.from_io(venv_rplugins.traverse(pinned, IO))
+    return result.join
+
+
+@do(NS[Env, List[PackageVersion]])
+def plugin_versions(names: List[str]) -> Do:
+    '''compare the installed versions of the plugins in `names` with the newest ones on the index and in the wheelhouse.
+    '''
+    from chromatin.outdated import check_versions, unknown_versions
+    dir = yield NS.lift(venv_dir.value_or_default())
+    installable = yield names.traverse(lambda a: installable_rplugin_from_name(dir, a), NS)
+    def failed(error: Exception) -> List[PackageVersion]:
+        log.debug(f'checking plugin versions failed: {error}')
+        return unknown_versions(installable)
+    yield NS.from_io(check_versions(dir, installable).recover(failed))
+
+
+@do(NS[Env, None])
+def compile_installed(names: List[str]) -> Do:
+    '''byte-compile newly installed plugins, into the shared pycache dir if `pycache_prefix` is set.
+    Must run before the manifest entries are recorded, since it creates `__pycache__` dirs.
+    '''
+    from chromatin.bytecode import compile_venvs, pycache_dir
+    if names:
+        dir = yield NS.lift(venv_dir.value_or_default())
+        use_prefix = yield NS.lift(pycache_prefix.value_or_default())
+        prefix = Just(pycache_dir(dir)) if use_prefix else Nothing
+        yield NS.from_io(compile_venvs(dir, names, prefix).recover(
+            lambda e: log.debug(f'failed to byte-compile venvs: {e}')
+        ))
+
+
+@do(NS[Env, None])
+def retain_installed_wheels(names: List[str]) -> Do:
+    '''mark the wheels of newly installed plugins as used and shrink the wheelhouse to its configured size.
+    '''
+    from chromatin.wheelhouse import retain_wheels
+    max_size = yield NS.lift(wheelhouse_size.value_or_default())
+    if max_size > 0 and names:
+        dir = yield NS.lift(venv_dir.value_or_default())
+        yield NS.from_io(retain_wheels(dir, names, max_size * 1024 * 1024).recover(
+            lambda e: log.debug(f'failed to update the wheelhouse: {e}')
+        ))
+
+
+@do(NS[Env, None])
+def link_installed(names: List[str]) -> Do:
+    '''deduplicate the files of newly installed plugins through the package store, if enabled.
+    Must run before the manifest entries are recorded, since replacing files changes directory mtimes.
+    '''
+    from chromatin.store import link_venvs
+    enabled = yield NS.lift(package_store.value_or_default())
+    if enabled and names:
+        dir = yield NS.lift(venv_dir.value_or_default())
+        yield NS.from_io(link_venvs(dir, names.map(lambda a: dir / a)).recover(
+            lambda e: log.debug(f'failed to link venvs into the package store: {e}')
+        ))
+
+
+@do(NvimIO[bool])
+def reinstall_rebuilt(rplugin: InstallableRplugin) -> Do:
+    '''construct the install subprocess only after the venv was rebuilt, so that the wheelhouse and python path are
+    resolved from the new interpreter.
+    '''
+    from chromatin.install.main import install_rplugin_subproc
+    from chromatin.upgrade import reinstall_venv
+    install = yield install_rplugin_subproc(rplugin)(rplugin.meta)
+    yield N.from_io(reinstall_venv(rplugin.rplugin, install))
+
+
+@do(NvimIO[None])
+def rebuild_and_report(global_interpreter: Maybe[str], dir: Path, rplugin: InstallableRplugin, options: VenvOptions
+                       ) -> Do:
+    from chromatin.upgrade import rebuild_venv, rebuild_failed
+    name = rplugin.rplugin.name
+    start = yield N.simple(now)
+    rebuilt = yield N.from_io(rebuild_venv(global_interpreter, dir, rplugin.rplugin, options))
+    success = yield (
+        N.recover_failure(reinstall_rebuilt(rplugin), lambda a: N.pure(rebuild_failed(name, a)))
+        if rebuilt else
+        N.pure(False)
+    )
+    end = yield N.simple(now)
+    yield nvim_command('CrmRebuilt', name, int(success), start, end)
+
+
+def fork_rebuild(global_interpreter: Maybe[str], dir: Path, options: VenvOptions, rplugin: InstallableRplugin
+                 ) -> NvimIO[None]:
+    '''rebuild and reinstall a venv in a background thread, which runs `CrmRebuilt` when it is done, so that each
+    plugin is activated as soon as it is reinstalled.
+    '''
+    return N.fork(rebuild_and_report, global_interpreter, dir, rplugin, options).replace(None)
 
 
 def store_errors(errors: List[str]) -> Callable[[Env], Env]:
@@ -385,4 +742,6 @@ def store_errors(errors: List[str]) -> Callable[[Env], Env]:
 
 
 __all__ = ('add_crm_venv', 'read_conf', 'install_plugins', 'add_installed', 'split_plugins_by_install_status',
-           'store_errors',)
+           'store_errors', 'record_manifest_entries', 'fork_rebuild',
+           'compile_installed', 'retain_installed_wheels', 'lock_plugins', 'pinned_plugins',
+           'configure_jobs', 'plugin_versions',)
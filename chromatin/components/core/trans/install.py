@@ -1,4 +1,4 @@
-from amino import do, List, _, Lists, Path
+from amino import do, List, _, Lists, Path, Nil
 from amino.do import Do
 from amino.boolean import false, true
 from amino.io import IOException
@@ -14,14 +14,18 @@ from ribosome.compute.prog import Prog
 from ribosome.compute.ribosome_api import Ribo
 
 from chromatin.components.core.logic import (install_plugins, add_installed, reboot_plugins, activate_by_names,
-                                             deactivate_by_names, split_plugins_by_install_status)
+                                             deactivate_by_names, split_plugins_by_install_status,
+                                             record_manifest_entries, link_installed, compile_installed,
+                                             retain_installed_wheels, lock_plugins, plugin_versions, pinned_plugins)
 from chromatin.util import resources
 from chromatin.model.venv import Venv
 from chromatin.env import Env
 from chromatin.settings import venv_dir, autoreboot
 from chromatin.components.core.trans.tpe import CrmRibosome
+from chromatin.components.core.trans.timing import timed
 
 log = module_log()
+relock_flag = '--relock'
 
 
 @prog.echo
@@ -32,6 +36,10 @@ def install_result(installed: List[SubprocessResult[str]], preinstalled: List[st
     success_rplugins = success / _.data
     failed_rplugins = failed / _.data
     yield (success_rplugins + preinstalled).traverse(add_installed, NS)
+    yield retain_installed_wheels(success_rplugins)
+    yield compile_installed(success_rplugins)
+    yield link_installed(success_rplugins)
+    yield record_manifest_entries(success_rplugins + preinstalled)
     return (
         Echo.error(resources.plugins_install_failed(failed_rplugins))
         if not failed.empty else
@@ -53,9 +61,9 @@ def installing_message(rplugins: List[str]) -> Do:
 
 @prog.do(None)
 def install_rplugins() -> Do:
-    preinstalled, missing = yield split_plugins_by_install_status()
+    preinstalled, missing = yield timed('health check', split_plugins_by_install_status())
     yield installing_message(missing)
-    installed, errors = yield install_plugins(missing, false)
+    installed, errors = yield timed('install', install_plugins(missing, false, false))
     yield install_result(installed, preinstalled, errors)
 
 
@@ -105,23 +113,69 @@ def updateable_venvs(plugins: List[str]) -> Do:
     yield Ribo.zoom_main(updateable(dir, plugins).nvim)
 
 
+@prog
+@do(NS[CrmRibosome, List[str]])
+def pinned_venvs(venvs: List[str], relock: bool) -> Do:
+    '''select the venvs that would be reinstalled from the lock, unless the lock is rewritten.
+    '''
+    if relock:
+        return Nil
+    yield Ribo.zoom_main(pinned_plugins(venvs))
+
+
+@prog.echo
+def report_pinned(pinned: List[str]) -> NS[CrmRibosome, Echo]:
+    return NS.pure(Echo.info(resources.pinned_plugins(pinned)))
+
+
+@prog
+@do(NS[CrmRibosome, List[str]])
+def outdated_venvs(venvs: List[str], relock: bool) -> Do:
+    '''select the venvs that have a newer release, or all of them when relocking, since the lock is rewritten.
+    '''
+    from chromatin.outdated import outdated_plugins
+    if relock:
+        return venvs
+    versions = yield Ribo.zoom_main(plugin_versions(venvs))
+    outdated = outdated_plugins(versions)
+    log.debug(f'outdated plugins: {outdated}')
+    return venvs.filter(outdated.contains)
+
+
 @prog.do(None)
-def update_plugins_io(plugins: List[str]) -> Do:
+def update_plugins_io(plugins: List[str], relock: bool) -> Do:
+    '''run pip only for the plugins that have a newer release.
+    Locked plugins are skipped, since they would be reinstalled in their pinned versions.
+    '''
     venvs = yield updateable_venvs(plugins)
+    pinned = yield pinned_venvs(venvs, relock)
+    if pinned:
+        yield report_pinned(pinned)
+    outdated = yield outdated_venvs(venvs.filter_not(pinned.contains), relock)
     yield (
         Prog.error(resources.no_plugins_match_for_update(plugins))
         if venvs.empty else
-        install_plugins(venvs, true)
+        Prog.pure((Nil, Nil))
+        if outdated.empty else
+        install_plugins(outdated, true, relock)
     )
 
 
 @prog.echo
 @do(NS[CrmRibosome, Echo])
-def updated_plugins(results: List[SubprocessResult[Venv]], errors: List[IOException]) -> Do:
+def updated_plugins(results: List[SubprocessResult[Venv]], errors: List[IOException], relock: bool) -> Do:
     errors.foreach(lambda e: ribo_log.caught_exception('updating plugin', e))
+    if results.empty and errors.empty:
+        return Echo.info(resources.plugins_up_to_date)
     success, failed = results.split(_.success)
     success_venvs = success / _.data
     failed_venvs = failed / _.data
+    yield Ribo.zoom_main(retain_installed_wheels(success_venvs))
+    yield Ribo.zoom_main(compile_installed(success_venvs))
+    yield Ribo.zoom_main(link_installed(success_venvs))
+    yield Ribo.zoom_main(record_manifest_entries(success_venvs))
+    if relock:
+        yield Ribo.zoom_main(lock_plugins(success_venvs))
     yield updated(success_venvs)
     return (
         Echo.info(resources.updated_plugins(success_venvs))
@@ -132,9 +186,37 @@ def updated_plugins(results: List[SubprocessResult[Venv]], errors: List[IOExcept
 
 @prog.do(None)
 def update_plugins(*ps: str) -> Do:
-    plugins = Lists.wrap(ps)
-    success, fail = yield update_plugins_io(plugins)
-    yield updated_plugins(success, fail)
+    '''`--relock` updates the plugins regardless of the lockfile and records the new versions in it.
+    '''
+    args = Lists.wrap(ps)
+    plugins = args.without(relock_flag)
+    relock = args.contains(relock_flag)
+    success, fail = yield update_plugins_io(plugins, relock)
+    yield updated_plugins(success, fail, relock)
+
+
+@prog.echo
+@do(NS[CrmRibosome, Echo])
+def lock(*ps: str) -> Do:
+    '''pin the installed distributions of the given or all installed plugins in the lockfile.
+    '''
+    names = yield Ribo.zoom_main(installed_with_crm().nvim)
+    requested = filter_venvs_by_name(names, Lists.wrap(ps))
+    locked = yield Ribo.zoom_main(lock_plugins(requested))
+    return Echo.info(resources.locked_plugins(locked))
+
+
+@prog.echo
+@do(NS[CrmRibosome, Echo])
+def outdated(*ps: str) -> Do:
+    '''list the installed and newest versions of the requirements of the given or all installed plugins that would be
+    updated by `CrmUpdate`, without installing anything.
+    '''
+    from chromatin.outdated import is_outdated
+    names = yield Ribo.zoom_main(installed_with_crm().nvim)
+    requested = filter_venvs_by_name(names, Lists.wrap(ps))
+    versions = yield Ribo.zoom_main(plugin_versions(requested))
+    return Echo.info(resources.outdated_plugins(versions.filter(is_outdated)))
 
 
 @prog
@@ -142,4 +224,4 @@ def reboot(*plugins: str) -> NS[CrmRibosome, None]:
     return reboot_plugins(Lists.wrap(plugins)).replace(None)
 
 
-__all__ = ('install_result', 'install_missing', 'update_plugins')
+__all__ = ('install_result', 'install_missing', 'update_plugins', 'lock', 'outdated')
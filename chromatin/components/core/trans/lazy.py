@@ -0,0 +1,29 @@
+from amino import do, Do, Lists
+from ribosome.nvim.io.state import NS
+from ribosome.compute.api import prog
+
+from chromatin.components.core.logic import activate_lazy
+from chromatin.components.core.trans.tpe import CrmRibosome
+from chromatin.activate.lazy import redispatch_command, redispatch_event
+
+
+@prog
+@do(NS[CrmRibosome, None])
+def lazy_command(name: str, range: str, line1: str, line2: str, command: str, *args: str) -> Do:
+    '''called by the stub of a lazy plugin's command, which is executed again after activation.
+    The stub passes the command's arguments verbatim as a single argument.
+    '''
+    yield activate_lazy(name)
+    yield NS.lift(redispatch_command(name, range, line1, line2, command, Lists.wrap(args).join_tokens))
+
+
+@prog
+@do(NS[CrmRibosome, None])
+def lazy_event(name: str, event: str, *pattern: str) -> Do:
+    '''called by the autocmd of a lazy plugin's filetype or event trigger, which is triggered again after activation.
+    '''
+    yield activate_lazy(name)
+    yield NS.lift(redispatch_event(name, event, Lists.wrap(pattern)))
+
+
+__all__ = ('lazy_command', 'lazy_event',)
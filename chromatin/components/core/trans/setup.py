@@ -6,28 +6,47 @@ from amino.logging import module_log
 from amino.case import Case
 from amino.state import State
 from ribosome.nvim.io.state import NS
+from ribosome.nvim.io.compute import NvimIO
 from ribosome import ribo_log
 from ribosome.compute.api import prog
 from ribosome.compute.output import Echo, GatherIOs
 from ribosome.compute.ribosome_api import Ribo
+from ribosome.nvim.api.command import doautocmd
+from ribosome.nvim.api.function import nvim_call_function
 
-from chromatin.components.core.logic import add_crm_venv, read_conf, activate_newly_installed, add_venv, store_errors
+from chromatin.components.core.logic import (add_crm_venv, read_conf, activate_newly_installed, add_venv, store_errors,
+                                             add_installed, link_installed, record_manifest_entries, fork_rebuild,
+                                             compile_installed, retain_installed_wheels, configure_jobs)
 from chromatin.model.rplugin import (Rplugin, cons_rplugin, ConfigRplugin, InstallableRplugin, InstallableRpluginMeta,
                                      VenvRplugin, HsInstallableRplugin)
 from chromatin.components.core.trans.install import install_rplugins
-from chromatin.model.venv import Venv, VenvStatus, VenvPresent, VenvAbsent
+from chromatin.components.core.trans.timing import timed, start_timings
+from chromatin.model.timing import Timing
+from chromatin.model.venv import Venv, VenvStatus, VenvPresent, VenvAbsent, VenvOptions, VenvDamaged
 from chromatin.util import resources
-from chromatin.settings import venv_dir, autostart, interpreter
+from chromatin.settings import venv_dir, autostart, interpreter, venv_templates, base_layer
 from chromatin.env import Env
 from chromatin.components.core.trans.tpe import CrmRibosome
 from chromatin.rplugin import cons_installable_rplugin, bootstrap_venv, venv_rplugin_status
 
 log = module_log()
+force_flag = '--force'
+
+
+@do(NvimIO[None])
+def signal_ready() -> Do:
+    '''run the `User ChromatinReady` autocmd if one is defined, since neovim prints `No matching autocommands`
+    otherwise.
+    '''
+    defined = yield nvim_call_function('exists', '#User#ChromatinReady')
+    if defined:
+        yield doautocmd('User', 'ChromatinReady')
 
 
 @prog
 @do(NS[CrmRibosome, List[Rplugin]])
 def initialize() -> Do:
+    yield NS.lift(signal_ready())
     yield add_crm_venv()
     yield Ribo.zoom_main(read_conf())
 
@@ -47,20 +66,30 @@ def bootstrap_result(result: List[Either[str, str]]) -> Do:
 
 class bootstrap_venv_rplugin(Case[VenvStatus, IO[str]], alg=VenvStatus):
 
-    def __init__(self, global_interpreter: Maybe[Path], dir: Path) -> None:
+    def __init__(self, global_interpreter: Maybe[Path], dir: Path, options: VenvOptions) -> None:
         self.global_interpreter = global_interpreter
         self.dir = dir
+        self.options = options
 
     def present(self, status: VenvPresent) -> IO[str]:
         return IO.pure(status.venv.name)
 
     def absent(self, status: VenvAbsent) -> IO[str]:
-        return bootstrap_venv(self.global_interpreter, self.dir, status.rplugin)
+        return bootstrap_venv(self.global_interpreter, self.dir, status.rplugin, self.options)
+
+    def damaged(self, status: VenvDamaged) -> IO[str]:
+        from chromatin.doctor import repair_venv
+        return repair_venv(self.global_interpreter, self.dir, status.rplugin, status.damage).recover_with(
+            lambda e: self.repair_failed(status, e))
+
+    def repair_failed(self, status: VenvDamaged, error: Exception) -> IO[str]:
+        log.debug(f'rebuilding venv of `{status.rplugin.name}`: {error}')
+        return bootstrap_venv(self.global_interpreter, self.dir, status.rplugin, self.options)
 
 
 @do(NS[CrmRibosome, List[InstallableRplugin]])
 def installable_plugins() -> Do:
-    plugins = yield Ribo.inspect_main(lambda a: a.rplugins)
+    plugins = yield Ribo.inspect_main(lambda a: a.rplugins.filter_not(lambda r: r.name in a.rebuilding))
     return plugins.flat_map(cons_installable_rplugin.match)
 
 
@@ -74,28 +103,41 @@ class bootstrap_rplugin(
         alg=InstallableRpluginMeta,
 ):
 
-    def __init__(self, rplugin: InstallableRplugin, dir: Path, global_interpreter: Maybe[Path]) -> None:
+    def __init__(self, rplugin: InstallableRplugin, dir: Path, global_interpreter: Maybe[Path], options: VenvOptions
+                 ) -> None:
         self.rplugin = rplugin
         self.dir = dir
         self.global_interpreter = global_interpreter
+        self.options = options
 
     @do(NS[CrmRibosome, List[IO[str]]])
     def venv(self, venv_rplugin: VenvRplugin) -> Do:
         status = yield NS.from_io(venv_rplugin_status(self.dir, self.rplugin.rplugin))
-        return bootstrap_venv_rplugin(self.global_interpreter, self.dir)(status)
+        return bootstrap_venv_rplugin(self.global_interpreter, self.dir, self.options)(status)
 
     def hs(self, a: HsInstallableRplugin) -> NS[CrmRibosome, List[IO[str]]]:
         return bootstrap_hs_rplugin(self.rplugin, a)
 
 
+@do(NS[CrmRibosome, VenvOptions])
+def venv_options() -> Do:
+    templates = yield Ribo.setting(venv_templates)
+    layer = yield Ribo.setting(base_layer)
+    return VenvOptions(templates, layer)
+
+
 @prog.io.gather
 @do(NS[CrmRibosome, GatherIOs[str]])
 def bootstrap_rplugins_io() -> Do:
+    from chromatin.schedule import scheduled, gather_timeout, interactive
     vr = yield installable_plugins()
     dir = yield Ribo.setting(venv_dir)
     global_interpreter = yield Ribo.setting_raw(interpreter)
-    ios = yield vr.traverse(lambda a: bootstrap_rplugin(a, dir, global_interpreter.to_maybe)(a.meta), NS)
-    yield NS.pure(GatherIOs(ios, timeout=30))
+    options = yield venv_options()
+    ios = yield vr.traverse(lambda a: bootstrap_rplugin(a, dir, global_interpreter.to_maybe, options)(a.meta), NS)
+    yield Ribo.zoom_main(configure_jobs())
+    timeout = max(30., gather_timeout('venv', ios.length))
+    yield NS.pure(GatherIOs(ios.map(lambda a: scheduled('venv', interactive, a)), timeout=timeout))
 
 
 @prog.do(None)
@@ -107,6 +149,47 @@ def bootstrap_rplugins() -> Do:
     yield bootstrap_result(result)
 
 
+@prog
+@do(NS[CrmRibosome, None])
+def rebuild_outdated() -> Do:
+    '''rebuild the venvs whose interpreter was upgraded or removed in the background, excluding them from the regular
+    bootstrap.
+    '''
+    from chromatin.upgrade import outdated_venvs
+    dir = yield Ribo.setting(venv_dir)
+    installable = yield installable_plugins()
+    venvs = installable.filter(lambda a: isinstance(a.meta, VenvRplugin))
+    outdated = yield NS.from_io(outdated_venvs(dir, venvs.map(lambda a: a.rplugin.name)))
+    if outdated:
+        global_interpreter = yield Ribo.setting_raw(interpreter)
+        options = yield venv_options()
+        yield Ribo.modify_main(lambda a: a.append.rebuilding(outdated))
+        rebuild = venvs.filter(lambda a: a.rplugin.name in outdated)
+        yield NS.lift(rebuild.traverse(lambda a: fork_rebuild(global_interpreter.to_maybe, dir, options, a), NvimIO))
+
+
+@prog.echo
+@do(NS[CrmRibosome, Echo])
+def rebuilt(name: str, success: str, start: str, end: str) -> Do:
+    '''called by the thread that rebuilt the venv of `name` after an interpreter change.
+    the rebuild is recorded as a phase of the current run, since it overlaps with the regular startup.
+    '''
+    started, finished = float(start), float(end)
+    timings = List(Timing.cons('rebuild', started, finished), Timing.cons('rebuild', started, finished, name))
+    yield Ribo.modify_main(lambda a: a.mod.rebuilding(lambda r: r.without(name)).add_timings(timings))
+    if success == '1':
+        yield Ribo.zoom_main(add_venv(name).nvim)
+        yield Ribo.zoom_main(add_installed(name).nvim)
+        yield Ribo.zoom_main(retain_installed_wheels(List(name)))
+        yield Ribo.zoom_main(compile_installed(List(name)))
+        yield Ribo.zoom_main(link_installed(List(name)))
+        yield Ribo.zoom_main(record_manifest_entries(List(name)))
+        yield activate_newly_installed()
+    else:
+        yield Ribo.modify_main(store_errors(List(resources.rebuild_failed(name))))
+    return Echo.info(resources.rebuilt_plugin(name)) if success == '1' else Echo.error(resources.rebuild_failed(name))
+
+
 @prog
 @do(NS[CrmRibosome, None])
 def post_setup() -> Do:
@@ -115,7 +198,8 @@ def post_setup() -> Do:
 
 @prog.do(None)
 def setup_plugins() -> Do:
-    yield bootstrap_rplugins()
+    yield rebuild_outdated()
+    yield timed('bootstrap', bootstrap_rplugins())
     yield install_rplugins()
     yield post_setup()
 
@@ -136,7 +220,8 @@ def plugins_added(plugins: List[Rplugin]) -> Do:
 
 @prog.do(None)
 def init() -> Do:
-    plugins = yield initialize()
+    yield start_timings()
+    plugins = yield timed('initialize', initialize())
     yield plugins_added(plugins)
 
 
@@ -148,6 +233,42 @@ def show_plugins() -> Do:
     return Echo.info(resources.show_plugins(dir, rplugins))
 
 
+@prog.echo
+@do(NS[CrmRibosome, Echo])
+def store_stats() -> Do:
+    from chromatin.store import read_store_stats
+    dir = yield Ribo.setting(venv_dir)
+    stats = yield NS.from_io(read_store_stats(dir))
+    return Echo.info(resources.show_store_stats(stats))
+
+
+@do(NS[CrmRibosome, List[str]])
+def referenced_venvs() -> Do:
+    '''the names of the venvs that are used by the active configuration or the `rplugins` setting, so that plugins
+    aren't considered orphaned before chromatin has been initialized.
+    '''
+    env = yield Ribo.inspect_main(lambda a: a.rplugins.map(lambda r: r.name) + List(*a.chromatin_venv.to_list))
+    configured = yield Ribo.zoom_main(read_conf())
+    return (env + configured.map(lambda a: a.name)).distinct
+
+
+@prog.echo
+@do(NS[CrmRibosome, Echo])
+def gc(*args: str) -> Do:
+    '''list the disk usage of the venvs and the orphaned ones, which are only removed with `--force`.
+    '''
+    from chromatin.garbage import scan_venvs, remove_orphans
+    from chromatin.template import prune_templates
+    force = force_flag in args
+    dir = yield Ribo.setting(venv_dir)
+    names = yield referenced_venvs()
+    usage = yield NS.from_io(scan_venvs(dir, names))
+    if force:
+        yield NS.from_io(remove_orphans(dir, usage))
+    yield NS.from_io(IO.delay(prune_templates, dir))
+    return Echo.info(resources.show_gc(usage, force))
+
+
 class AddPluginOptions(Dat['AddPluginOptions']):
 
     @staticmethod
@@ -158,6 +279,10 @@ class AddPluginOptions(Dat['AddPluginOptions']):
             interpreter: str=None,
             extensions: List[str]=None,
             track: bool=True,
+            host_group: str=None,
+            on_cmd: List[str]=None,
+            on_ft: List[str]=None,
+            on_event: List[str]=None,
     ) -> 'AddPluginOptions':
         return AddPluginOptions(
             Maybe.optional(name),
@@ -166,6 +291,10 @@ class AddPluginOptions(Dat['AddPluginOptions']):
             Maybe.optional(interpreter),
             Maybe.optional(extensions),
             Maybe.optional(track),
+            Maybe.optional(host_group),
+            Maybe.optional(on_cmd),
+            Maybe.optional(on_ft),
+            Maybe.optional(on_event),
         )
 
     def __init__(
@@ -176,6 +305,10 @@ class AddPluginOptions(Dat['AddPluginOptions']):
             interpreter: Maybe[str],
             extensions: Maybe[List[str]],
             track: Maybe[bool],
+            host_group: Maybe[str],
+            on_cmd: Maybe[List[str]],
+            on_ft: Maybe[List[str]],
+            on_event: Maybe[List[str]],
     ) -> None:
         self.name = name
         self.pythonpath = pythonpath
@@ -183,13 +316,19 @@ class AddPluginOptions(Dat['AddPluginOptions']):
         self.interpreter = interpreter
         self.extensions = extensions
         self.track = track
+        self.host_group = host_group
+        self.on_cmd = on_cmd
+        self.on_ft = on_ft
+        self.on_event = on_event
 
 
 @prog.do(None)
 def add_plugin(spec: str, options: AddPluginOptions) -> Do:
     plugin = cons_rplugin(ConfigRplugin(spec, options.name, options.debug, options.pythonpath, options.interpreter,
-                                        options.extensions, options.track))
+                                        options.extensions, options.track, options.host_group, options.on_cmd,
+                                        options.on_ft, options.on_event))
+    yield start_timings()
     yield plugins_added(List(plugin))
 
 
-__all__ = ('init', 'show_plugins')
+__all__ = ('init', 'show_plugins', 'store_stats', 'gc', 'rebuilt',)
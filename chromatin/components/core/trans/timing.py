@@ -0,0 +1,55 @@
+from typing import TypeVar
+
+from amino import do, Do, List
+from ribosome.nvim.io.state import NS
+from ribosome.compute.api import prog
+from ribosome.compute.prog import Prog
+from ribosome.compute.output import Echo
+from ribosome.compute.ribosome_api import Ribo
+
+from chromatin.env import Env
+from chromatin.model.timing import Timing
+from chromatin.timing import now
+from chromatin.util import resources
+from chromatin.components.core.trans.tpe import CrmRibosome
+
+A = TypeVar('A')
+
+
+@prog
+def start_timings() -> NS[Env, None]:
+    '''discard the timings of the previous run, since phases of different runs can't be compared.
+    '''
+    return NS.modify(lambda a: a.start_timings())
+
+
+@prog
+def phase_started() -> NS[Env, float]:
+    return NS.simple(now)
+
+
+@prog
+@do(NS[Env, None])
+def phase_finished(phase: str, start: float) -> Do:
+    end = yield NS.simple(now)
+    yield NS.modify(lambda a: a.add_timings(List(Timing.cons(phase, start, end))))
+
+
+@prog.do(None)
+def timed(phase: str, program: Prog[A]) -> Do:
+    '''record the duration of `program` as the global timing of `phase`.
+    '''
+    start = yield phase_started()
+    result = yield program
+    yield phase_finished(phase, start)
+    return result
+
+
+@prog.echo
+@do(NS[CrmRibosome, Echo])
+def timings() -> Do:
+    recorded = yield Ribo.inspect_main(lambda a: a.timings)
+    return Echo.info(resources.show_timings(recorded))
+
+
+__all__ = ('timed', 'timings', 'start_timings',)
@@ -5,8 +5,12 @@ from ribosome.config.config import Config
 from ribosome.rpc.data.prefix_style import Plain, Full
 
 from chromatin.env import Env
-from chromatin.components.core.trans.install import update_plugins, activate, deactivate, reboot
-from chromatin.components.core.trans.setup import init, setup_plugins, show_plugins, add_plugin
+from chromatin.components.core.trans.install import (update_plugins, activate, deactivate, reboot, lock,
+                                                     outdated)
+from chromatin.components.core.trans.setup import (init, setup_plugins, show_plugins, add_plugin, store_stats,
+                                                   gc, rebuilt)
+from chromatin.components.core.trans.timing import timings
+from chromatin.components.core.trans.lazy import lazy_command, lazy_event
 
 chromatin_config: Config = Config.cons(
     name='chromatin',
@@ -17,10 +21,18 @@ chromatin_config: Config = Config.cons(
         rpc.write(add_plugin).conf(name=Just('cram'), prefix=Plain(), json=True),
         rpc.write(setup_plugins),
         rpc.write(show_plugins),
+        rpc.write(timings),
+        rpc.write(store_stats),
+        rpc.write(gc),
+        rpc.write(rebuilt),
+        rpc.write(lazy_command),
+        rpc.write(lazy_event),
         rpc.write(activate),
         rpc.write(deactivate),
         rpc.write(reboot),
         rpc.write(update_plugins).conf(name=Just('update')),
+        rpc.write(lock),
+        rpc.write(outdated),
     ),
     init=init,
 )
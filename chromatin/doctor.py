@@ -0,0 +1,96 @@
+'''diagnosis and in-place repair of plugin venvs, so that damage like a removed interpreter or a missing pip doesn't
+cause the venv to be rebuilt and all its packages to be reinstalled.
+'''
+import os
+import shutil
+
+from amino import Path, IO, do, Do, List, Maybe, Nothing, Lists
+from amino.logging import module_log
+
+from ribosome.process import Subprocess
+
+from chromatin.model.venv import VenvDamage, BrokenInterpreter, StaleConfig, MissingSite, MissingPip
+from chromatin.model.rplugin import Rplugin
+from chromatin.util.interpreter import python_interpreter
+from chromatin.seed import seed_pip
+from chromatin.venv import venv_config
+
+log = module_log()
+
+
+def site_dirs(dir: Path) -> List[Path]:
+    return Lists.wrap((dir / 'lib').glob('python3.*/site-packages')).filter(lambda a: a.is_dir())
+
+
+def diagnose(dir: Path) -> Maybe[List[VenvDamage]]:
+    '''classify the damage of the venv in `dir`, or `Nothing` if there is no venv at all.
+    '''
+    def check(config: dict) -> List[VenvDamage]:
+        python = dir / 'bin' / 'python'
+        home = config.get('home', '')
+        sites = site_dirs(dir)
+        interpreter = List() if os.access(str(python), os.X_OK) else List(BrokenInterpreter(python))
+        stale = List() if home and os.path.isdir(home) else List(StaleConfig(home))
+        site = List() if sites else List(MissingSite())
+        pip_present = (dir / 'bin' / 'pip').exists() and sites.exists(lambda a: (a / 'pip').is_dir())
+        pip = List() if pip_present else List(MissingPip())
+        return interpreter + stale + site + pip
+    return venv_config(dir).map(check) if dir.is_dir() else Nothing
+
+
+def remove_interpreter_links(dir: Path) -> None:
+    '''`venv --upgrade` doesn't replace existing links, even if they are broken.
+    '''
+    for path in (dir / 'bin').glob('python*'):
+        if path.is_symlink() or path.is_file():
+            path.unlink()
+
+
+def remove_pip_metadata(dir: Path) -> None:
+    '''`ensurepip` skips the installation if pip's metadata is left over from a partially removed pip.
+    '''
+    for site in site_dirs(dir):
+        if not (site / 'pip').is_dir():
+            for path in site.glob('pip-*.dist-info'):
+                shutil.rmtree(str(path), ignore_errors=True)
+
+
+def structural(damage: List[VenvDamage]) -> bool:
+    return damage.exists(lambda a: not isinstance(a, MissingPip))
+
+
+@do(IO[None])
+def run_repair(desc: str, *cmdline: str) -> Do:
+    retval, out, err = yield Subprocess.popen(*cmdline, timeout=60)
+    yield IO.pure(None) if retval == 0 else IO.failed(f'{desc}: {err.join_lines}')
+
+
+@do(IO[str])
+def repair_venv(global_interpreter: Maybe[str], base_dir: Path, rplugin: Rplugin, damage: List[VenvDamage]) -> Do:
+    '''recreate the interpreter links, `pyvenv.cfg` and the directory layout with `venv --upgrade` if they are
+    damaged, and link pip from the interpreter's template if it is missing, keeping the installed packages.
+    '''
+    dir = base_dir / rplugin.name
+    log.debug(f'repairing venv of `{rplugin.name}`: {damage}')
+    interpreter = yield python_interpreter(global_interpreter, rplugin.interpreter)
+    broken = damage.exists(lambda a: isinstance(a, BrokenInterpreter))
+    yield IO.delay(remove_interpreter_links, dir) if broken else IO.pure(None)
+    yield (
+        run_repair(f'upgrading venv of `{rplugin.name}`', str(interpreter), '-m', 'venv', '--upgrade', '--without-pip',
+                   str(dir))
+        if structural(damage) else
+        IO.pure(None)
+    )
+    remaining = yield IO.delay(diagnose, dir)
+    missing_pip = remaining.get_or_strict(List()).exists(lambda a: isinstance(a, MissingPip))
+    yield IO.delay(remove_pip_metadata, dir) if missing_pip else IO.pure(None)
+    yield seed_pip(base_dir, interpreter, dir, rplugin.name) if missing_pip else IO.pure(None)
+    final = yield IO.delay(diagnose, dir)
+    yield (
+        IO.pure(rplugin.name)
+        if final.contains(List()) else
+        IO.failed(f'venv of `{rplugin.name}` is still damaged after repair: {final}')
+    )
+
+
+__all__ = ('diagnose', 'repair_venv',)
@@ -7,6 +7,7 @@ from amino.dat import Dat
 
 from chromatin.model.venv import Venv, VenvMeta
 from chromatin.model.rplugin import Rplugin, ActiveRplugin, cons_rplugin, ActiveRpluginMeta
+from chromatin.model.timing import Timing
 
 
 class Env(Dat['Env']):
@@ -22,6 +23,8 @@ class Env(Dat['Env']):
             uninitialized: List[ActiveRpluginMeta]=Nil,
             triggers: Map[str, List[ActiveRpcTrigger]]=Map(),
             errors: List[str]=Nil,
+            timings: List[Timing]=Nil,
+            rebuilding: List[str]=Nil,
     ) -> 'Env':
         return Env(
             rplugins,
@@ -33,6 +36,8 @@ class Env(Dat['Env']):
             uninitialized,
             triggers,
             errors,
+            timings,
+            rebuilding,
         )
 
     def __init__(
@@ -46,6 +51,8 @@ class Env(Dat['Env']):
             uninitialized: List[ActiveRpluginMeta],
             triggers: Map[str, List[ActiveRpcTrigger]],
             errors: List[str],
+            timings: List[Timing],
+            rebuilding: List[str],
     ) -> None:
         self.rplugins = rplugins
         self.chromatin_rplugin = chromatin_rplugin
@@ -56,6 +63,8 @@ class Env(Dat['Env']):
         self.uninitialized = uninitialized
         self.triggers = triggers
         self.errors = errors
+        self.timings = timings
+        self.rebuilding = rebuilding
 
     def add_plugin(self, name: str, spec: str) -> 'Env':
         return self.append1.rplugins(cons_rplugin(name, spec))
@@ -90,11 +99,21 @@ class Env(Dat['Env']):
         return self.append1.active(rplugin).append1.uninitialized(rplugin)
 
     def initialization_complete(self, failed: List[str]) -> 'Env':
-        return self.set.uninitialized(List())
+        errors = failed.map(lambda a: f'failed to initialize `{a}`')
+        return self.set.uninitialized(List()).append.errors(errors)
 
     def deactivate_rplugin(self, meta: ActiveRpluginMeta) -> 'Env':
         return self.mod.active(lambda a: a.without(meta))
 
+    def add_timings(self, timings: List[Timing]) -> 'Env':
+        return self.append.timings(timings)
+
+    def start_timings(self) -> 'Env':
+        return self.set.timings(Nil)
+
+    def channel_in_use(self, channel: int) -> bool:
+        return self.active.exists(lambda a: a.channel == channel)
+
     def ready_by_name(self, names: List[str]) -> Either[str, List[Rplugin]]:
         return names.filter(self.ready.contains).traverse(self.rplugin, Either)
 
@@ -0,0 +1,87 @@
+'''disk accounting and removal of venvs that don't belong to a configured plugin anymore.
+Only directories in `venv_dir` that contain a `pyvenv.cfg` are considered. Entries whose names start with a dot, like
+the package store and the template venvs, are skipped.
+'''
+import os
+import stat
+import shutil
+
+from amino import Path, IO, do, Do, List, Lists
+from amino.logging import module_log
+
+from chromatin.model.garbage import VenvUsage
+from chromatin.store import store_dir
+
+log = module_log()
+
+
+def tree_size(path: str) -> int:
+    '''sum the sizes of the regular files below `path`, counting files with multiple links in the tree once.
+    '''
+    seen = set()
+    size = 0
+    for dir, dirs, files in os.walk(path):
+        for name in files:
+            st = os.lstat(os.path.join(dir, name))
+            if stat.S_ISREG(st.st_mode) and st.st_ino not in seen:
+                seen.add(st.st_ino)
+                size += st.st_size
+    return size
+
+
+def is_venv(entry: os.DirEntry) -> bool:
+    return (
+        not entry.name.startswith('.') and
+        entry.is_dir(follow_symlinks=False) and
+        os.path.isfile(os.path.join(entry.path, 'pyvenv.cfg'))
+    )
+
+
+def venv_dirs(venv_dir: Path) -> List[os.DirEntry]:
+    with os.scandir(str(venv_dir)) as entries:
+        return Lists.wrap(entries).filter(is_venv)
+
+
+def scan(venv_dir: Path, names: List[str]) -> List[VenvUsage]:
+    return (
+        venv_dirs(venv_dir)
+        .map(lambda a: VenvUsage(a.name, tree_size(a.path), a.name in names))
+        .sort_by(lambda a: a.size, reverse=True)
+    ) if venv_dir.is_dir() else List()
+
+
+def scan_venvs(venv_dir: Path, names: List[str]) -> IO[List[VenvUsage]]:
+    '''measure all venvs in `venv_dir`, marking those that aren't in `names`.
+    '''
+    return IO.delay(scan, venv_dir, names)
+
+
+def prune_store(venv_dir: Path) -> int:
+    '''remove store objects that aren't linked to any venv.
+    '''
+    pruned = 0
+    for dir, dirs, files in os.walk(str(store_dir(venv_dir))):
+        for name in files:
+            path = os.path.join(dir, name)
+            if os.lstat(path).st_nlink == 1:
+                os.unlink(path)
+                pruned += 1
+    return pruned
+
+
+@do(IO[None])
+def remove_venvs(venv_dir: Path, names: List[str]) -> Do:
+    for name in names:
+        yield IO.delay(shutil.rmtree, str(venv_dir / name), ignore_errors=True)
+    pruned = yield IO.delay(prune_store, venv_dir)
+    log.debug(f'removed orphaned venvs {names.join_comma} and {pruned} store objects')
+
+
+def remove_orphans(venv_dir: Path, usage: List[VenvUsage]) -> IO[None]:
+    '''remove the unreferenced venvs in a background thread.
+    '''
+    orphans = usage.filter_not(lambda a: a.referenced).map(lambda a: a.name)
+    return IO.pure(None) if orphans.empty else IO.fork_io(remove_venvs, venv_dir, orphans).replace(None)
+
+
+__all__ = ('scan_venvs', 'remove_venvs', 'remove_orphans',)
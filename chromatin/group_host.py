@@ -0,0 +1,64 @@
+'''host process for a group of python rplugins.
+This file is executed directly by the interpreter of the group's first member, which doesn't have chromatin installed.
+
+Since ribosome's rpc method names aren't qualified with the plugin name, the members cannot share the job's stdio
+channel. Each member is run in a separate thread that connects to neovim's server socket, while the job's stdio is
+only used to detect neovim's exit.
+The process terminates when neovim closes its stdin, when it receives `SIGTERM` from `jobstop`, or when all members
+have stopped.
+'''
+
+import os
+import sys
+import json
+import site
+import threading
+
+# the script's directory is chromatin's package directory, whose modules would shadow `logging` and `venv`
+sys.path[:] = [a for a in sys.path if os.path.abspath(a or '.') != os.path.dirname(os.path.abspath(__file__))]
+
+
+def run_member(address: str, plugin: str) -> int:
+    from amino import Either, Path
+    from ribosome.host import import_error, config_from_module, error, report_runtime_error, exception
+    from ribosome.rpc.io.start import cons_asyncio_socket
+    from ribosome.rpc.start import start_plugin_sync
+    def run(config: object) -> int:
+        asio, rpc_comm = cons_asyncio_socket(Path(address))
+        return start_plugin_sync(config, rpc_comm).attempt.cata(report_runtime_error, lambda a: 0)
+    try:
+        return Either.import_file(Path(plugin)).cata(
+            lambda e: import_error(e, plugin),
+            lambda mod: config_from_module(mod).cata(error, run),
+        )
+    except Exception as e:
+        return exception(e, plugin)
+
+
+def await_eof() -> None:
+    while os.read(0, 4096):
+        pass
+    os._exit(0)
+
+
+def main(args: list) -> int:
+    if len(args) != 2:
+        return 2
+    address, members = args[0], json.loads(args[1])
+    sys.path[:0] = [path for member in members for path in member['pythonpath'] if path not in sys.path]
+    for member in members:
+        site.addsitedir(member['site'])
+    from ribosome.host import setup_log
+    setup_log()
+    threads = [threading.Thread(target=run_member, args=(address, member['plugin']), name=member['name'])
+               for member in members]
+    threading.Thread(target=await_eof, daemon=True).start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,77 @@
+import os
+import re
+import json
+
+from amino import Path, IO, do, Do, List, Lists, Map, Try
+from amino.util.string import camelcase
+from amino.logging import module_log
+
+from ribosome.rpc.data.rpc_method import CommandMethod
+from ribosome.components.internal.prog import RpcTrigger
+
+log = module_log()
+handlers_name = '.handlers.json'
+internal_suffixes = List('ProgramLog', 'SetLogLevel', 'UpdateState', 'UpdateComponentState', 'State',
+                         'ComponentState', 'RpcTriggers', 'Poll', 'AppendPythonPath', 'ShowPythonPath',
+                         'EnableComponents', 'Map', 'InternalInit', 'RpcJobStderr', 'Quit')
+stage_rex = re.compile(r'Stage\d$')
+
+
+def handlers_path(venv_dir: Path) -> Path:
+    return venv_dir / handlers_name
+
+
+def decode_handlers(text: str) -> Map[str, List[str]]:
+    data = Try(json.loads, text).value_or(lambda e: log.debug(f'discarding handler cache: {e}'))
+    return (
+        Map(data).valmap(Lists.wrap)
+        if isinstance(data, dict) else
+        Map()
+    )
+
+
+@do(IO[Map[str, List[str]]])
+def read_handlers(venv_dir: Path) -> Do:
+    '''read the names of the commands that plugins defined when they were last activated.
+    '''
+    path = handlers_path(venv_dir)
+    exists = yield IO.delay(path.is_file)
+    text = yield IO.delay(path.read_text) if exists else IO.pure('{}')
+    return decode_handlers(text)
+
+
+@do(IO[None])
+def write_handlers(venv_dir: Path, handlers: Map[str, List[str]]) -> Do:
+    path = handlers_path(venv_dir)
+    tmp = path.with_suffix('.tmp')
+    yield IO.delay(tmp.write_text, json.dumps(handlers.valmap(list), sort_keys=True))
+    yield IO.delay(os.replace, str(tmp), str(path))
+
+
+def internal_command(name: str, command: str) -> bool:
+    '''ribosome's internal commands and the init stages are prefixed with the full plugin name, while user commands
+    usually use a short prefix.
+    '''
+    prefix = camelcase(name)
+    suffix = command[len(prefix):]
+    return command.startswith(prefix) and (suffix in internal_suffixes or stage_rex.match(suffix) is not None)
+
+
+def handler_commands(name: str, triggers: List[RpcTrigger]) -> List[str]:
+    return (
+        triggers
+        .filter(lambda a: isinstance(a.method, CommandMethod))
+        .map(lambda a: a.name)
+        .filter_not(lambda a: internal_command(name, a))
+        .distinct
+    )
+
+
+@do(IO[None])
+def record_handlers(venv_dir: Path, name: str, commands: List[str]) -> Do:
+    handlers = yield read_handlers(venv_dir)
+    updated = handlers + (name, commands)
+    yield IO.pure(None) if updated == handlers else write_handlers(venv_dir, updated)
+
+
+__all__ = ('handlers_path', 'read_handlers', 'record_handlers', 'handler_commands',)
@@ -1,7 +1,7 @@
 import typing
-from typing import Tuple
+from typing import Tuple, Union
 
-from amino import Path, do, List, Nil
+from amino import Path, do, List, Nil, Maybe, Nothing
 from amino.do import Do
 from amino.logging import module_log
 
@@ -13,6 +13,13 @@ from ribosome.rpc.error import define_rpc_stderr_handler
 
 log = module_log()
 stderr_handler_prefix = 'Chromatin'
+zygote_script = Path(__file__).parent / 'zygote.py'
+
+
+def pycache_args(prefix: Maybe[Path]) -> typing.List[str]:
+    '''`PYTHONPYCACHEPREFIX` is ignored with `-E`, so the prefix is passed as an interpreter option.
+    '''
+    return prefix.map(lambda a: ['-X', f'pycache_prefix={a}']).get_or_strict([])
 
 
 def python_host_cmdline(
@@ -21,27 +28,73 @@ def python_host_cmdline(
         plug: Path,
         debug: bool,
         pythonpath: List[str],
+        pycache_prefix: Maybe[Path]=Nothing,
 ) -> typing.List[str]:
     debug_option = [] if debug else ['-E']
     ppath = pythonpath.mk_string(':')
     pre = [] if pythonpath.empty else ['env', f'RIBOSOME_PYTHONPATH={ppath}']
     args = [str(bin_path / f'ribosome_start_plugin'), str(plug)]
-    return pre + [str(python_exe)] + debug_option + args
+    return pre + [str(python_exe)] + debug_option + pycache_args(pycache_prefix) + args
+
+
+def zygote_host_cmdline(
+        python_exe: Path,
+        bin_path: Path,
+        plug: Path,
+        pythonpath: List[str],
+        pycache_prefix: Maybe[Path]=Nothing,
+) -> typing.List[str]:
+    '''the client is started without `site` and only forwards its stdio to the zygote, the plugin's `pythonpath`
+    entries are prepended to `sys.path` in the forked host.
+    '''
+    args = [str(zygote_script), 'connect', str(bin_path), str(plug)]
+    return [str(python_exe), '-S', '-E'] + pycache_args(pycache_prefix) + args + list(pythonpath)
+
+
+def host_cmdline(
+        python_exe: Path,
+        bin_path: Path,
+        plug: Path,
+        debug: bool,
+        pythonpath: List[str],
+        zygote: bool,
+        pycache_prefix: Maybe[Path]=Nothing,
+) -> typing.List[str]:
+    return (
+        zygote_host_cmdline(python_exe, bin_path, plug, pythonpath, pycache_prefix)
+        if zygote and not debug else
+        python_host_cmdline(python_exe, bin_path, plug, debug, pythonpath, pycache_prefix)
+    )
+
+
+def define_stderr_handler() -> NvimIO[str]:
+    return define_rpc_stderr_handler(stderr_handler_prefix)
 
 
 @do(NvimIO[Tuple[int, int]])
-def start_host(
-        cmdline: str,
+def start_host_job(
+        cmdline: Union[str, typing.List[str]],
+        stderr_handler_name: str,
         debug: bool=False,
+        rpc: bool=True,
 ) -> Do:
     ribo_log.debug(f'starting host: {cmdline}; debug: {debug}')
-    stderr_handler_name = yield define_rpc_stderr_handler(stderr_handler_prefix)
-    channel = yield nvim_call_tpe(int, 'jobstart', cmdline, dict(rpc=True, on_stderr=stderr_handler_name))
+    channel = yield nvim_call_tpe(int, 'jobstart', cmdline, dict(rpc=rpc, on_stderr=stderr_handler_name))
     pid = yield nvim_call_tpe(int, 'jobpid', channel)
     ribo_log.debug(f'host running, channel {channel}, pid {pid}')
     yield N.pure((channel, pid))
 
 
+@do(NvimIO[Tuple[int, int]])
+def start_host(
+        cmdline: Union[str, typing.List[str]],
+        debug: bool=False,
+        rpc: bool=True,
+) -> Do:
+    stderr_handler_name = yield define_stderr_handler()
+    yield start_host_job(cmdline, stderr_handler_name, debug, rpc)
+
+
 @do(NvimIO[Tuple[int, int]])
 def start_python_host(
         python_exe: Path,
@@ -49,8 +102,9 @@ def start_python_host(
         plugin_path: Path,
         debug: bool=False,
         pythonpath: List[str]=Nil,
+        zygote: bool=False,
 ) -> Do:
-    cmdline = python_host_cmdline(python_exe, bin_path, plugin_path, debug, pythonpath)
+    cmdline = host_cmdline(python_exe, bin_path, plugin_path, debug, pythonpath, zygote)
     yield start_host(cmdline, debug)
 
 
@@ -59,4 +113,5 @@ def stop_host(channel: int) -> Do:
     yield nvim_call_function('jobstop', channel)
 
 
-__all__ = ('start_python_host', 'stop_host', 'start_host',)
+__all__ = ('start_python_host', 'stop_host', 'start_host', 'python_host_cmdline', 'zygote_host_cmdline', 'host_cmdline',
+           'define_stderr_handler', 'start_host_job', 'pycache_args',)
@@ -1,35 +1,182 @@
+import threading
+from typing import Any, Tuple, TypeVar
+
 from amino.case import Case
 from amino.logging import module_log
-from amino import List, do, Do
+from amino import List, do, Do, Path, Maybe, Nothing, Just, Lists, IO, Map
+from amino.dat import Dat
 
 from ribosome.nvim.io.compute import NvimIO
-from ribosome.process import Subprocess
+from ribosome.nvim.io.api import N
+from ribosome.process import Subprocess, SubprocessResult
 
 from chromatin.model.rplugin import InstallableRpluginMeta, InstallableRplugin, VenvRplugin, HsInstallableRplugin
 from chromatin.venv import venv_from_rplugin
-from chromatin.install.python import install_venv_rplugin_args
-from chromatin.install.haskell import install_hs_rplugin
+from chromatin.install.python import install_venv_rplugin_args, venv_rplugin_reqs
+from chromatin.settings import wheelhouse_size, venv_dir
+from chromatin.wheelhouse import venv_wheelhouse, install_args, build_wheels
+from chromatin.model.lock import Lockfile, PluginLock
+from chromatin.model.venv import Venv
+from chromatin.lock import matching_lock, write_lock_requirements
+from chromatin.schedule import ScheduledSubprocess, scheduled_subprocess
 
 log = module_log()
+A = TypeVar('A')
+
+
+class WheelTarget(Dat['WheelTarget']):
+    '''a plugin venv that is installed through the wheelhouse for its interpreter's ABI.
+    '''
+
+    def __init__(self, name: str, python: Path, wheelhouse: Path, reqs: List[str]) -> None:
+        self.name = name
+        self.python = python
+        self.wheelhouse = wheelhouse
+        self.reqs = reqs
+
+
+@do(NvimIO[Maybe[WheelTarget]])
+def wheel_target(rplugin: InstallableRplugin, conf: VenvRplugin) -> Do:
+    max_size = yield wheelhouse_size.value_or_default()
+    if max_size > 0:
+        venv = yield venv_from_rplugin(rplugin.rplugin)
+        base_dir = yield venv_dir.value_or_default()
+        python = venv.meta.python_executable
+        wheelhouse = yield N.from_io(venv_wheelhouse(base_dir, python))
+        return Just(WheelTarget(rplugin.rplugin.name, python, wheelhouse, venv_rplugin_reqs(rplugin, conf)))
+    return Nothing
+
+
+class WheelBuild:
+    '''the `pip wheel` pass of a group of plugins that share a wheelhouse, using the first member's interpreter.
+    It is run by the first member's install, while the others wait for its result without holding a slot.
+    '''
+
+    def __init__(self, wheelhouse: Path, targets: List[WheelTarget], priority: int) -> None:
+        self.wheelhouse = wheelhouse
+        self.targets = targets
+        self.priority = priority
+        self.lock = threading.Lock()
+        self.result = None
+
+    def failed(self, error: Exception) -> bool:
+        log.debug(f'building wheels in {self.wheelhouse} failed: {error}')
+        return False
+
+    def build(self) -> bool:
+        with self.lock:
+            if self.result is None:
+                python = self.targets.head.map(lambda a: a.python).get_or_strict(Path('python'))
+                reqs = self.targets.map(lambda a: a.reqs).distinct.join
+                self.result = build_wheels(python, self.wheelhouse, reqs, self.priority).attempt.value_or(self.failed)
+            return self.result
+
+
+@do(NvimIO[Map[str, Tuple[WheelTarget, WheelBuild]]])
+def prefetch_wheels(rplugins: List[InstallableRplugin], lock: Lockfile, priority: int) -> Do:
+    '''group the python plugins that share an ABI for a single `pip wheel`, so that dependencies are resolved and
+    downloaded once instead of for each plugin.
+    Plugins with a lock entry are skipped, since their dependencies are pinned.
+    '''
+    venv_rplugins = rplugins.filter(lambda a: isinstance(a.meta, VenvRplugin) and a.rplugin.name not in lock.plugins)
+    targets = yield venv_rplugins.traverse(lambda a: wheel_target(a, a.meta), NvimIO)
+    groups = Lists.wrap(targets.join.group_by(lambda a: a.wheelhouse).items())
+    builds = groups.map2(lambda wheelhouse, members: WheelBuild(wheelhouse, members, priority))
+    return Map(builds.flat_map(lambda b: b.targets.map(lambda t: (t.name, (t, b)))))
+
+
+def wheelhouse_install(target: WheelTarget, mode: str) -> Subprocess[str]:
+    return Subprocess(target.python, install_args(target.wheelhouse, mode, target.reqs), target.name, timeout=300,
+                      env=None)
+
+
+@do(NvimIO[Subprocess[str]])
+def pip_install(rplugin: InstallableRplugin, meta: VenvRplugin) -> Do:
+    venv = yield venv_from_rplugin(rplugin.rplugin)
+    pip_bin = venv.meta.bin_path / 'pip'
+    specific_args = install_venv_rplugin_args.match(meta.conf)
+    extensions = rplugin.rplugin.extensions
+    args = (
+        List('install', '-U', '--no-cache', '--no-compile', '--disable-pip-version-check') +
+        specific_args +
+        extensions
+    )
+    return Subprocess(pip_bin, args, rplugin.rplugin.name, timeout=120, env=None)
+
+
+@do(NvimIO[Subprocess[str]])
+def unlocked_install(rplugin: InstallableRplugin, meta: VenvRplugin, mode: str) -> Do:
+    target = yield wheel_target(rplugin, meta)
+    yield target.map(lambda a: N.pure(wheelhouse_install(a, mode))).get_or(pip_install, rplugin, meta)
+
+
+@do(NvimIO[Subprocess[str]])
+def pinned_install(rplugin: InstallableRplugin, venv: Venv, base_dir: Path, lock: PluginLock) -> Do:
+    req_file = yield N.from_io(write_lock_requirements(base_dir, lock))
+    max_size = yield wheelhouse_size.value_or_default()
+    wheelhouse = yield N.from_io(venv_wheelhouse(base_dir, venv.meta.python_executable))
+    links = List('--find-links', str(wheelhouse)) if max_size > 0 else List()
+    args = (
+        List('install', '--no-deps', '--require-hashes', '--no-compile', '--disable-pip-version-check') +
+        links +
+        List('-r', str(req_file))
+    )
+    return Subprocess(venv.meta.bin_path / 'pip', args, rplugin.rplugin.name, timeout=120, env=None)
+
+
+@do(NvimIO[Maybe[Subprocess[str]]])
+def locked_install(rplugin: InstallableRplugin, meta: VenvRplugin, lock: Lockfile) -> Do:
+    '''install the pinned distributions if the lock entry matches the plugin's requirements and interpreter.
+    '''
+    venv = yield venv_from_rplugin(rplugin.rplugin)
+    base_dir = yield venv_dir.value_or_default()
+    reqs = venv_rplugin_reqs(rplugin, meta)
+    entry = yield N.from_io(matching_lock(lock, rplugin.rplugin.name, venv.meta.python_executable, reqs))
+    yield entry.map(lambda a: pinned_install(rplugin, venv, base_dir, a).map(Just)).get_or_strict(N.pure(Nothing))
 
 
 class install_rplugin_subproc(Case[InstallableRpluginMeta, NvimIO[Subprocess[str]]], alg=InstallableRpluginMeta):
+    '''handlers are dispatched by the type of their parameter, so helpers taking a `VenvRplugin` must not be methods.
+    '''
 
-    def __init__(self, rplugin: InstallableRplugin) -> None:
+    def __init__(
+            self,
+            rplugin: InstallableRplugin,
+            update: bool=False,
+            lock: Lockfile=Lockfile.cons(),
+    ) -> None:
         self.rplugin = rplugin
+        self.update = update
+        self.lock = lock
+
+    @property
+    def mode(self) -> str:
+        return 'update' if self.update else 'install'
 
     @do(NvimIO[Subprocess[str]])
     def venv(self, venv_rplugin: VenvRplugin) -> Do:
         log.debug(f'installing {venv_rplugin}')
-        venv = yield venv_from_rplugin(self.rplugin.rplugin)
-        pip_bin = venv.meta.bin_path / 'pip'
-        specific_args = install_venv_rplugin_args.match(venv_rplugin.conf)
-        extensions = self.rplugin.rplugin.extensions
-        args = List('install', '-U', '--no-cache', '--disable-pip-version-check') + specific_args + extensions
-        return Subprocess(pip_bin, args, self.rplugin.rplugin.name, timeout=120, env=None)
+        locked = yield locked_install(self.rplugin, venv_rplugin, self.lock)
+        yield locked.map(N.pure).get_or(unlocked_install, self.rplugin, venv_rplugin, self.mode)
 
     def hs(self, a: HsInstallableRplugin) -> NvimIO[Subprocess[str]]:
+        from chromatin.install.haskell import install_hs_rplugin
         return install_hs_rplugin(self.rplugin)(a.conf)
 
 
-__all__ = ('install_rplugin_subproc',)
+class PrefetchedSubprocess(ScheduledSubprocess[A]):
+    '''a wheelhouse install that runs its group's `pip wheel` pass first, and then installs with `--no-index` if the
+    pass succeeded.
+    '''
+
+    def __init__(self, subproc: Subprocess[A], target: WheelTarget, build: WheelBuild, priority: int) -> None:
+        super().__init__(subproc, 'pip', priority)
+        self.prebuilt = wheelhouse_install(target, 'prebuilt')
+        self.build = build
+
+    def execute(self, **kw: Any) -> IO[SubprocessResult[A]]:
+        return IO.delay(self.build.build).flat_map(
+            lambda a: scheduled_subprocess(self.job, self.priority, self.prebuilt if a else self.subproc))
+
+
+__all__ = ('install_rplugin_subproc', 'prefetch_wheels', 'PrefetchedSubprocess', 'WheelBuild',)
@@ -1,7 +1,7 @@
 from amino.case import Case
 from amino import List, Path
 
-from chromatin.model.rplugin import VenvRpluginMeta, DistVenvRplugin, DirVenvRplugin
+from chromatin.model.rplugin import VenvRpluginMeta, DistVenvRplugin, DirVenvRplugin, InstallableRplugin, VenvRplugin
 
 
 class install_venv_rplugin_args(Case[VenvRpluginMeta, List[str]], alg=VenvRpluginMeta):
@@ -14,4 +14,8 @@ class install_venv_rplugin_args(Case[VenvRpluginMeta, List[str]], alg=VenvRplugi
         return List('-r', str(req))
 
 
-__all__ = ('install_venv_rplugin_args',)
+def venv_rplugin_reqs(rplugin: InstallableRplugin, meta: VenvRplugin) -> List[str]:
+    return install_venv_rplugin_args.match(meta.conf) + rplugin.rplugin.extensions
+
+
+__all__ = ('install_venv_rplugin_args', 'venv_rplugin_reqs',)
@@ -0,0 +1,86 @@
+'''shared base layer of site packages for plugin venvs.
+ribosome and its dependencies are installed once per interpreter and ribosome version into
+`<venv_dir>/.base/<key>/site`, which is added to each plugin venv's `sys.path` with a `.pth` file. Since pip considers
+distributions on `sys.path` as installed, only the plugin-specific distributions are installed into the venv, unless
+a plugin requires a different version of a shared one.
+'''
+import os
+import stat
+import shutil
+
+from amino import Path, IO, do, Do, Nothing
+from amino.logging import module_log
+
+from ribosome.process import Subprocess
+
+from chromatin.model.venv import Venv
+from chromatin.venv import venv_site, layer_pth
+from chromatin.template import template_key, acquire_lock, complete_marker
+from chromatin.bytecode import compile_dir
+
+log = module_log()
+base_name = '.base'
+start_script = 'ribosome_start_plugin'
+
+
+def ribosome_version() -> str:
+    import pkg_resources
+    return pkg_resources.get_distribution('ribosome').version
+
+
+def layer_site(layer: Path) -> Path:
+    return layer / 'site'
+
+
+def read_only(dir: Path) -> None:
+    for root, dirs, files in os.walk(str(dir)):
+        for name in files:
+            path = os.path.join(root, name)
+            os.chmod(path, os.stat(path).st_mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+@do(IO[None])
+def build_layer(python: Path, layer: Path, version: str) -> Do:
+    yield IO.delay(shutil.rmtree, str(layer), ignore_errors=True)
+    log.debug(f'installing ribosome {version} into the base layer {layer}')
+    retval, out, err = yield Subprocess.popen(
+        str(python), '-m', 'pip', 'install', '--no-cache', '--no-compile', '--disable-pip-version-check', '--target',
+        str(layer_site(layer)), f'ribosome=={version}', timeout=300, env=None)
+    yield (
+        IO.pure(None)
+        if retval == 0 else
+        IO.failed(f'installing the base layer for ribosome {version}: {err.join_lines}')
+    )
+    yield compile_dir(python, layer_site(layer), Nothing)
+    yield IO.delay(read_only, layer_site(layer))
+    yield IO.delay((layer / complete_marker).touch)
+
+
+@do(IO[Path])
+def ensure_layer(base_dir: Path, python: Path) -> Do:
+    '''return the base layer for the interpreter of `python` and chromatin's ribosome version, installing it if
+    necessary.
+    '''
+    version = yield IO.delay(ribosome_version)
+    key = yield IO.delay(template_key, python)
+    dir = base_dir / base_name
+    layer = dir / f'{key}-ribosome-{version}'
+    yield IO.delay(dir.mkdir, parents=True, exist_ok=True)
+    fd = yield IO.delay(acquire_lock, dir / f'{layer.name}.lock')
+    complete = yield IO.delay((layer / complete_marker).exists)
+    yield (IO.pure(None) if complete else build_layer(python, layer, version)).ensure(lambda a: IO.delay(os.close, fd))
+    return layer
+
+
+@do(IO[None])
+def add_base_layer(base_dir: Path, venv: Venv) -> Do:
+    '''link the base layer into `venv` and copy ribosome's host start script, which pip installed into the layer.
+    '''
+    layer = yield ensure_layer(base_dir, venv.meta.python_executable)
+    site_e = yield venv_site(venv)
+    site = yield IO.from_either(site_e)
+    yield IO.delay((site / layer_pth).write_text, f'{layer_site(layer)}\n')
+    yield IO.delay(shutil.copy, str(layer_site(layer) / 'bin' / start_script), str(venv.meta.bin_path / start_script))
+
+
+__all__ = ('add_base_layer', 'ensure_layer',)
@@ -0,0 +1,147 @@
+'''lockfile that pins the distributions of each python plugin with their hashes.
+`CrmLock` records the distributions installed in each venv in `crm.lock`, next to `g:chromatin_venv_dir`, with the
+SHA-256 of their wheels, which are built into the wheelhouse if they aren't there yet.
+When a plugin is installed with the same requirement args and interpreter ABI as recorded, the pinned distributions are
+installed with `--no-deps --require-hashes` instead of resolving the requirements. `CrmUpdate --relock` ignores the
+lock and records the updated versions.
+'''
+import os
+import hashlib
+
+from amino import Path, IO, do, Do, Maybe, Nothing, Just, List, Lists, Either, Left, Right
+from amino.json import dump_json, decode_json
+from amino.logging import module_log
+
+from chromatin.model.lock import Lockfile, PluginLock, LockedDist
+from chromatin.manifest import dist_info_rex, canonical_dist_name
+from chromatin.venv import cons_venv_under, venv_site, site_layers
+from chromatin.wheelhouse import venv_wheelhouse, wheel_files, build_wheels
+from chromatin.util.interpreter import interpreter_index, interpreter_abi
+
+log = module_log()
+lock_name = 'crm.lock'
+requirements_name = 'crm.lock.txt'
+unpinned = List('pip', 'setuptools', 'wheel')
+
+
+def lock_path(venv_dir: Path) -> Path:
+    return venv_dir.parent / lock_name
+
+
+def check_lock(data: object) -> Either[str, Lockfile]:
+    return Right(data) if isinstance(data, Lockfile) else Left(f'invalid lock data: {data}')
+
+
+def discard_lock(error: str) -> Lockfile:
+    log.error(f'ignoring invalid {lock_name}: {error}')
+    return Lockfile.cons()
+
+
+@do(IO[Lockfile])
+def read_lock(venv_dir: Path) -> Do:
+    path = lock_path(venv_dir)
+    exists = yield IO.delay(path.is_file)
+    if exists:
+        text = yield IO.delay(path.read_text)
+        return decode_json(text).flat_map(check_lock).value_or(discard_lock)
+    return Lockfile.cons()
+
+
+@do(IO[None])
+def write_lock(venv_dir: Path, lock: Lockfile) -> Do:
+    path = lock_path(venv_dir)
+    tmp = path.with_suffix('.tmp')
+    json = yield IO.from_either(dump_json(lock))
+    yield IO.delay(tmp.write_text, json)
+    yield IO.delay(os.replace, str(tmp), str(path))
+
+
+def dir_dists(dir: Path) -> List[tuple]:
+    names = Lists.wrap(sorted(os.listdir(str(dir)))) if dir.is_dir() else List()
+    matches = names.flat_map(lambda a: Lists.wrap(Maybe.optional(dist_info_rex.match(a))))
+    return matches.map(lambda a: (canonical_dist_name(a.group('name')), a.group('version')))
+
+
+def installed_dists(site: Path) -> List[tuple]:
+    '''the names and versions of the distributions in the venv's site dir and its base layers.
+    '''
+    dists = site_layers(site).cons(site).flat_map(dir_dists)
+    return dists.filter_not(lambda a: a[0] in unpinned).distinct_by(lambda a: a[0]).sort_by(lambda a: a[0])
+
+
+def layer_dists(site: Path) -> List[tuple]:
+    '''the distributions that the base layers of the venv's site dir provide.
+    '''
+    return site_layers(site).flat_map(dir_dists)
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(str(path), 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def locked_dist(wheelhouse: Path, name: str, version: str) -> LockedDist:
+    return LockedDist(name, version, wheel_files(wheelhouse, name, version).map(file_hash))
+
+
+@do(IO[Maybe[PluginLock]])
+def lock_venv(venv_dir: Path, name: str, reqs: List[str]) -> Do:
+    '''pin the distributions installed in the venv of `name`, building the wheels that are missing from the
+    wheelhouse without resolving dependencies.
+    '''
+    venv = cons_venv_under(venv_dir, name)
+    site_e = yield venv_site(venv)
+    site = yield IO.from_either(site_e)
+    python = venv.meta.python_executable
+    dists = installed_dists(site)
+    wheelhouse = yield venv_wheelhouse(venv_dir, python)
+    missing = dists.filter(lambda a: wheel_files(wheelhouse, *a).empty)
+    if missing:
+        yield build_wheels(python, wheelhouse, missing.map(lambda a: f'{a[0]}=={a[1]}').cons('--no-deps'))
+    locked = dists.map(lambda a: locked_dist(wheelhouse, *a))
+    index = yield interpreter_index()
+    abi = interpreter_abi(index, Path(os.path.realpath(str(python))))
+    unhashed = locked.filter(lambda a: a.hashes.empty)
+    if unhashed:
+        log.error(f'cannot lock `{name}`, no wheels for {unhashed.map(lambda a: a.name).join_comma}')
+        return Nothing
+    return Just(PluginLock(name, reqs, abi, locked))
+
+
+@do(IO[Maybe[PluginLock]])
+def matching_lock(lock: Lockfile, name: str, python: Path, reqs: List[str]) -> Do:
+    '''the plugin's lock entry, if it was recorded for the same requirement args and interpreter ABI.
+    '''
+    index = yield interpreter_index()
+    abi = interpreter_abi(index, Path(os.path.realpath(str(python))))
+    return lock.entry(name).filter(lambda a: a.reqs == reqs and a.abi == abi)
+
+
+def lock_requirements(lock: PluginLock, provided: List[tuple]=List()) -> str:
+    '''the pins of `lock` in requirements format, omitting the distributions in `provided`.
+    '''
+    def line(dist: LockedDist) -> str:
+        hashes = dist.hashes.map(lambda a: f' --hash=sha256:{a}').mk_string('')
+        return f'{dist.name}=={dist.version}{hashes}'
+    return lock.dists.filter_not(lambda a: (a.name, a.version) in provided).map(line).join_lines + '\n'
+
+
+@do(IO[Path])
+def write_lock_requirements(venv_dir: Path, lock: PluginLock) -> Do:
+    '''write the pins of `lock` as a requirements file into the plugin's venv, which is passed to pip with `-r`.
+    The lock records the distributions of the base layer as well, so that it can be used for venvs without one, but
+    those that the venv's layer provides in the same version are skipped, since pip would install copies of them with
+    `--no-deps`.
+    '''
+    venv = cons_venv_under(venv_dir, lock.name)
+    site = yield venv_site(venv)
+    provided = yield IO.delay(lambda: site.map(layer_dists).get_or_strict(List()))
+    path = venv.meta.dir / requirements_name
+    yield IO.delay(path.write_text, lock_requirements(lock, provided))
+    return path
+
+
+__all__ = ('lock_path', 'read_lock', 'write_lock', 'lock_venv', 'matching_lock', 'write_lock_requirements',)
@@ -0,0 +1,180 @@
+import os
+import re
+
+from amino import Path, IO, do, Do, Maybe, Nothing, Just, List, Lists, Map, Try, Either, Left, Right
+from amino.case import Case
+from amino.json import dump_json, decode_json
+from amino.logging import module_log
+
+from chromatin.model.manifest import Manifest, ManifestEntry
+from chromatin.model.venv import Venv, VenvMetadata
+from chromatin.model.rplugin import (InstallableRplugin, VenvRpluginMeta, DistVenvRplugin, DirVenvRplugin,
+                                     InstallableRpluginMeta, VenvRplugin, HsInstallableRplugin)
+from chromatin.venv import venv_site, cons_venv_under, venv_metadata, write_venv_metadata
+from chromatin.util.interpreter import interpreter_index, interpreter_abi
+
+log = module_log()
+manifest_name = '.manifest.json'
+dist_info_rex = re.compile(r'(?P<name>[^-]+)-(?P<version>[^-]+)(-py[\d.]+)?\.(dist|egg)-info$')
+
+
+def manifest_path(venv_dir: Path) -> Path:
+    return venv_dir / manifest_name
+
+
+def canonical_dist_name(name: str) -> str:
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def mtime(path: Path) -> Maybe[float]:
+    return Try(path.stat).map(lambda a: a.st_mtime).to_maybe
+
+
+def stamps(paths: List[Path]) -> Maybe[Map[str, float]]:
+    return paths.traverse(lambda p: mtime(p).map(lambda t: (str(p), t)), Maybe).map(Map)
+
+
+def realpath(path: Path) -> Path:
+    return Path(os.path.realpath(str(path)))
+
+
+def check_manifest(data: object) -> Either[str, Manifest]:
+    return Right(data) if isinstance(data, Manifest) else Left(f'invalid manifest data: {data}')
+
+
+def discard_manifest(error: str) -> Manifest:
+    log.debug(f'discarding install manifest: {error}')
+    return Manifest.cons()
+
+
+@do(IO[Manifest])
+def read_manifest_file(path: Path) -> Do:
+    text = yield IO.delay(path.read_text)
+    return decode_json(text).flat_map(check_manifest).value_or(discard_manifest)
+
+
+@do(IO[Manifest])
+def read_manifest(venv_dir: Path) -> Do:
+    path = manifest_path(venv_dir)
+    exists = yield IO.delay(path.is_file)
+    yield read_manifest_file(path) if exists else IO.pure(Manifest.cons())
+
+
+@do(IO[None])
+def write_manifest(venv_dir: Path, manifest: Manifest) -> Do:
+    path = manifest_path(venv_dir)
+    tmp = path.with_suffix('.tmp')
+    json = yield IO.from_either(dump_json(manifest))
+    yield IO.delay(tmp.write_text, json)
+    yield IO.delay(os.replace, str(tmp), str(path))
+
+
+def find_dist_info(site: Path, name: str) -> Maybe[Path]:
+    target = canonical_dist_name(name)
+    def matches(path: Path) -> bool:
+        match = dist_info_rex.match(path.name)
+        return match is not None and canonical_dist_name(match.group('name')) == target
+    return Lists.wrap(site.glob('*-info')).find(matches)
+
+
+def dist_info_version(path: Path) -> Maybe[str]:
+    return Maybe.optional(dist_info_rex.match(path.name)).map(lambda a: a.group('version'))
+
+
+class manifest_stamp_paths(Case[VenvRpluginMeta, Maybe[tuple]], alg=VenvRpluginMeta):
+    '''determine the installed version and the paths whose mtimes invalidate the manifest entry.
+    '''
+
+    def __init__(self, venv: Venv, site: Path) -> None:
+        self.venv = venv
+        self.site = site
+
+    def dist(self, meta: DistVenvRplugin) -> Maybe[tuple]:
+        return find_dist_info(self.site, self.venv.name).map(lambda a: (dist_info_version(a), List(a)))
+
+    def dir(self, meta: DirVenvRplugin) -> Maybe[tuple]:
+        dir = Path(meta.dir)
+        req = dir / 'requirements.txt'
+        extra = List(req) if req.is_file() else List()
+        return Just((Nothing, extra.cons(dir)))
+
+
+@do(IO[Maybe[ManifestEntry]])
+def venv_manifest_entry(venv_dir: Path, rplugin: InstallableRplugin, meta: VenvRpluginMeta) -> Do:
+    venv = cons_venv_under(venv_dir, rplugin.rplugin.name)
+    site_e = yield venv_site(venv)
+    interpreter = yield IO.delay(realpath, venv.meta.python_executable)
+    index = yield interpreter_index()
+    abi = yield IO.delay(interpreter_abi, index, interpreter)
+    @do(Maybe[ManifestEntry])
+    def entry(site: Path) -> Do:
+        version, paths = yield manifest_stamp_paths(venv, site)(meta)
+        entry_stamps = yield stamps(paths.cons(site).cons(interpreter))
+        yield Just(ManifestEntry(rplugin.rplugin.name, rplugin.rplugin.spec, version, interpreter, abi, site,
+                                 entry_stamps))
+    return site_e.to_maybe.flat_map(entry)
+
+
+class manifest_entry(Case[InstallableRpluginMeta, IO[Maybe[ManifestEntry]]], alg=InstallableRpluginMeta):
+
+    def __init__(self, venv_dir: Path, rplugin: InstallableRplugin) -> None:
+        self.venv_dir = venv_dir
+        self.rplugin = rplugin
+
+    def venv(self, meta: VenvRplugin) -> IO[Maybe[ManifestEntry]]:
+        return venv_manifest_entry(self.venv_dir, self.rplugin, meta.conf)
+
+    def hs(self, meta: HsInstallableRplugin) -> IO[Maybe[ManifestEntry]]:
+        return IO.pure(Nothing)
+
+
+@do(IO[bool])
+def manifest_entry_valid(venv_dir: Path, rplugin: InstallableRplugin, entry: ManifestEntry) -> Do:
+    venv = cons_venv_under(venv_dir, rplugin.rplugin.name)
+    interpreter = yield IO.delay(realpath, venv.meta.python_executable)
+    current = yield IO.delay(stamps, entry.stamps.k.map(Path))
+    return (
+        entry.spec == rplugin.rplugin.spec and
+        entry.interpreter == interpreter and
+        current.contains(entry.stamps)
+    )
+
+
+@do(IO[List[str]])
+def trusted_rplugins(venv_dir: Path, rplugins: List[InstallableRplugin]) -> Do:
+    '''select the plugins whose manifest entries are still consistent with the file system, based only on `stat`.
+    '''
+    manifest = yield read_manifest(venv_dir)
+    def check(rplugin: InstallableRplugin) -> IO[List[str]]:
+        return manifest.entry(rplugin.rplugin.name).cata(
+            lambda entry: manifest_entry_valid(venv_dir, rplugin, entry).map(
+                lambda valid: List(rplugin.rplugin.name) if valid else List()
+            ),
+            lambda: IO.pure(List()),
+        )
+    valid = yield rplugins.traverse(check, IO)
+    return valid.join
+
+
+@do(IO[None])
+def record_venv_metadata(venv_dir: Path, entry: ManifestEntry) -> Do:
+    '''add the installed version to the venv's metadata, which is used by activation and the health check.
+    '''
+    venv = cons_venv_under(venv_dir, entry.name)
+    current = yield venv_metadata(venv)
+    python_version = current.to_maybe.flat_map(lambda a: a.python_version)
+    plugin_path = entry.site / entry.name / '__init__.py'
+    yield write_venv_metadata(venv, VenvMetadata(entry.site, python_version, plugin_path, entry.version))
+
+
+@do(IO[None])
+def record_manifest(venv_dir: Path, rplugins: List[InstallableRplugin]) -> Do:
+    manifest = yield read_manifest(venv_dir)
+    entries = yield rplugins.traverse(lambda a: manifest_entry(venv_dir, a)(a.meta), IO)
+    yield entries.join.traverse(lambda a: record_venv_metadata(venv_dir, a), IO)
+    names = rplugins.map(lambda a: a.rplugin.name)
+    updated = manifest.remove(names).update(entries.join)
+    yield IO.pure(None) if updated == manifest else write_manifest(venv_dir, updated)
+
+
+__all__ = ('manifest_path', 'read_manifest', 'write_manifest', 'trusted_rplugins', 'record_manifest',)
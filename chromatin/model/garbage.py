@@ -0,0 +1,15 @@
+from amino.dat import Dat
+
+
+class VenvUsage(Dat['VenvUsage']):
+    '''disk usage of a directory in `venv_dir`, where `referenced` is false if no configured plugin uses it.
+    Files that are hardlinked to the package store are counted in full for each venv.
+    '''
+
+    def __init__(self, name: str, size: int, referenced: bool) -> None:
+        self.name = name
+        self.size = size
+        self.referenced = referenced
+
+
+__all__ = ('VenvUsage',)
@@ -0,0 +1,48 @@
+from amino import Path, Map, List, Maybe
+from amino.dat import Dat
+
+
+class Interpreter(Dat['Interpreter']):
+    '''a python executable on `PATH`, where `abi` is the interpreter's `SOABI` or cache tag.
+    '''
+
+    def __init__(self, path: Path, realpath: Path, version: List[int], abi: str) -> None:
+        self.path = path
+        self.realpath = realpath
+        self.version = version
+        self.abi = abi
+
+    @property
+    def version_str(self) -> str:
+        return self.version.map(str).mk_string('.')
+
+
+class InterpreterIndex(Dat['InterpreterIndex']):
+    '''the interpreters and tools found in the directories of `path`, which is valid while the directories'
+    modification times match `stamps`.
+    '''
+
+    @staticmethod
+    def cons(
+            path: str='',
+            stamps: Map[str, float]=Map(),
+            interpreters: List[Interpreter]=List(),
+            tools: Map[str, Path]=Map(),
+    ) -> 'InterpreterIndex':
+        return InterpreterIndex(path, stamps, interpreters, tools)
+
+    def __init__(self, path: str, stamps: Map[str, float], interpreters: List[Interpreter], tools: Map[str, Path]
+                 ) -> None:
+        self.path = path
+        self.stamps = stamps
+        self.interpreters = interpreters
+        self.tools = tools
+
+    def tool(self, name: str) -> Maybe[Path]:
+        return self.tools.lift(name)
+
+    def abi(self, realpath: Path) -> Maybe[str]:
+        return self.interpreters.find(lambda a: a.realpath == realpath).map(lambda a: a.abi)
+
+
+__all__ = ('Interpreter', 'InterpreterIndex',)
@@ -0,0 +1,40 @@
+from amino import Map, Maybe, List
+from amino.dat import Dat
+
+
+class LockedDist(Dat['LockedDist']):
+
+    def __init__(self, name: str, version: str, hashes: List[str]) -> None:
+        self.name = name
+        self.version = version
+        self.hashes = hashes
+
+
+class PluginLock(Dat['PluginLock']):
+    '''the distributions that were installed into a plugin's venv for the requirement args `reqs`.
+    '''
+
+    def __init__(self, name: str, reqs: List[str], abi: Maybe[str], dists: List[LockedDist]) -> None:
+        self.name = name
+        self.reqs = reqs
+        self.abi = abi
+        self.dists = dists
+
+
+class Lockfile(Dat['Lockfile']):
+
+    @staticmethod
+    def cons(plugins: Map[str, PluginLock]=Map()) -> 'Lockfile':
+        return Lockfile(plugins)
+
+    def __init__(self, plugins: Map[str, PluginLock]) -> None:
+        self.plugins = plugins
+
+    def entry(self, name: str) -> Maybe[PluginLock]:
+        return self.plugins.lift(name)
+
+    def update(self, locks: List[PluginLock]) -> 'Lockfile':
+        return self.copy(plugins=self.plugins ** Map(locks.map(lambda a: (a.name, a))))
+
+
+__all__ = ('LockedDist', 'PluginLock', 'Lockfile',)
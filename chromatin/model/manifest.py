@@ -0,0 +1,45 @@
+from amino import Path, Map, Maybe, List
+from amino.dat import Dat
+
+
+class ManifestEntry(Dat['ManifestEntry']):
+
+    def __init__(
+            self,
+            name: str,
+            spec: str,
+            version: Maybe[str],
+            interpreter: Path,
+            abi: Maybe[str],
+            site: Path,
+            stamps: Map[str, float],
+    ) -> None:
+        self.name = name
+        self.spec = spec
+        self.version = version
+        self.interpreter = interpreter
+        self.abi = abi
+        self.site = site
+        self.stamps = stamps
+
+
+class Manifest(Dat['Manifest']):
+
+    @staticmethod
+    def cons(entries: Map[str, ManifestEntry]=Map()) -> 'Manifest':
+        return Manifest(entries)
+
+    def __init__(self, entries: Map[str, ManifestEntry]) -> None:
+        self.entries = entries
+
+    def entry(self, name: str) -> Maybe[ManifestEntry]:
+        return self.entries.lift(name)
+
+    def update(self, entries: List[ManifestEntry]) -> 'Manifest':
+        return self.copy(entries=self.entries ** Map(entries.map(lambda a: (a.name, a))))
+
+    def remove(self, names: List[str]) -> 'Manifest':
+        return self.copy(entries=self.entries.keyfilter(lambda a: a not in names))
+
+
+__all__ = ('ManifestEntry', 'Manifest',)
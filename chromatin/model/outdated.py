@@ -0,0 +1,37 @@
+from amino import Maybe, List, Map
+from amino.dat import Dat
+
+
+class IndexEntry(Dat['IndexEntry']):
+    '''the versions of a project on a package index, with the validator of the response they were parsed from.
+    '''
+
+    def __init__(self, etag: Maybe[str], last_modified: Maybe[str], versions: List[str]) -> None:
+        self.etag = etag
+        self.last_modified = last_modified
+        self.versions = versions
+
+
+class IndexCache(Dat['IndexCache']):
+
+    @staticmethod
+    def cons(entries: Map[str, IndexEntry]=Map()) -> 'IndexCache':
+        return IndexCache(entries)
+
+    def __init__(self, entries: Map[str, IndexEntry]) -> None:
+        self.entries = entries
+
+
+class PackageVersion(Dat['PackageVersion']):
+    '''the installed and the newest available version of a requirement, which are unknown if the requirement isn't a
+    project name or the index can't be queried.
+    '''
+
+    def __init__(self, plugin: str, project: str, installed: Maybe[str], latest: Maybe[str]) -> None:
+        self.plugin = plugin
+        self.project = project
+        self.installed = installed
+        self.latest = latest
+
+
+__all__ = ('IndexEntry', 'IndexCache', 'PackageVersion',)
@@ -17,6 +17,10 @@ class ConfigRplugin(Dat['ConfigRplugin']):
             interpreter: Maybe[str],
             extensions: Maybe[List[str]],
             track: Maybe[bool],
+            host_group: Maybe[str],
+            on_cmd: Maybe[List[str]],
+            on_ft: Maybe[List[str]],
+            on_event: Maybe[List[str]],
     ) -> None:
         self.spec = spec
         self.name = name
@@ -25,6 +29,28 @@ class ConfigRplugin(Dat['ConfigRplugin']):
         self.interpreter = interpreter
         self.extensions = extensions
         self.track = track
+        self.host_group = host_group
+        self.on_cmd = on_cmd
+        self.on_ft = on_ft
+        self.on_event = on_event
+
+
+class LazyTriggers(Dat['LazyTriggers']):
+    '''commands, filetypes and autocmd events that activate a plugin on first use instead of during startup.
+    '''
+
+    @staticmethod
+    def cons(commands: List[str]=Nil, filetypes: List[str]=Nil, events: List[str]=Nil) -> 'LazyTriggers':
+        return LazyTriggers(commands, filetypes, events)
+
+    def __init__(self, commands: List[str], filetypes: List[str], events: List[str]) -> None:
+        self.commands = commands
+        self.filetypes = filetypes
+        self.events = events
+
+    @property
+    def empty(self) -> bool:
+        return self.commands.empty and self.filetypes.empty and self.events.empty
 
 
 class Rplugin(ADT['Rplugin']):
@@ -39,8 +65,11 @@ class Rplugin(ADT['Rplugin']):
             interpreter: Maybe[str]=Nothing,
             extensions: List[str]=Nil,
             track: bool=True,
+            host_group: Maybe[str]=Nothing,
+            lazy: LazyTriggers=None,
     ) -> 'Rplugin':
-        return cls(name, spec, debug, pythonpath, interpreter, extensions, track)
+        return cls(name, spec, debug, pythonpath, interpreter, extensions, track, host_group,
+                   lazy or LazyTriggers.cons())
 
     def __init__(
             self,
@@ -51,6 +80,8 @@ class Rplugin(ADT['Rplugin']):
             interpreter: Maybe[str],
             extensions: List[str],
             track: bool,
+            host_group: Maybe[str],
+            lazy: LazyTriggers,
     ) -> None:
         self.name = name
         self.spec = spec
@@ -59,6 +90,8 @@ class Rplugin(ADT['Rplugin']):
         self.interpreter = interpreter
         self.extensions = extensions
         self.track = track
+        self.host_group = host_group
+        self.lazy = lazy
 
     @property
     def pythonpath_str(self) -> None:
@@ -133,6 +166,9 @@ def cons_rplugin(conf: ConfigRplugin) -> Rplugin:
         conf.interpreter,
         conf.extensions.get_or_strict(Nil),
         conf.track.get_or_strict(True),
+        conf.host_group,
+        LazyTriggers.cons(conf.on_cmd.get_or_strict(Nil), conf.on_ft.get_or_strict(Nil),
+                          conf.on_event.get_or_strict(Nil)),
     )
 
 
@@ -218,4 +254,4 @@ class ActiveRplugin(Dat['ActiveRplugin']):
 
 __all__ = ('Rplugin', 'DistRplugin', 'DirRplugin', 'SiteRplugin', 'cons_rplugin', 'ActiveRpluginMeta', 'ActiveRplugin',
            'InstallableRplugin', 'DistVenvRplugin', 'DirVenvRplugin', 'StackageRplugin', 'HsDirRplugin',
-           'InstallableRpluginMeta', 'HsHackageRplugin',)
+           'InstallableRpluginMeta', 'HsHackageRplugin', 'LazyTriggers',)
@@ -0,0 +1,21 @@
+from amino.dat import Dat
+
+
+class StoreStats(Dat['StoreStats']):
+    '''summary of the package store, where `links` is the number of venv files that are hardlinked to an object and
+    `saved` the size of the copies that these links replace.
+    '''
+
+    @staticmethod
+    def cons(objects: int=0, size: int=0, links: int=0, saved: int=0, orphans: int=0) -> 'StoreStats':
+        return StoreStats(objects, size, links, saved, orphans)
+
+    def __init__(self, objects: int, size: int, links: int, saved: int, orphans: int) -> None:
+        self.objects = objects
+        self.size = size
+        self.links = links
+        self.saved = saved
+        self.orphans = orphans
+
+
+__all__ = ('StoreStats',)
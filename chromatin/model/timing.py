@@ -0,0 +1,24 @@
+from amino import Maybe
+from amino.dat import Dat
+
+
+class Timing(Dat['Timing']):
+    '''monotonic start and end of a lifecycle phase, either of a single plugin or, without `rplugin`, of all plugins.
+    '''
+
+    @staticmethod
+    def cons(phase: str, start: float, end: float, rplugin: str=None) -> 'Timing':
+        return Timing(phase, Maybe.optional(rplugin), start, end)
+
+    def __init__(self, phase: str, rplugin: Maybe[str], start: float, end: float) -> None:
+        self.phase = phase
+        self.rplugin = rplugin
+        self.start = start
+        self.end = end
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+__all__ = ('Timing',)
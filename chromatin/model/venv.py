@@ -1,7 +1,6 @@
 import abc
-import pkg_resources
 
-from amino import Path, Boolean
+from amino import Path, Boolean, List, Maybe
 from amino.boolean import true, false
 from amino.dat import ADT, Dat
 
@@ -34,6 +33,31 @@ class Venv(Dat['Venv']):
         self.meta = meta
 
 
+class VenvMetadata(Dat['VenvMetadata']):
+    '''the layout of a plugin venv and the installed version of the plugin, written by bootstrap and install so that
+    activation doesn't have to search the venv.
+    '''
+
+    def __init__(self, site: Path, python_version: Maybe[str], plugin_path: Path, version: Maybe[str]) -> None:
+        self.site = site
+        self.python_version = python_version
+        self.plugin_path = plugin_path
+        self.version = version
+
+
+class VenvOptions(Dat['VenvOptions']):
+    '''settings that determine how plugin venvs are created.
+    '''
+
+    @staticmethod
+    def cons(templates: bool=False, base_layer: bool=False) -> 'VenvOptions':
+        return VenvOptions(templates, base_layer)
+
+    def __init__(self, templates: bool, base_layer: bool) -> None:
+        self.templates = templates
+        self.base_layer = base_layer
+
+
 class VenvStatus(ADT['VenvStatus']):
 
     @abc.abstractproperty
@@ -62,6 +86,46 @@ class VenvAbsent(VenvStatus):
         return false
 
 
+class VenvDamage(ADT['VenvDamage']):
+    pass
+
+
+class BrokenInterpreter(VenvDamage):
+    '''`bin/python` doesn't point to an executable, usually because the interpreter was removed or upgraded.
+    '''
+
+    def __init__(self, python: Path) -> None:
+        self.python = python
+
+
+class StaleConfig(VenvDamage):
+    '''the `home` in `pyvenv.cfg` doesn't exist.
+    '''
+
+    def __init__(self, home: str) -> None:
+        self.home = home
+
+
+class MissingSite(VenvDamage):
+    pass
+
+
+class MissingPip(VenvDamage):
+    pass
+
+
+class VenvDamaged(VenvStatus):
+
+    def __init__(self, rplugin: Rplugin, venv: Venv, damage: List[VenvDamage]) -> None:
+        self.rplugin = rplugin
+        self.venv = venv
+        self.damage = damage
+
+    @property
+    def exists(self) -> Boolean:
+        return false
+
+
 class VenvPackageStatus(ADT['VenvPackageStatus']):
 
     @abc.abstractproperty
@@ -71,9 +135,9 @@ class VenvPackageStatus(ADT['VenvPackageStatus']):
 
 class VenvPackageExistent(VenvPackageStatus):
 
-    def __init__(self, venv: Venv, dist: pkg_resources.Distribution) -> None:
+    def __init__(self, venv: Venv, version: str) -> None:
         self.venv = venv
-        self.dist = dist
+        self.version = version
 
     @property
     def exists(self) -> Boolean:
@@ -91,4 +155,5 @@ class VenvPackageAbsent(VenvPackageStatus):
 
 
 __all__ = ('VenvStatus', 'VenvPresent', 'VenvAbsent', 'VenvPackageAbsent', 'VenvPackageExistent', 'VenvPackageStatus',
-           'Venv',)
+           'Venv', 'VenvMetadata', 'VenvOptions', 'VenvDamage', 'BrokenInterpreter', 'StaleConfig', 'MissingSite',
+           'MissingPip', 'VenvDamaged',)
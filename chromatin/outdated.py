@@ -0,0 +1,213 @@
+'''detection of plugins with newer releases, so that `CrmUpdate` runs pip only where it changes something.
+The installed version of each requirement is read from its dist-info, the available versions from the wheelhouse and
+the simple API of the index in `$PIP_INDEX_URL` or PyPI. Index responses are cached in
+`$XDG_CACHE_HOME/chromatin/index.json` and revalidated with their `ETag` and `Last-Modified` headers.
+Requirements that aren't project names, like paths and URLs, and those whose versions can't be determined, are
+considered outdated, since only pip can tell.
+'''
+import os
+import re
+import json
+from typing import Any
+
+from amino import Path, IO, do, Do, Maybe, Nothing, Just, List, Lists, Map, Try, Left, Right
+from amino.json import dump_json, decode_json
+from amino.logging import module_log
+
+from chromatin.model.outdated import IndexEntry, IndexCache, PackageVersion
+from chromatin.model.rplugin import InstallableRplugin, VenvRplugin, DistVenvRplugin
+from chromatin.manifest import find_dist_info, dist_info_version, canonical_dist_name
+from chromatin.venv import cons_venv_under, venv_site, site_layers
+from chromatin.wheelhouse import venv_wheelhouse
+from chromatin.util.resources import xdg_cache_home
+
+log = module_log()
+default_index = 'https://pypi.org/simple'
+json_type = 'application/vnd.pypi.simple.v1+json'
+accept = f'{json_type}, text/html;q=0.1'
+anchor_rex = re.compile(r'<a[^>]*>([^<]+)</a>')
+archive_rex = re.compile(r'\.(tar\.gz|tar\.bz2|zip|whl)$')
+request_timeout = 10
+
+
+def index_url() -> str:
+    return os.environ.get('PIP_INDEX_URL', default_index).rstrip('/')
+
+
+def cache_file() -> Path:
+    cache = xdg_cache_home.value / Path | (Path.home() / '.cache')
+    return cache / 'chromatin' / 'index.json'
+
+
+def read_cache(file: Path) -> IndexCache:
+    return (
+        Try(file.read_text)
+        .flat_map(decode_json)
+        .flat_map(lambda a: Right(a) if isinstance(a, IndexCache) else Left(f'invalid index cache: {a}'))
+        .value_or(lambda e: IndexCache.cons())
+    )
+
+
+def write_cache(file: Path, cache: IndexCache) -> None:
+    tmp = file.with_suffix('.tmp')
+    def write(text: str) -> None:
+        file.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(text)
+        os.replace(str(tmp), str(file))
+    dump_json(cache).flat_map(lambda a: Try(write, a)).lmap(lambda e: log.debug(f'writing index cache: {e}'))
+
+
+def filename_version(project: str, filename: str) -> Maybe[str]:
+    '''the version in the name of a wheel or sdist of `project`.
+    '''
+    stem = archive_rex.sub('', filename)
+    wheel = filename.endswith('.whl')
+    parts = stem.split('-') if wheel else stem.rsplit('-', 1)
+    if stem == filename or len(parts) < 2:
+        return Nothing
+    name, version = parts[0], parts[1]
+    return Just(version) if canonical_dist_name(name) == project and version else Nothing
+
+
+def parse_index(project: str, content_type: str, body: str) -> List[str]:
+    filenames = (
+        Lists.wrap(json.loads(body).get('files', [])).map(lambda a: a.get('filename', ''))
+        if content_type.startswith(json_type) else
+        Lists.wrap(anchor_rex.findall(body))
+    )
+    return filenames.flat_map(lambda a: Lists.wrap(filename_version(project, a))).distinct
+
+
+def validators(entry: IndexEntry) -> dict:
+    headers = dict(Accept=accept)
+    entry.etag.foreach(lambda a: headers.update({'If-None-Match': a}))
+    entry.last_modified.foreach(lambda a: headers.update({'If-Modified-Since': a}))
+    return headers
+
+
+def fetch_versions(url: str, project: str, cached: Maybe[IndexEntry]) -> Maybe[IndexEntry]:
+    '''query the index for the versions of `project`, returning the cached entry if the index responds with 304.
+    '''
+    import urllib.error
+    import urllib.request
+    headers = cached.map(validators).get_or_strict(dict(Accept=accept))
+    request = urllib.request.Request(f'{url}/{project}/', headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=request_timeout) as response:
+            body = response.read().decode('utf-8', errors='replace')
+            content_type = response.headers.get('Content-Type', '')
+            return Just(IndexEntry(
+                Maybe.optional(response.headers.get('ETag')),
+                Maybe.optional(response.headers.get('Last-Modified')),
+                parse_index(project, content_type, body),
+            ))
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return cached
+        log.debug(f'querying the index for `{project}`: {e}')
+    except (OSError, ValueError) as e:
+        log.debug(f'querying the index for `{project}`: {e}')
+    return Nothing
+
+
+def fetch_all(url: str, projects: List[str], cache: IndexCache) -> Map[str, IndexEntry]:
+    from concurrent.futures import ThreadPoolExecutor
+    def fetch(project: str) -> Maybe[IndexEntry]:
+        return fetch_versions(url, project, cache.entries.lift(f'{url}/{project}'))
+    with ThreadPoolExecutor(max_workers=8, thread_name_prefix='chromatin_index') as executor:
+        results = Lists.wrap(executor.map(fetch, projects))
+    return Map(projects.zip(results).flat_map2(lambda p, r: Lists.wrap(r.map(lambda e: (f'{url}/{p}', e)))))
+
+
+def parse_requirement(req: str) -> Maybe[Any]:
+    '''a `pkg_resources.Requirement` if `req` names a project, as opposed to a path or URL.
+    '''
+    import pkg_resources
+    if os.sep in req or ':' in req or os.path.exists(req):
+        return Nothing
+    return Try(pkg_resources.Requirement.parse, req).to_maybe
+
+
+def newest_version(versions: List[str], requirement: Any, installed: Maybe[str]) -> Maybe[str]:
+    '''the highest version that satisfies the requirement, excluding pre-releases unless one is installed.
+    '''
+    from pkg_resources import parse_version
+    pre = installed.exists(lambda a: parse_version(a).is_prerelease)
+    parsed = versions.flat_map(lambda a: Lists.wrap(Try(parse_version, a).to_maybe.map(lambda v: (a, v))))
+    candidates = parsed.filter(lambda a: (pre or not a[1].is_prerelease) and requirement.specifier.contains(a[1], True))
+    return candidates.sort_by(lambda a: a[1], reverse=True).head.map(lambda a: a[0])
+
+
+def is_outdated(version: PackageVersion) -> bool:
+    from pkg_resources import parse_version
+    newer = version.installed.flat_map(lambda i: version.latest.map(lambda l: parse_version(l) > parse_version(i)))
+    return newer.get_or_strict(True)
+
+
+def installed_version(sites: List[Path], project: str) -> Maybe[str]:
+    return sites.find_map(lambda a: find_dist_info(a, project)).flat_map(dist_info_version)
+
+
+def wheel_versions(wheelhouse: Path, project: str) -> List[str]:
+    names = Lists.wrap(sorted(os.listdir(str(wheelhouse)))) if wheelhouse.is_dir() else List()
+    return names.flat_map(lambda a: Lists.wrap(filename_version(project, a)))
+
+
+def checkable(rplugin: InstallableRplugin) -> bool:
+    meta = rplugin.meta
+    return isinstance(meta, VenvRplugin) and isinstance(meta.conf, DistVenvRplugin)
+
+
+def plugin_reqs(rplugin: InstallableRplugin) -> List[str]:
+    return rplugin.rplugin.extensions.cons(rplugin.meta.conf.req)
+
+
+@do(IO[List[PackageVersion]])
+def plugin_versions(venv_dir: Path, rplugin: InstallableRplugin, index: Map[str, IndexEntry], url: str) -> Do:
+    name = rplugin.rplugin.name
+    venv = cons_venv_under(venv_dir, name)
+    site = yield venv_site(venv)
+    sites = site.map(lambda a: site_layers(a).cons(a)).get_or_strict(List())
+    wheelhouse = yield venv_wheelhouse(venv_dir, venv.meta.python_executable)
+    def version(req: str) -> PackageVersion:
+        def known(requirement: Any) -> PackageVersion:
+            project = canonical_dist_name(requirement.project_name)
+            installed = installed_version(sites, project)
+            remote = index.lift(f'{url}/{project}').map(lambda a: a.versions)
+            available = remote.map(lambda a: a + wheel_versions(wheelhouse, project))
+            latest = available.flat_map(lambda a: newest_version(a, requirement, installed))
+            return PackageVersion(name, project, installed, latest)
+        return parse_requirement(req).map(known).get_or(PackageVersion, name, req, Nothing, Nothing)
+    return plugin_reqs(rplugin).map(version)
+
+
+@do(IO[List[PackageVersion]])
+def check_versions(venv_dir: Path, rplugins: List[InstallableRplugin]) -> Do:
+    '''determine installed and available versions for the requirements of the python plugins in `rplugins`.
+    Directory and haskell plugins are reported with unknown versions.
+    '''
+    url = index_url()
+    file = cache_file()
+    cache = yield IO.delay(read_cache, file)
+    venv_rplugins = rplugins.filter(checkable)
+    others = rplugins.filter_not(checkable)
+    requirements = venv_rplugins.flat_map(plugin_reqs).flat_map(lambda a: Lists.wrap(parse_requirement(a)))
+    projects = requirements.map(lambda a: canonical_dist_name(a.project_name)).distinct
+    fetched = yield IO.delay(fetch_all, url, projects, cache)
+    index = cache.entries ** fetched
+    updated = cache.copy(entries=index)
+    if updated != cache:
+        yield IO.delay(write_cache, file, updated)
+    versions = yield venv_rplugins.traverse(lambda a: plugin_versions(venv_dir, a, index, url), IO)
+    return versions.join + unknown_versions(others)
+
+
+def unknown_versions(rplugins: List[InstallableRplugin]) -> List[PackageVersion]:
+    return rplugins.map(lambda a: PackageVersion(a.rplugin.name, a.rplugin.spec, Nothing, Nothing))
+
+
+def outdated_plugins(versions: List[PackageVersion]) -> List[str]:
+    return versions.filter(is_outdated).map(lambda a: a.plugin).distinct
+
+
+__all__ = ('check_versions', 'unknown_versions', 'outdated_plugins', 'is_outdated', 'filename_version', 'parse_index')
@@ -5,15 +5,15 @@ from amino.boolean import false
 from amino.case import Case
 from amino.logging import module_log
 
-from ribosome.process import Subprocess
-
-from chromatin.model.venv import VenvStatus, VenvPresent, VenvAbsent, Venv
+from chromatin.model.venv import VenvStatus, VenvPresent, VenvAbsent, Venv, VenvOptions, VenvDamaged
 from chromatin.model.rplugin import (DirRplugin, SiteRplugin, DistRplugin, Rplugin, InstallableRplugin, DistVenvRplugin,
                                      DirVenvRplugin, StackageRplugin, HsDirRplugin, HsStackDirRplugin,
                                      HsStackageRplugin, VenvRplugin, HsInstallableRplugin, HackageRplugin,
                                      HsHackageRplugin)
-from chromatin.venv import cons_venv
+from chromatin.venv import cons_venv, record_venv_layout
 from chromatin.util.interpreter import python_interpreter
+from chromatin.template import clone_template
+from chromatin.seed import create_venv
 
 log = module_log()
 
@@ -25,13 +25,16 @@ def venv_present(dir: Path, plugin: Rplugin) -> VenvStatus:
 
 @do(IO[VenvStatus])
 def check_venv(base_dir: Path, plugin: Rplugin) -> Do:
+    from chromatin.doctor import diagnose
     dir = base_dir / plugin.name
-    pip = dir / 'bin' / 'pip'
-    exists = yield IO.delay(pip.exists)
-    return (
-        venv_present(dir, plugin)
-        if exists else
-        VenvAbsent(plugin)
+    diagnosis = yield IO.delay(diagnose, dir)
+    return diagnosis.cata_strict(
+        lambda damage: (
+            venv_present(dir, plugin)
+            if damage.empty else
+            VenvDamaged(plugin, cons_venv(dir, plugin.name), damage)
+        ),
+        VenvAbsent(plugin),
     )
 
 
@@ -76,27 +79,39 @@ def create_dir(dir: Path) -> IO[None]:
     return IO.delay(dir.mkdir, parents=True, exist_ok=True)
 
 
+@do(IO[None])
+def template_failed(interpreter: Path, dir: Path, name: str, error: Exception) -> Do:
+    log.debug(f'cloning venv template for `{name}` failed, creating the venv from scratch: {error}')
+    yield remove_dir(dir)
+    yield create_dir(dir)
+    yield create_venv(dir.parent, interpreter, dir, name)
+
+
 @do(IO[Venv])
-def build_venv(global_interpreter: Maybe[str], dir: Path, rplugin_interpreter: Maybe[str], name: str) -> Do:
+def build_venv(global_interpreter: Maybe[str], dir: Path, rplugin_interpreter: Maybe[str], name: str,
+               options: VenvOptions) -> Do:
+    from chromatin.layer import add_base_layer
     interpreter = yield python_interpreter(global_interpreter, rplugin_interpreter)
-    retval, out, err = yield Subprocess.popen(str(interpreter), '-m', 'venv', str(dir), '--upgrade', timeout=30)
-    success = retval == 0
     yield (
-        IO.pure(cons_venv(dir, name))
-        if success else
-        IO.failed(f'creating venv for `{name}`: {err.join_lines}')
+        clone_template(dir.parent, interpreter, dir).recover_with(
+            lambda e: template_failed(interpreter, dir, name, e))
+        if options.templates else
+        create_venv(dir.parent, interpreter, dir, name)
     )
+    venv = cons_venv(dir, name)
+    yield record_venv_layout(venv)
+    yield add_base_layer(dir.parent, venv) if options.base_layer else IO.pure(None)
+    return venv
 
 
 @do(IO[str])
-def bootstrap_venv(global_interpreter: Maybe[Path], base_dir: Path, rplugin: Rplugin) -> Do:
+def bootstrap_venv(global_interpreter: Maybe[Path], base_dir: Path, rplugin: Rplugin, options: VenvOptions) -> Do:
     venv_dir = base_dir / rplugin.name
     log.debug(f'bootstrapping {rplugin} in {venv_dir}')
     yield remove_dir(venv_dir)
     yield create_dir(venv_dir)
-    yield build_venv(global_interpreter, venv_dir, rplugin.interpreter, rplugin.name)
+    yield build_venv(global_interpreter, venv_dir, rplugin.interpreter, rplugin.name, options)
     return rplugin.name
 
-
 __all__ = ('check_venv', 'venv_exists', 'venv_package_installed', 'venv_status_check', 'rplugin_ready',
            'venv_rplugin_status', 'cons_installable_rplugin',)
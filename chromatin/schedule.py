@@ -0,0 +1,179 @@
+'''concurrency limits for installation jobs.
+Venv creation, pip and Haskell builds each have a number of slots that is derived from the number of cores and the
+available memory, and can be overridden with `g:chromatin_install_jobs`. A job waits for a free slot of its class,
+and waiting jobs are started in order of priority, so that installs requested interactively run before background
+updates and rebuilds. Each job has a timeout after which its process is killed.
+'''
+import os
+import heapq
+import threading
+import itertools
+from subprocess import Popen, PIPE, TimeoutExpired
+from typing import TypeVar, Any
+
+from amino import IO, Lists, Map
+from amino.dat import Dat
+from amino.logging import module_log
+
+from ribosome.process import Subprocess, SubprocessResult
+
+log = module_log()
+A = TypeVar('A')
+interactive = 0
+background = 1
+mebibyte = 1 << 20
+
+
+class JobClass(Dat['JobClass']):
+
+    def __init__(self, name: str, limit: int, timeout: float) -> None:
+        self.name = name
+        self.limit = limit
+        self.timeout = timeout
+
+
+def available_memory() -> int:
+    '''`MemAvailable` from `/proc/meminfo`, or the free physical memory where that doesn't exist.
+    '''
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+
+def default_classes(cpus: int, memory: int) -> Map[str, JobClass]:
+    '''pip needs about 256 MiB per process, cabal and stack about 2 GiB and several cores, and serialize on the store
+    lock anyway.
+    '''
+    def by_memory(per_job: int, limit: int) -> int:
+        return max(1, min(limit, memory // (per_job * mebibyte))) if memory > 0 else max(1, limit)
+    return Map(
+        venv=JobClass('venv', max(1, cpus), 120.),
+        pip=JobClass('pip', by_memory(256, cpus), 600.),
+        haskell=JobClass('haskell', by_memory(2048, cpus // 4), 3600.),
+    )
+
+
+class Slots:
+    '''a counting semaphore that wakes waiters by priority, and in arrival order within a priority.
+    '''
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.running = 0
+        self.waiting = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+
+    def acquire(self, priority: int) -> None:
+        with self.cond:
+            ticket = (priority, next(self.counter))
+            heapq.heappush(self.waiting, ticket)
+            self.cond.wait_for(lambda: self.running < self.limit and self.waiting[0] == ticket)
+            heapq.heappop(self.waiting)
+            self.running += 1
+            self.cond.notify_all()
+
+    def release(self) -> None:
+        with self.cond:
+            self.running -= 1
+            self.cond.notify_all()
+
+    def resize(self, limit: int) -> None:
+        with self.cond:
+            self.limit = max(1, limit)
+            self.cond.notify_all()
+
+
+class Scheduler:
+
+    def __init__(self, classes: Map[str, JobClass]) -> None:
+        self.classes = classes
+        self.slots = classes.valmap(lambda a: Slots(a.limit))
+
+    def configure(self, limits: Map[str, int]) -> None:
+        '''apply the limits from `g:chromatin_install_jobs` over the defaults.
+        '''
+        for name, job in self.classes.items():
+            limit = limits.lift(name).filter(lambda a: isinstance(a, int) and a > 0).get_or_strict(job.limit)
+            self.slots[name].resize(limit)
+
+    def limit(self, name: str) -> int:
+        return self.slots[name].limit
+
+    def timeout(self, name: str) -> float:
+        return self.classes[name].timeout
+
+
+scheduler_lock = threading.Lock()
+schedulers = []
+
+
+def job_scheduler() -> Scheduler:
+    with scheduler_lock:
+        if not schedulers:
+            schedulers.append(Scheduler(default_classes(os.cpu_count() or 1, available_memory())))
+        return schedulers[0]
+
+
+def scheduled(job: str, priority: int, io: IO[A]) -> IO[A]:
+    '''run `io` when a slot of the class `job` is free.
+    '''
+    slots = job_scheduler().slots[job]
+    return IO.delay(slots.acquire, priority).flat_map(lambda a: io.ensure(lambda b: IO.delay(slots.release)))
+
+
+def run_process(subproc: Subprocess[A], timeout: float) -> SubprocessResult[A]:
+    kw = dict(env=dict())
+    kw.update(subproc.kw)
+    proc = Popen(subproc.args_tuple, stdin=PIPE, stdout=PIPE, stderr=PIPE, universal_newlines=True, **kw)
+    try:
+        out, err = proc.communicate(timeout=timeout)
+    except TimeoutExpired:
+        proc.kill()
+        out, err = proc.communicate()
+        err = f'{err or ""}\nkilled after {timeout:.0f} seconds'
+    retval = -1 if proc.returncode is None or proc.returncode < 0 else proc.returncode
+    return SubprocessResult(retval, Lists.lines(out or ''), Lists.lines(err or ''), subproc.data)
+
+
+def scheduled_subprocess(job: str, priority: int, subproc: Subprocess[A]) -> IO[SubprocessResult[A]]:
+    '''run `subproc` in a slot of the class `job`, killing it after the class's or the subprocess's timeout,
+    whichever is longer.
+    '''
+    timeout = max(subproc.timeout or 0, job_scheduler().timeout(job))
+    log.debug(f'scheduling {job} job `{subproc.args_tuple}`')
+    return scheduled(job, priority, IO.delay(run_process, subproc, timeout))
+
+
+class ScheduledSubprocess(Subprocess[A]):
+    '''a subprocess that waits for a slot when it is executed by ribosome's `GatherSubprocesses`.
+    '''
+
+    def __init__(self, subproc: Subprocess[A], job: str, priority: int) -> None:
+        super().__init__(subproc.exe, subproc.args, subproc.data, subproc.timeout, **subproc.kw)
+        self.subproc = subproc
+        self.job = job
+        self.priority = priority
+
+    def execute(self, **kw: Any) -> IO[SubprocessResult[A]]:
+        return scheduled_subprocess(self.job, self.priority, self.subproc)
+
+
+def gather_timeout(job: str, count: int) -> float:
+    '''the time that `count` jobs of the class `job` need at most when they are run in waves of the class's limit.
+    '''
+    scheduler = job_scheduler()
+    waves = -(-count // scheduler.limit(job))
+    return max(1, waves) * scheduler.timeout(job)
+
+
+__all__ = ('interactive', 'background', 'JobClass', 'default_classes', 'Slots', 'job_scheduler', 'scheduled',
+           'scheduled_subprocess', 'ScheduledSubprocess', 'gather_timeout',)
@@ -0,0 +1,90 @@
+'''creation of plugin venvs without running `ensurepip` for each of them.
+The venv is created without pip, in process with `venv.EnvBuilder` if the interpreter is the one that chromatin runs
+on, and with `python -m venv --without-pip` otherwise. pip is then linked from the interpreter's template venv, which
+is built once and shared with the template clones.
+'''
+import os
+import sys
+import venv
+
+from amino import Path, IO, do, Do, List, Lists
+from amino.logging import module_log
+
+from ribosome.process import Subprocess
+
+from chromatin.template import ensure_template, FileCloner, rewrite_file
+
+log = module_log()
+
+
+def site_packages(dir: Path) -> List[str]:
+    return Lists.wrap(sorted((dir / 'lib').glob('python3.*/site-packages'))).map(lambda a: str(a.relative_to(dir)))
+
+
+def running_interpreter(interpreter: Path) -> bool:
+    '''whether `interpreter` is the executable of the current process, which must not be a venv itself, since
+    `EnvBuilder` would use the outer venv's interpreter as `home`.
+    '''
+    return sys.prefix == sys.base_prefix and os.path.realpath(str(interpreter)) == os.path.realpath(sys.executable)
+
+
+def build_in_process(dir: Path) -> None:
+    venv.EnvBuilder(with_pip=False, symlinks=True).create(str(dir))
+
+
+@do(IO[None])
+def create_bare_venv(interpreter: Path, dir: Path, name: str) -> Do:
+    in_process = yield IO.delay(running_interpreter, interpreter)
+    retval, out, err = yield (
+        IO.delay(build_in_process, dir).replace((0, List(), List()))
+        if in_process else
+        Subprocess.popen(str(interpreter), '-m', 'venv', '--without-pip', str(dir), timeout=30)
+    )
+    yield IO.pure(None) if retval == 0 else IO.failed(f'creating venv for `{name}`: {err.join_lines}')
+
+
+def link_pip(template: Path, dir: Path) -> None:
+    '''clone pip's package and metadata from the template's site-packages and copy its scripts with rewritten shebangs.
+    '''
+    old, new = str(template).encode(), str(dir).encode()
+    clone_file = FileCloner()
+    sites = site_packages(template)
+    if sites.empty:
+        raise Exception(f'no site-packages in template {template}')
+    for site in sites:
+        for entry in Lists.wrap((template / site).glob('pip')) + Lists.wrap((template / site).glob('pip-*.dist-info')):
+            for root, dirs, files in os.walk(str(entry)):
+                dest_root = os.path.join(str(dir), os.path.relpath(root, str(template)))
+                os.makedirs(dest_root, exist_ok=True)
+                for name in files:
+                    clone_file(os.path.join(root, name), os.path.join(dest_root, name))
+    for script in (template / 'bin').glob('pip*'):
+        rewrite_file(str(script), str(dir / 'bin' / script.name), old, new)
+
+
+@do(IO[None])
+def ensurepip(dir: Path, name: str, error: Exception) -> Do:
+    log.debug(f'seeding pip for `{name}` failed, running ensurepip: {error}')
+    retval, out, err = yield Subprocess.popen(str(dir / 'bin' / 'python'), '-m', 'ensurepip', '--default-pip',
+                                              timeout=60)
+    yield IO.pure(None) if retval == 0 else IO.failed(f'installing pip for `{name}`: {err.join_lines}')
+
+
+@do(IO[None])
+def seed_pip(base_dir: Path, interpreter: Path, dir: Path, name: str) -> Do:
+    '''link pip into the venv in `dir`, falling back to `ensurepip` if the template can't be built.
+    '''
+    yield (
+        ensure_template(base_dir, interpreter)
+        .flat_map(lambda template: IO.delay(link_pip, template, dir))
+        .recover_with(lambda e: ensurepip(dir, name, e))
+    )
+
+
+@do(IO[None])
+def create_venv(base_dir: Path, interpreter: Path, dir: Path, name: str) -> Do:
+    yield create_bare_venv(interpreter, dir, name)
+    yield seed_pip(base_dir, interpreter, dir, name)
+
+
+__all__ = ('create_venv', 'seed_pip',)
@@ -1,11 +1,11 @@
 from typing import Callable, TypeVar
 
-from amino import Path, Try, Right, Either, do, Nil
+from amino import Path, Try, Right, Either, do, Nil, Map
 from amino.do import Do
 from amino.boolean import true, false
 
 from ribosome.config.settings import bool_setting, path_setting, list_setting
-from ribosome.config.setting import Setting
+from ribosome.config.setting import Setting, int_setting, map_setting
 from ribosome.nvim.io.state import NS
 from ribosome.config.resources import Resources
 
@@ -36,6 +36,38 @@ autoreboot_help = '''When set, plugins will be de- and reactivated after being u
 interpreter_help = '''Overrides the python executable that is used to create virtualenvs. If unset, the interpreter is
 determined heuristically. This can be nontrivial, for example when already inside a virtualenv (mostly relevant for
 development), since creating a venv from within another doesn't work correctly.
+The value, as well as a plugin's `interpreter` option, can be a path, an executable name on `$PATH` or a version spec
+like `3.11` or `>=3.10`, which selects the newest matching interpreter. Without a value, `python3` is used.
+'''
+zygote_help = '''When set, python rplugin hosts are forked from a server process that has amino, ribosome and msgpack
+already imported, instead of being started as separate interpreters. A server is started per neovim instance,
+interpreter and ribosome version. Has no effect for plugins with `debug` set.
+'''
+venv_templates_help = '''When set, new virtualenvs are cloned from a template that is created once per interpreter in
+`.templates` below `g:chromatin_venv_dir`, instead of running `python -m venv` for each plugin.
+The template's files are shared through reflinks if the file system supports them, otherwise through hardlinks, so
+that modifying a file in one venv in place affects all of them.
+'''
+base_layer_help = '''When set, ribosome and its dependencies are installed once per interpreter and ribosome version into
+`.base` below `g:chromatin_venv_dir`, which is made available to all plugin venvs with a `.pth` file, so that only
+plugin-specific packages are installed into each venv. Only affects newly created venvs.
+'''
+package_store_help = '''When set, the files of newly installed or updated plugins are deduplicated through a
+content-addressed store in `.store` below `g:chromatin_venv_dir`, hardlinking identical files across venvs.
+`CrmStoreStats` shows the space that is saved.
+'''
+pycache_prefix_help = '''When set, plugins are byte-compiled into `.pycache` below `g:chromatin_venv_dir` after
+installation, and their hosts are started with that dir as `pycache_prefix`, so that bytecode is found even if the
+package dirs aren't writable. Requires python 3.8 or later in the plugin venvs.
+'''
+wheelhouse_size_help = '''Maximum size in megabytes of each wheelhouse in `.wheels` below `g:chromatin_venv_dir`,
+which stores the wheels of installed distributions per interpreter ABI, so that they aren't downloaded and built again
+for each venv. The least recently installed wheels are removed when it is exceeded. If `0`, pip is run with
+`--no-cache`.
+'''
+install_jobs_help = '''Maximum number of concurrent installation jobs per class, like `{'pip': 4, 'haskell': 1}`.
+The classes are `venv` for creating virtualenvs, `pip` and `haskell` for cabal and stack builds. Classes that aren't
+given are limited by the number of cores and the available memory.
 '''
 
 
@@ -57,6 +89,15 @@ debug_pythonpath = bool_setting('debug_pythonpath', 'pass through $PYTHONPATH',
                                 Right(false))
 autoreboot = bool_setting('autoreboot', 'autoreboot plugins', autoreboot_help, True, Right(true))
 interpreter = path_setting('interpreter', 'python interpreter for venvs', interpreter_help, True)
+zygote = bool_setting('zygote', 'fork python hosts from a preloaded server', zygote_help, True, Right(false))
+venv_templates = bool_setting('venv_templates', 'clone venvs from templates', venv_templates_help, True, Right(false))
+base_layer = bool_setting('base_layer', 'share ribosome between venvs', base_layer_help, True, Right(false))
+pycache_prefix = bool_setting('pycache_prefix', 'shared bytecode dir for plugin hosts', pycache_prefix_help, True,
+                              Right(false))
+install_jobs = map_setting('install_jobs', 'concurrent installation jobs', install_jobs_help, True, Right(Map()))
+wheelhouse_size = int_setting('wheelhouse_size', 'wheel cache size in MB', wheelhouse_size_help, True, Right(1024))
+package_store = bool_setting('package_store', 'hardlink identical files across venvs', package_store_help, True,
+                             Right(false))
 
 
 @do(NS[D, None])
@@ -65,4 +106,6 @@ def ensure_setting(setting: Setting[A], value: A) -> Do:
 
 
 __all__ = ('ChromatinSettings', 'setting', 'update_setting', 'ensure_setting', 'handle_crm', 'venv_dir', 'rplugins',
-           'autostart', 'debug_pythonpath', 'autoreboot', 'interpreter',)
+           'autostart', 'debug_pythonpath', 'autoreboot', 'interpreter', 'zygote', 'venv_templates', 'base_layer',
+           'package_store', 'pycache_prefix', 'wheelhouse_size',
+           'install_jobs',)
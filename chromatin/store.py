@@ -0,0 +1,107 @@
+'''content-addressed store of the files installed into plugin venvs.
+After a plugin has been installed, each regular file in its venv's site-packages is hashed and replaced by a hardlink
+to the store object with the same content, which is created from the file if it doesn't exist yet. Since pip replaces
+files instead of writing to them, updating one venv doesn't affect the others. `pyvenv.cfg` and the scripts in `bin`
+are rewritten in place when a venv is repaired or cloned, so they are never linked.
+Objects are named after the SHA-256 of the content, with a suffix for executable files, whose mode must be preserved.
+'''
+import os
+import glob
+import stat
+import hashlib
+
+from amino import Path, IO, do, Do, List
+from amino.logging import module_log
+
+from chromatin.model.store import StoreStats
+
+log = module_log()
+store_name = '.store'
+chunk_size = 1 << 20
+
+
+def store_dir(venv_dir: Path) -> Path:
+    return venv_dir / store_name
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def object_path(store: str, path: str, st: os.stat_result) -> str:
+    digest = file_digest(path)
+    suffix = '-x' if st.st_mode & stat.S_IXUSR else ''
+    return os.path.join(store, digest[:2], f'{digest}{suffix}')
+
+
+def link_file(store: str, path: str, st: os.stat_result) -> int:
+    '''replace `path` with a hardlink to its store object, returning the number of bytes that are now shared.
+    '''
+    obj = object_path(store, path, st)
+    os.makedirs(os.path.dirname(obj), exist_ok=True)
+    try:
+        os.link(path, obj)
+        return 0
+    except FileExistsError:
+        pass
+    if os.path.samestat(os.stat(obj), st):
+        return 0
+    tmp = f'{path}.crm-link'
+    os.link(obj, tmp)
+    os.replace(tmp, path)
+    return st.st_size
+
+
+def link_tree(store: str, root: str) -> int:
+    shared = 0
+    sites = glob.glob(os.path.join(root, 'lib', '*', 'site-packages'))
+    for dir, dirs, files in (entry for site in sites for entry in os.walk(site)):
+        for name in files:
+            path = os.path.join(dir, name)
+            st = os.lstat(path)
+            if stat.S_ISREG(st.st_mode) and st.st_size > 0:
+                try:
+                    shared += link_file(store, path, st)
+                except OSError as e:
+                    log.debug(f'not linking {path} into the store: {e}')
+    return shared
+
+
+@do(IO[int])
+def link_venvs(venv_dir: Path, venvs: List[Path]) -> Do:
+    '''deduplicate the files of `venvs` with the store, returning the number of bytes that were shared.
+    '''
+    store = store_dir(venv_dir)
+    yield IO.delay(store.mkdir, parents=True, exist_ok=True)
+    shared = yield venvs.traverse(lambda a: IO.delay(link_tree, str(store), str(a)), IO)
+    total = sum(shared)
+    log.debug(f'linked {venvs.length} venvs into the store, sharing {total} bytes')
+    return total
+
+
+def collect_stats(store: str) -> StoreStats:
+    objects = size = links = saved = orphans = 0
+    for dir, dirs, files in os.walk(store):
+        for name in files:
+            st = os.lstat(os.path.join(dir, name))
+            venv_links = st.st_nlink - 1
+            objects += 1
+            size += st.st_size
+            links += venv_links
+            saved += st.st_size * max(venv_links - 1, 0)
+            orphans += 1 if venv_links == 0 else 0
+    return StoreStats(objects, size, links, saved, orphans)
+
+
+@do(IO[StoreStats])
+def read_store_stats(venv_dir: Path) -> Do:
+    store = store_dir(venv_dir)
+    exists = yield IO.delay(store.is_dir)
+    yield IO.delay(collect_stats, str(store)) if exists else IO.pure(StoreStats.cons())
+
+
+__all__ = ('store_dir', 'link_venvs', 'read_store_stats',)
@@ -0,0 +1,162 @@
+'''prepared virtualenvs that are cloned into plugin venvs instead of running `python -m venv` for each plugin.
+A template is built once per interpreter under `<venv_dir>/.templates` when `g:chromatin_venv_templates` is set.
+Clones share the template's files through reflinks if the file system supports them. Otherwise, they are hardlinked
+only when the caller opts in, as template clones do, and copied by default; only `pyvenv.cfg` and the scripts in
+`bin`, which contain the venv's path, are rewritten.
+'''
+import os
+import fcntl
+import shutil
+import hashlib
+
+from amino import Path, IO, do, Do
+from amino.logging import module_log
+
+from ribosome.process import Subprocess
+
+log = module_log()
+templates_name = '.templates'
+complete_marker = '.complete'
+# ioctl request for creating a copy-on-write clone of a file on btrfs and xfs
+FICLONE = 0x40049409
+
+
+def templates_dir(base_dir: Path) -> Path:
+    return base_dir / templates_name
+
+
+def template_key(interpreter: Path) -> str:
+    '''identify an interpreter by its resolved path and its executable's stat, so that an upgrade in place results in
+    a new template.
+    '''
+    real = os.path.realpath(str(interpreter))
+    stat = os.stat(real)
+    return hashlib.sha1(f'{real}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()[:16]
+
+
+class FileCloner:
+    '''share file contents with reflinks if the file system supports them, otherwise with hardlinks if `hardlink` is
+    set, falling back to copying.
+    Hardlinked files are shared by all clones, so an in-place write to one of them would affect every venv.
+    '''
+
+    def __init__(self, hardlink: bool=False) -> None:
+        self.reflink = True
+        self.hardlink = hardlink
+
+    def __call__(self, src: str, dst: str) -> None:
+        if self.reflink:
+            try:
+                with open(src, 'rb') as s, open(dst, 'wb') as d:
+                    fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+                shutil.copystat(src, dst)
+                return
+            except OSError:
+                self.reflink = False
+                if os.path.lexists(dst):
+                    os.unlink(dst)
+        if self.hardlink:
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+
+
+def rewrite_file(src: str, dst: str, old: bytes, new: bytes) -> bool:
+    with open(src, 'rb') as f:
+        content = f.read()
+    if old not in content:
+        return False
+    with open(dst, 'wb') as f:
+        f.write(content.replace(old, new))
+    shutil.copymode(src, dst)
+    return True
+
+
+def clone_tree(template: str, target: str, hardlink: bool=False) -> None:
+    old, new = template.encode(), target.encode()
+    clone_file = FileCloner(hardlink)
+    for root, dirs, files in os.walk(template):
+        rel = os.path.relpath(root, template)
+        dest_root = os.path.normpath(os.path.join(target, rel))
+        in_bin = rel.split(os.sep)[0] in ('.', 'bin')
+        os.makedirs(dest_root, exist_ok=True)
+        for name in dirs + files:
+            src = os.path.join(root, name)
+            dst = os.path.join(dest_root, name)
+            if os.path.islink(src):
+                os.symlink(os.readlink(src).replace(template, target), dst)
+            elif name in files and name != complete_marker and not (in_bin and rewrite_file(src, dst, old, new)):
+                clone_file(src, dst)
+
+
+@do(IO[None])
+def build_template(interpreter: Path, template: Path) -> Do:
+    yield IO.delay(shutil.rmtree, str(template), ignore_errors=True)
+    log.debug(f'building venv template for `{interpreter}` in {template}')
+    retval, out, err = yield Subprocess.popen(str(interpreter), '-m', 'venv', str(template), timeout=60)
+    yield (
+        IO.delay((template / complete_marker).touch)
+        if retval == 0 else
+        IO.failed(f'creating venv template for `{interpreter}`: {err.join_lines}')
+    )
+
+
+def acquire_lock(lock: Path) -> int:
+    fd = os.open(str(lock), os.O_CREAT | os.O_RDWR, 0o600)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    return fd
+
+
+@do(IO[Path])
+def ensure_template(base_dir: Path, interpreter: Path) -> Do:
+    '''return the template venv for `interpreter`, building it if necessary.
+    The lock serializes concurrent bootstraps, both within this process and across neovim instances.
+    '''
+    key = yield IO.delay(template_key, interpreter)
+    dir = templates_dir(base_dir)
+    template = dir / key
+    yield IO.delay(dir.mkdir, parents=True, exist_ok=True)
+    fd = yield IO.delay(acquire_lock, dir / f'{key}.lock')
+    complete = yield IO.delay((template / complete_marker).exists)
+    yield (IO.pure(None) if complete else build_template(interpreter, template)).ensure(
+        lambda a: IO.delay(os.close, fd))
+    return template
+
+
+@do(IO[None])
+def clone_template(base_dir: Path, interpreter: Path, dir: Path) -> Do:
+    template = yield ensure_template(base_dir, interpreter)
+    yield IO.delay(clone_tree, str(template), str(dir), True)
+
+
+def stale_template(template: Path) -> bool:
+    '''a template is stale if its interpreter has been removed or upgraded in place, since its key won't be computed
+    again.
+    '''
+    python = template / 'bin' / 'python'
+    real = os.path.realpath(str(python))
+    return (
+        (template / complete_marker).exists() and
+        (not os.path.exists(real) or template_key(Path(real)) != template.name)
+    )
+
+
+def prune_templates(base_dir: Path) -> int:
+    '''remove the templates of interpreters that don't exist anymore, returning the number of removed templates.
+    Templates that are being built are skipped, since they are only marked complete after `venv` has succeeded.
+    '''
+    dir = templates_dir(base_dir)
+    stale = [a for a in dir.iterdir() if a.is_dir() and stale_template(a)] if dir.is_dir() else []
+    for template in stale:
+        log.debug(f'removing stale venv template {template}')
+        shutil.rmtree(str(template), ignore_errors=True)
+        lock = dir / f'{template.name}.lock'
+        if lock.exists():
+            lock.unlink()
+    return len(stale)
+
+
+__all__ = ('templates_dir', 'ensure_template', 'clone_template', 'prune_templates',)
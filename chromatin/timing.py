@@ -0,0 +1,61 @@
+import time
+from typing import TypeVar, Tuple
+
+from amino import IO, List, Maybe, do, Do
+
+from ribosome.nvim.io.compute import NvimIO
+from ribosome.nvim.io.api import N
+
+from chromatin.model.timing import Timing
+
+A = TypeVar('A')
+
+
+def now() -> float:
+    return time.monotonic()
+
+
+@do(IO[Tuple[A, float, float]])
+def timed_io(io: IO[A]) -> Do:
+    start = yield IO.delay(now)
+    result = yield io
+    end = yield IO.delay(now)
+    return result, start, end
+
+
+@do(NvimIO[Tuple[A, float, float]])
+def timed_nvim(fa: NvimIO[A]) -> Do:
+    start = yield N.simple(now)
+    result = yield fa
+    end = yield N.simple(now)
+    return result, start, end
+
+
+def global_timings(timings: List[Timing]) -> List[Timing]:
+    return timings.filter(lambda a: a.rplugin.empty).sort_by(lambda a: a.start)
+
+
+def rplugin_timings(timings: List[Timing], phase: Timing) -> List[Timing]:
+    return timings.filter(
+        lambda a: a.rplugin.present and a.phase == phase.phase and phase.start <= a.start and a.end <= phase.end)
+
+
+def critical_rplugin(timings: List[Timing], phase: Timing) -> Maybe[Timing]:
+    '''the plugin that completed a phase last, which determines the phase's duration, since phases are barriers.
+    '''
+    return rplugin_timings(timings, phase).max_by(lambda a: a.end)
+
+
+def critical_path(timings: List[Timing]) -> List[Tuple[Timing, Maybe[Timing]]]:
+    return global_timings(timings).map(lambda a: (a, critical_rplugin(timings, a)))
+
+
+def total_duration(timings: List[Timing]) -> float:
+    return (
+        timings.map(lambda a: a.end).max.get_or_strict(0.) - timings.map(lambda a: a.start).min.get_or_strict(0.)
+        if timings else
+        0.
+    )
+
+
+__all__ = ('now', 'timed_io', 'timed_nvim', 'critical_path', 'total_duration',)
@@ -0,0 +1,82 @@
+'''detection of venvs whose interpreter was upgraded or removed since the plugin was installed.
+The install manifest records the resolved interpreter of each venv and its ABI. If the interpreter doesn't exist
+anymore, or the venv's `bin/python` now resolves to an interpreter with a different ABI, the installed packages are
+unusable and the venv is rebuilt from scratch instead of being repaired.
+'''
+import os
+
+from amino import Path, IO, do, Do, List, Maybe
+from amino.logging import module_log
+
+from ribosome.process import Subprocess, SubprocessResult
+
+from chromatin.model.manifest import ManifestEntry
+from chromatin.model.interpreter import InterpreterIndex
+from chromatin.model.rplugin import Rplugin
+from chromatin.model.venv import VenvOptions
+from chromatin.manifest import read_manifest
+from chromatin.util.interpreter import interpreter_index
+from chromatin.rplugin import bootstrap_venv
+from chromatin.schedule import scheduled, scheduled_subprocess, background
+
+log = module_log()
+
+
+def interpreter_changed(dir: Path, entry: ManifestEntry, index: InterpreterIndex) -> bool:
+    '''compare the venv's interpreter with the recorded one, using only `stat` and the interpreter index.
+    '''
+    recorded = str(entry.interpreter)
+    current = os.path.realpath(str(dir / 'bin' / 'python'))
+    if not (os.path.exists(recorded) and os.path.exists(current)):
+        return True
+    current_abi = index.abi(Path(current))
+    return entry.abi != current_abi if entry.abi.present and current_abi.present else current != recorded
+
+
+@do(IO[List[str]])
+def outdated_venvs(venv_dir: Path, names: List[str]) -> Do:
+    '''select the venvs in `names` whose interpreter changed, in one pass over the install manifest.
+    '''
+    manifest = yield read_manifest(venv_dir)
+    index = yield interpreter_index()
+    def changed(name: str) -> bool:
+        return manifest.entry(name).exists(lambda a: interpreter_changed(venv_dir / name, a, index))
+    outdated = names.filter(changed)
+    if outdated:
+        log.debug(f'interpreter changed for venvs: {outdated.join_comma}')
+    return outdated
+
+
+def install_finished(name: str, result: SubprocessResult[str]) -> bool:
+    if not result.success:
+        log.error(f'reinstalling `{name}` failed: {result.stderr.join_lines}')
+    return bool(result.success)
+
+
+def rebuild_failed(name: str, error: Exception) -> bool:
+    log.error(f'rebuilding the venv of `{name}` failed: {error}')
+    return False
+
+
+def rebuild_venv(global_interpreter: Maybe[str], base_dir: Path, rplugin: Rplugin, options: VenvOptions) -> IO[bool]:
+    '''recreate the venv, returning whether it succeeded.
+    Waits behind interactive installs for a slot in the job scheduler.
+    '''
+    return (
+        scheduled('venv', background, bootstrap_venv(global_interpreter, base_dir, rplugin, options))
+        .map(lambda a: True)
+        .recover(lambda e: rebuild_failed(rplugin.name, e))
+    )
+
+
+def reinstall_venv(rplugin: Rplugin, install: Subprocess[str]) -> IO[bool]:
+    '''install the plugin into its rebuilt venv, returning whether it succeeded.
+    '''
+    return (
+        scheduled_subprocess('pip', background, install)
+        .map(lambda a: install_finished(rplugin.name, a))
+        .recover(lambda e: rebuild_failed(rplugin.name, e))
+    )
+
+
+__all__ = ('outdated_venvs', 'rebuild_venv', 'reinstall_venv',)
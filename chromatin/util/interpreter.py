@@ -1,37 +1,212 @@
+'''discovery of python interpreters and build tools.
+All pythons on `PATH` are probed for their version and ABI once and recorded in an index that is cached in
+`$XDG_CACHE_HOME/chromatin/interpreters.json` and kept in memory for the session. The index is rebuilt when `PATH` or
+the modification time of one of its directories changes, which happens when executables are added or removed.
+Entries of `PATH` that belong to the virtualenv chromatin runs in are ignored, since creating a venv from within
+another doesn't work correctly.
+'''
+import os
+import re
 import shutil
+import threading
+import subprocess
+from typing import Callable, Match
 
-from amino import do, Path, Do, Lists, env, Maybe, Nothing, IO, List
+from amino import do, Path, Do, Lists, env, Maybe, Nothing, IO, List, Map, Either, Left, Right, Try
+from amino.json import dump_json, decode_json
+from amino.logging import module_log
 
 from ribosome.nvim.io.compute import NvimIO
 from ribosome.nvim.io.api import N
 
 from chromatin.settings import interpreter
+from chromatin.model.interpreter import Interpreter, InterpreterIndex
+from chromatin.util.resources import xdg_cache_home
+
+log = module_log()
+python_rex = re.compile(r'^python(3(\.\d+)?)?$')
+spec_rex = re.compile(r'^(?P<op>>=|<=|==|>|<)?\s*(?P<version>\d+(\.\d+){0,2})$')
+probe_script = '''import sys, sysconfig
+print('.'.join(map(str, sys.version_info[:3])), sysconfig.get_config_var('SOABI') or sys.implementation.cache_tag)'''
+tool_names = List('cabal', 'stack')
+default_name = 'python3'
+session_lock = threading.Lock()
+session_index = dict()
+version_ops = dict(
+    [
+        ('==', lambda a, b: a == b),
+        ('>=', lambda a, b: a >= b),
+        ('<=', lambda a, b: a <= b),
+        ('>', lambda a, b: a > b),
+        ('<', lambda a, b: a < b),
+    ]
+)
+
+
+def index_file() -> Path:
+    cache = xdg_cache_home.value / Path | (Path.home() / '.cache')
+    return cache / 'chromatin' / 'interpreters.json'
+
+
+def path_dirs(path: str) -> List[str]:
+    venv = env.get('VIRTUAL_ENV').get_or_strict('[no venv]')
+    return Lists.split(path, ':').filter(lambda a: a and not a.startswith(venv)).distinct
 
 
-@do(IO[Path])
-def virtualenv_interpreter(venv: str, executable: str) -> Do:
-    path_s = yield IO.from_either(env.get('PATH'))
-    path = Lists.split(path_s, ':')
-    clean_path = path.filter_not(lambda a: a.startswith(venv))
-    candidate = yield IO.delay(shutil.which, executable, path=clean_path.mk_string(':'))
-    return Path(candidate)
+def dir_stamps(dirs: List[str]) -> Map[str, float]:
+    return Map(dirs.flat_map(lambda a: Lists.wrap(Try(os.stat, a).to_maybe.map(lambda s: (a, s.st_mtime)).to_list)))
 
 
-@do(IO[Path])
-def find_interpreter(spec: str) -> Do:
-    path = Path(spec)
-    exists = yield IO.delay(path.exists)
-    venv = env.get('VIRTUAL_ENV').get_or_strict('[no venv]')
-    yield (
-        IO.pure(path)
-        if exists else
-        virtualenv_interpreter(venv, spec)
+def python_candidates(dirs: List[str]) -> List[Path]:
+    def dir_candidates(dir: str) -> List[Path]:
+        names = Lists.wrap(sorted(Try(os.listdir, dir).get_or_strict([])))
+        paths = names.filter(python_rex.match).map(lambda a: Path(dir) / a)
+        return paths.filter(lambda a: a.is_file() and os.access(str(a), os.X_OK))
+    return dirs.flat_map(dir_candidates)
+
+
+def parse_probe(output: str) -> Maybe[Interpreter]:
+    parts = output.split()
+    return (
+        Try(lambda: Lists.split(parts[0], '.').map(int)).to_maybe.map(lambda a: (a, parts[1]))
+        if len(parts) == 2 else
+        Nothing
     )
 
 
-def python_interpreter(global_spec: Maybe[str], local_spec: Maybe[str]) -> IO[Path]:
-    spec = local_spec.get_or(global_spec.get_or_strict, 'python3.7')
-    return find_interpreter(spec)
+def probe(path: Path, real: str) -> Maybe[Interpreter]:
+    try:
+        result = subprocess.run([str(path), '-E', '-c', probe_script], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, timeout=10, universal_newlines=True)
+    except (OSError, subprocess.SubprocessError) as e:
+        log.debug(f'probing interpreter `{path}` failed: {e}')
+        return Nothing
+    return (
+        parse_probe(result.stdout).map(lambda a: Interpreter(path, Path(real), *a))
+        if result.returncode == 0 else
+        Nothing
+    )
+
+
+def probe_all(paths: List[Path]) -> List[Interpreter]:
+    '''probe each executable once, reusing the result for the other links to it.
+    '''
+    probed = dict()
+    def run(path: Path) -> Maybe[Interpreter]:
+        real = os.path.realpath(str(path))
+        if real not in probed:
+            probed[real] = probe(path, real)
+        return probed[real].map(lambda a: a.copy(path=path))
+    return paths.flat_map(lambda a: Lists.wrap(run(a).to_list))
+
+
+def find_tools(path: str) -> Map[str, Path]:
+    found = tool_names.flat_map(lambda a: Lists.wrap(Maybe.optional(shutil.which(a, path=path)).to_list).map(
+        lambda exe: (a, Path(exe))))
+    return Map(found)
+
+
+def build_index(path: str) -> InterpreterIndex:
+    dirs = path_dirs(path)
+    clean_path = dirs.mk_string(':')
+    interpreters = probe_all(python_candidates(dirs))
+    log.debug(f'found interpreters: {interpreters.map(lambda a: a.path).join_comma}')
+    return InterpreterIndex(path, dir_stamps(dirs), interpreters, find_tools(clean_path))
+
+
+def index_valid(index: InterpreterIndex, path: str) -> bool:
+    return index.path == path and dir_stamps(path_dirs(path)) == index.stamps
+
+
+def read_index_file(file: Path) -> Maybe[InterpreterIndex]:
+    return (
+        Try(file.read_text)
+        .flat_map(decode_json)
+        .flat_map(lambda a: Right(a) if isinstance(a, InterpreterIndex) else Left(f'invalid index: {a}'))
+        .to_maybe
+    )
+
+
+def write_index_file(file: Path, index: InterpreterIndex) -> None:
+    tmp = file.with_suffix('.tmp')
+    def write(json: str) -> None:
+        file.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json)
+        os.replace(str(tmp), str(file))
+    dump_json(index).flat_map(lambda a: Try(write, a)).lmap(lambda e: log.debug(f'writing interpreter index: {e}'))
+
+
+def load_index(file: Path, path: str) -> InterpreterIndex:
+    with session_lock:
+        cached = Maybe.optional(session_index.get(str(file))).or_else_call(read_index_file, file)
+        index = cached.filter(lambda a: index_valid(a, path)).get_or(build_index, path)
+        if not cached.contains(index):
+            write_index_file(file, index)
+        session_index[str(file)] = index
+        return index
+
+
+def interpreter_index(file: Path=None) -> IO[InterpreterIndex]:
+    return IO.delay(load_index, file or index_file(), env.get('PATH').get_or_strict(''))
+
+
+def interpreter_abi(index: InterpreterIndex, realpath: Path) -> Maybe[str]:
+    '''look up the ABI of an interpreter in the index, probing it if it isn't on `PATH`.
+    '''
+    return index.abi(realpath).or_else_call(lambda: probe(realpath, str(realpath)).map(lambda a: a.abi))
+
+
+def version_spec(spec: str) -> Maybe[Callable[[Interpreter], bool]]:
+    '''parse specs like `3.11` or `>=3.10`, which compare only as many version components as are given.
+    '''
+    def cons(match: Match) -> Callable[[Interpreter], bool]:
+        wanted = Lists.split(match.group('version'), '.').map(int)
+        op = version_ops[match.group('op') or '==']
+        return lambda a: op(list(a.version[:wanted.length]), list(wanted))
+    return Maybe.optional(spec_rex.match(spec.strip())).map(cons)
+
+
+def newest(interpreters: List[Interpreter]) -> Maybe[Interpreter]:
+    '''the interpreter with the highest version that comes first on `PATH`.
+    '''
+    return interpreters.sort_by(lambda a: list(a.version), reverse=True).head
+
+
+def named_interpreter(index: InterpreterIndex, name: str) -> Maybe[Interpreter]:
+    return index.interpreters.find(lambda a: a.path.name == name)
+
+
+def resolve_interpreter(index: InterpreterIndex, spec: Maybe[str]) -> Either[str, Path]:
+    '''resolve an interpreter spec, which may be a version spec, a path or an executable name.
+    Without a spec, `python3` or the newest python 3 is used.
+    '''
+    def by_version(spec: str, matches: Callable[[Interpreter], bool]) -> Either[str, Path]:
+        return newest(index.interpreters.filter(matches)).map(lambda a: a.path).to_either(
+            f'no interpreter on PATH matches `{spec}`')
+    def by_name(spec: str) -> Either[str, Path]:
+        path = Path(spec).expanduser()
+        return (
+            Right(path)
+            if os.sep in spec or path.exists() else
+            named_interpreter(index, spec).map(lambda a: a.path).to_either(f'no interpreter `{spec}` on PATH')
+        )
+    def resolve(spec: str) -> Either[str, Path]:
+        return version_spec(spec).map(lambda a: by_version(spec, a)).get_or(by_name, spec)
+    def default() -> Either[str, Path]:
+        python3 = index.interpreters.filter(lambda a: a.version.head.contains(3))
+        return (
+            named_interpreter(index, default_name)
+            .or_else_call(newest, python3)
+            .map(lambda a: a.path)
+            .to_either('no python 3 interpreter on PATH')
+        )
+    return spec.map(resolve).get_or(default)
+
+
+@do(IO[Path])
+def python_interpreter(global_spec: Maybe[str], local_spec: Maybe[str]) -> Do:
+    index = yield interpreter_index()
+    yield IO.from_either(resolve_interpreter(index, local_spec.or_else(global_spec)))
 
 
 @do(NvimIO[Path])
@@ -45,17 +220,18 @@ def join_pythonpath(paths: List[str]) -> str:
 
 
 @do(IO[Path])
-def which(name: str) -> Do:
-    exe = yield IO.delay(shutil.which, name)
-    return Path(exe)
+def tool_exe(name: str) -> Do:
+    index = yield interpreter_index()
+    yield IO.from_maybe(index.tool(name), f'`{name}` not found on PATH')
 
 
 def cabal_exe() -> IO[Path]:
-    return which('cabal')
+    return tool_exe('cabal')
 
 
 def stack_exe() -> IO[Path]:
-    return which('stack')
+    return tool_exe('stack')
 
 
-__all__ = ('global_interpreter', 'join_pythonpath', 'stack_exe', 'cabal_exe',)
+__all__ = ('global_interpreter', 'join_pythonpath', 'stack_exe', 'cabal_exe', 'python_interpreter',
+           'interpreter_index', 'resolve_interpreter', 'interpreter_abi',)
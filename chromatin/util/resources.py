@@ -1,8 +1,13 @@
-from amino import Path, List, _
+from amino import Path, List, _, Maybe
 from amino.options import EnvOption
 from amino.util.string import plural_s
 
 from chromatin.model.rplugin import Rplugin
+from chromatin.model.timing import Timing
+from chromatin.model.store import StoreStats
+from chromatin.model.garbage import VenvUsage
+from chromatin.model.outdated import PackageVersion
+from chromatin.timing import critical_path, total_duration
 
 xdg_cache_home = EnvOption('XDG_CACHE_HOME')
 
@@ -52,6 +57,26 @@ def updated_plugins(names: List[str]) -> str:
     return handled_plugins('updated', names)
 
 
+def locked_plugins(names: List[str]) -> str:
+    return handled_plugins('locked', names) if names else 'no plugins were locked'
+
+
+def pinned_plugins(names: List[str]) -> str:
+    msg = handled_plugins('skipped locked', names)
+    return f'{msg}; use `CrmUpdate --relock` to update them'
+
+
+plugins_up_to_date = 'all plugins are up to date'
+
+
+def outdated_plugins(versions: List[PackageVersion]) -> str:
+    def line(version: PackageVersion) -> str:
+        installed = version.installed.get_or_strict('?')
+        latest = version.latest.get_or_strict('?')
+        return f'{version.plugin}: {version.project} {installed} -> {latest}'
+    return versions.map(line).cons('outdated plugins:').join_lines if versions else plugins_up_to_date
+
+
 def updated_plugin(name: str) -> str:
     return updated_plugins(List(name))
 
@@ -66,7 +91,86 @@ def show_plugins(venv_dir: Path, plugins: List[Rplugin]) -> str:
     return plugins_desc.cons(venv_dir_msg).join_lines
 
 
+def rebuilt_plugin(name: str) -> str:
+    return f'rebuilt `{name}` for the new interpreter'
+
+
+def rebuild_failed(name: str) -> str:
+    return f'failed to rebuild `{name}` for the new interpreter'
+
+
+def lazy_command_undefined(name: str, command: str) -> str:
+    return f'`{name}` did not define the command `{command}` after activation'
+
+
+def format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ('B', 'KiB', 'MiB'):
+        if value < 1024:
+            return f'{value:.1f} {unit}'
+        value /= 1024
+    return f'{value:.1f} GiB'
+
+
+def show_store_stats(stats: StoreStats) -> str:
+    return List(
+        'Package store:',
+        f'objects: {stats.objects} ({format_bytes(stats.size)})',
+        f'linked files: {stats.links}',
+        f'saved: {format_bytes(stats.saved)}',
+        f'unreferenced objects: {stats.orphans}',
+    ).join_lines
+
+
+def show_venv_usage(usage: VenvUsage) -> str:
+    orphan = '' if usage.referenced else ' (orphaned)'
+    return f'{usage.name}: {format_bytes(usage.size)}{orphan}'
+
+
+def show_gc(usage: List[VenvUsage], force: bool) -> str:
+    orphans = usage.filter_not(lambda a: a.referenced)
+    total = sum(usage.map(lambda a: a.size))
+    removed = sum(orphans.map(lambda a: a.size))
+    orphan_count = f'{orphans.length} orphaned venv{plural_s(orphans)} ({format_bytes(removed)})'
+    summary = List(
+        f'total: {format_bytes(total)}',
+        f'removing {orphan_count}' if force or orphans.empty else f'{orphan_count}, run `CrmGc --force` to remove them',
+    )
+    return (usage.map(show_venv_usage).cons('Venv disk usage:') + summary).join_lines
+
+
+def duration_ms(timing: Timing) -> str:
+    return f'{timing.duration * 1000:.1f}ms'
+
+
+def show_phase(phase: Timing, critical: Maybe[Timing]) -> str:
+    critical_msg = critical.map(lambda a: f' (critical: {a.rplugin.get_or_strict("")} {duration_ms(a)})')
+    return f'{phase.phase}: {duration_ms(phase)}{critical_msg.get_or_strict("")}'
+
+
+def show_rplugin_timings(name: str, timings: List[Timing]) -> str:
+    phases = timings.sort_by(lambda a: a.start).map(lambda a: f'{a.phase} {duration_ms(a)}')
+    return f'{name}: {phases.join_comma}'
+
+
+def show_timings(timings: List[Timing]) -> str:
+    if timings.empty:
+        return 'no timings recorded'
+    phases = critical_path(timings).map(lambda a: show_phase(*a))
+    total = f'total: {total_duration(timings) * 1000:.1f}ms'
+    per_rplugin = (
+        timings
+        .filter(lambda a: a.rplugin.present)
+        .group_by(lambda a: a.rplugin.get_or_strict(''))
+        .to_list
+        .sort_by(lambda a: a[0])
+        .map(lambda a: show_rplugin_timings(*a))
+    )
+    return (phases.cons('Startup timings:') + List(total) + per_rplugin).join_lines
+
+
 __all__ = ('xdg_cache_home', 'create_venv_dir_error', 'installed_plugin', 'updated_plugin',
            'no_plugins_match_for_activation', 'no_plugins_match_for_deactivation', 'plugins_install_failed',
            'installed_plugins', 'updated_plugins', 'already_active', 'show_plugins_message', 'installing_plugins',
-           'installing_plugin',)
+           'installing_plugin', 'show_timings', 'lazy_command_undefined', 'show_store_stats',
+           'show_gc', 'rebuilt_plugin', 'rebuild_failed',)
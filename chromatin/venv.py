@@ -1,6 +1,7 @@
-import pkg_resources
+import os
 
-from amino import Path, IO, do, Boolean, Maybe, Lists, Either
+from amino import Path, IO, do, Boolean, Maybe, Lists, Either, List, Nil, Try, Nothing, Right, Left
+from amino.json import dump_json, decode_json
 from amino.boolean import false
 from amino.do import Do
 from amino.logging import module_log
@@ -10,25 +11,95 @@ from ribosome.nvim.io.compute import NvimIO
 
 from chromatin.util.interpreter import python_interpreter
 from chromatin.model.venv import (Venv, VenvMeta, VenvPackageExistent, VenvPackageAbsent, VenvPackageStatus, VenvStatus,
-                                  VenvPresent, VenvAbsent)
+                                  VenvPresent, VenvAbsent, VenvDamaged, VenvMetadata)
 from chromatin.model.rplugin import Rplugin
 from chromatin.settings import venv_dir
 
 log = module_log()
+layer_pth = 'chromatin_base.pth'
+metadata_name = 'chromatin.json'
+
+
+def venv_config(dir: Path) -> Maybe[dict]:
+    def parse(text: str) -> dict:
+        pairs = Lists.lines(text).map(lambda a: a.partition('=')).filter(lambda a: a[1])
+        return dict(pairs.map(lambda a: (a[0].strip(), a[2].strip())))
+    return Try((dir / 'pyvenv.cfg').read_text).map(parse).to_maybe
+
+
+def metadata_path(venv: Venv) -> Path:
+    return venv.meta.dir / metadata_name
+
+
+def probe_site(dir: Path) -> Either[str, Path]:
+    lib_dir = dir / 'lib'
+    libs = Lists.wrap(sorted(lib_dir.glob('python3.*')))
+    return libs.head.map(lambda a: a / 'site-packages').to_either(f'no python dirs in {lib_dir}')
+
+
+def probe_metadata(venv: Venv) -> Either[str, VenvMetadata]:
+    '''determine the venv's layout from the file system, for venvs that were created before the metadata was
+    introduced.
+    '''
+    python_version = venv_config(venv.meta.dir).flat_map(lambda a: Maybe.optional(a.get('version')))
+    return probe_site(venv.meta.dir).map(
+        lambda site: VenvMetadata(site, python_version, site / venv.name / '__init__.py', Nothing))
+
+
+def read_metadata(venv: Venv) -> Either[str, VenvMetadata]:
+    return (
+        Try(metadata_path(venv).read_text)
+        .flat_map(decode_json)
+        .flat_map(lambda a: Right(a) if isinstance(a, VenvMetadata) else Left(f'invalid venv metadata: {a}'))
+        .lmap(str)
+    )
+
+
+def load_metadata(venv: Venv) -> Either[str, VenvMetadata]:
+    return read_metadata(venv).cata(lambda err: probe_metadata(venv), Right)
+
+
+def venv_metadata(venv: Venv) -> IO[Either[str, VenvMetadata]]:
+    '''read the venv's metadata file, falling back to probing the file system if it doesn't exist.
+    '''
+    return IO.delay(load_metadata, venv)
+
+
+@do(IO[None])
+def write_venv_metadata(venv: Venv, metadata: VenvMetadata) -> Do:
+    path = metadata_path(venv)
+    tmp = path.with_suffix('.tmp')
+    json = yield IO.from_either(dump_json(metadata))
+    yield IO.delay(tmp.write_text, json)
+    yield IO.delay(os.replace, str(tmp), str(path))
+
+
+@do(IO[None])
+def record_venv_layout(venv: Venv) -> Do:
+    '''write the metadata of a newly created venv, before the plugin is installed.
+    '''
+    metadata = yield IO.delay(probe_metadata, venv)
+    yield metadata.cata(lambda err: IO.failed(f'recording the layout of `{venv.name}`: {err}'),
+                        lambda a: write_venv_metadata(venv, a))
 
 
 @do(IO[Either[str, Path]])
 def venv_site(venv: Venv) -> Do:
-    lib_dir = venv.meta.dir / 'lib'
-    libs = yield IO.delay(lib_dir.glob, 'python3.?')
-    lib = Lists.wrap(libs).head.to_either(f'no python dirs in {lib_dir}')
-    return lib.map(lambda a: a / 'site-packages')
+    metadata = yield venv_metadata(venv)
+    return metadata.map(lambda a: a.site)
+
+
+def site_layers(site: Path) -> List[Path]:
+    '''the base layers that are linked into a venv's site dir, which have to be searched for distributions as well.
+    '''
+    lines = Try((site / layer_pth).read_text).map(Lists.lines).get_or_strict(Nil)
+    return lines.map(lambda a: a.strip()).filter(lambda a: a and not a.startswith('#')).map(Path)
 
 
 @do(IO[Either[str, Path]])
 def venv_plugin_path(venv: Venv) -> Do:
-    site = yield venv_site(venv)
-    return site.map(lambda a: a / venv.name / '__init__.py')
+    metadata = yield venv_metadata(venv)
+    return metadata.map(lambda a: a.plugin_path)
 
 
 def cons_venv(dir: Path, name: str) -> Venv:
@@ -43,18 +114,37 @@ def cons_venv_under(base_dir: Path, name: str) -> Venv:
 
 @do(IO[VenvPackageStatus])
 def venv_package_status_site(venv: Venv, site: Path, req_spec: str) -> Do:
-    ws = yield IO.delay(pkg_resources.WorkingSet, [site])
+    import pkg_resources
+    layers = yield IO.delay(site_layers, site)
+    ws = yield IO.delay(pkg_resources.WorkingSet, layers.map(str).cons(str(site)))
     req = yield IO.delay(pkg_resources.Requirement, req_spec)
     return Maybe.check(ws.by_key.get(req.key)).cata_strict(
-        lambda a: VenvPackageExistent(venv, a),
+        lambda a: VenvPackageExistent(venv, a.version),
         VenvPackageAbsent(venv),
     )
 
 
+def recorded_package(venv: Venv, req: str, metadata: VenvMetadata) -> Maybe[VenvPackageStatus]:
+    '''use the version that was recorded when the plugin was installed, as long as its module exists.
+    '''
+    return (
+        metadata.version.map(lambda a: VenvPackageExistent(venv, a))
+        if req == venv.name and metadata.plugin_path.exists() else
+        Nothing
+    )
+
+
 @do(IO[VenvPackageStatus])
 def venv_package_status(venv: Venv, req: str) -> Do:
-    site_e = yield venv_site(venv)
-    yield site_e.cata(lambda a: IO.pure(VenvPackageAbsent(venv)), lambda a: venv_package_status_site(venv, a, req))
+    metadata_e = yield venv_metadata(venv)
+    recorded = yield IO.delay(lambda: metadata_e.to_maybe.flat_map(lambda a: recorded_package(venv, req, a)))
+    yield recorded.cata_strict(
+        IO.pure,
+        metadata_e.cata(
+            lambda a: IO.pure(VenvPackageAbsent(venv)),
+            lambda a: venv_package_status_site(venv, a.site, req),
+        ),
+    )
 
 
 @do(IO[Boolean])
@@ -71,6 +161,9 @@ class venv_status_check(Case[VenvStatus, IO[Boolean]], alg=VenvStatus):
     def venv_absent(self, status: VenvAbsent) -> IO[Boolean]:
         return IO.pure(false)
 
+    def venv_damaged(self, status: VenvDamaged) -> IO[Boolean]:
+        return IO.pure(false)
+
 
 @do(NvimIO[Venv])
 def venv_from_rplugin(rplugin: Rplugin) -> Do:
@@ -78,5 +171,6 @@ def venv_from_rplugin(rplugin: Rplugin) -> Do:
     return cons_venv_under(dir, rplugin.name)
 
 
-__all__ = ('venv_site', 'venv_plugin_path', 'cons_venv', 'cons_venv_under', 'venv_package_status_site',
-           'venv_package_status', 'venv_package_installed', 'venv_status_check', 'venv_from_rplugin',)
+__all__ = ('venv_site', 'venv_config', 'venv_metadata', 'write_venv_metadata', 'record_venv_layout', 'site_layers',
+           'venv_plugin_path', 'cons_venv', 'cons_venv_under', 'venv_package_status_site', 'venv_package_status',
+           'venv_package_installed', 'venv_status_check', 'venv_from_rplugin',)
@@ -0,0 +1,42 @@
+'''pip driver for installing rplugins through chromatin's wheelhouse.
+This file is executed directly by the interpreter of a plugin venv, which doesn't have chromatin installed, so it may
+only use the standard library.
+
+Usage: `python wheel_install.py <wheelhouse> install|update|prebuilt <requirement args>`
+
+`install` first tries to install from the wheelhouse alone, which succeeds without network access if all
+distributions have been built before, e.g. when a venv is rebuilt after an interpreter upgrade.
+Otherwise, and always for `update`, the requirements are built into the wheelhouse with `pip wheel`, which reuses
+the wheels that are already there, and installed from it. If that fails, pip is run against the index directly.
+`prebuilt` is used after chromatin has built the wheels of several plugins in one pass, and installs from the
+wheelhouse alone unless distributions are missing.
+'''
+
+import os
+import sys
+import subprocess
+
+
+def pip(*args: str, quiet: bool=False) -> int:
+    stderr = subprocess.DEVNULL if quiet else None
+    return subprocess.call([sys.executable, '-m', 'pip', '--disable-pip-version-check'] + list(args), stderr=stderr)
+
+
+def install_local(links: list, reqs: list, quiet: bool) -> int:
+    return pip('install', '-U', '--no-index', '--no-compile', *links, *reqs, quiet=quiet)
+
+
+def main(wheelhouse: str, mode: str, reqs: list) -> int:
+    os.makedirs(wheelhouse, exist_ok=True)
+    links = ['--find-links', wheelhouse]
+    if mode == 'prebuilt' and install_local(links, reqs, False) == 0:
+        return 0
+    if mode == 'install' and install_local(links, reqs, True) == 0:
+        return 0
+    if pip('wheel', '--wheel-dir', wheelhouse, *links, *reqs) == 0 and install_local(links, reqs, False) == 0:
+        return 0
+    return pip('install', '-U', '--no-cache-dir', '--no-compile', *links, *reqs)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1], sys.argv[2], sys.argv[3:]))
@@ -0,0 +1,143 @@
+'''wheelhouse for plugin installs, replacing pip's `--no-cache`.
+Wheels are kept in `<venv_dir>/.wheels/<abi>`, one directory per interpreter ABI, which is filled by `pip wheel` and
+passed to pip with `--find-links`, see `chromatin/wheel_install.py`.
+After an installation, the wheels of the distributions in the plugin's venv are touched, and the least recently used
+wheels are removed until each directory is below `g:chromatin_wheelhouse_size`.
+When several plugins are installed at once, the union of their requirements is built in one pass in a `pip` slot of
+the job scheduler before the venvs are installed from the wheelhouse with `--no-index`.
+'''
+import os
+import re
+
+from amino import Path, IO, do, Do, List, Lists, Maybe
+from amino.logging import module_log
+
+from ribosome.process import Subprocess
+
+from chromatin.venv import cons_venv_under, venv_site
+from chromatin.util.interpreter import interpreter_index, interpreter_abi
+from chromatin.schedule import scheduled_subprocess, interactive
+
+log = module_log()
+wheelhouse_name = '.wheels'
+install_script = Path(__file__).parent / 'wheel_install.py'
+default_abi = 'any'
+dist_info_rex = re.compile(r'^(?P<name>[^-]+)-(?P<version>[^-]+)\.dist-info$')
+
+
+def wheelhouse_base(venv_dir: Path) -> Path:
+    return venv_dir / wheelhouse_name
+
+
+def wheelhouse_dir(venv_dir: Path, abi: Maybe[str]) -> Path:
+    return wheelhouse_base(venv_dir) / abi.get_or_strict(default_abi)
+
+
+@do(IO[Path])
+def venv_wheelhouse(venv_dir: Path, python: Path) -> Do:
+    '''the wheelhouse for the ABI of the interpreter that `python` links to.
+    '''
+    index = yield interpreter_index()
+    return wheelhouse_dir(venv_dir, interpreter_abi(index, Path(os.path.realpath(str(python)))))
+
+
+def install_args(wheelhouse: Path, mode: str, reqs: List[str]) -> List[str]:
+    return List(str(install_script), str(wheelhouse), mode) + reqs
+
+
+def wheel_subprocess(python: Path, wheelhouse: Path, reqs: List[str]) -> Subprocess[Path]:
+    args = List('-m', 'pip', 'wheel', '--disable-pip-version-check', '--wheel-dir', str(wheelhouse), '--find-links',
+                str(wheelhouse)) + reqs
+    return Subprocess(python, args, wheelhouse, timeout=600, env=None)
+
+
+@do(IO[bool])
+def build_wheels(python: Path, wheelhouse: Path, reqs: List[str], priority: int=interactive) -> Do:
+    '''build wheels for all of `reqs` in a single resolution in a `pip` slot, returning whether it succeeded.
+    Conflicting requirements of different plugins make this fail, in which case each plugin is resolved separately.
+    '''
+    if reqs.empty:
+        return False
+    yield IO.delay(wheelhouse.mkdir, parents=True, exist_ok=True)
+    result = yield scheduled_subprocess('pip', priority, wheel_subprocess(python, wheelhouse, reqs))
+    if not result.success:
+        log.debug(f'building wheels in {wheelhouse} failed: {result.stderr.join_lines}')
+    return bool(result.success)
+
+
+def normalize(name: str) -> str:
+    return re.sub(r'[-_.]+', '_', name).lower()
+
+
+def wheel_prefixes(site: Path) -> List[str]:
+    matches = Lists.wrap(os.listdir(str(site))).flat_map(lambda a: Lists.wrap(Maybe.optional(dist_info_rex.match(a))))
+    return matches.map(lambda a: f'{normalize(a.group("name"))}-{a.group("version")}-')
+
+
+def wheel_used(name: str, prefixes: tuple) -> bool:
+    dist, sep, rest = name.partition('-')
+    return f'{normalize(dist)}-{rest}'.startswith(prefixes)
+
+
+def wheel_files(wheelhouse: Path, name: str, version: str) -> List[Path]:
+    prefixes = (f'{normalize(name)}-{version}-',)
+    names = sorted(os.listdir(str(wheelhouse))) if wheelhouse.is_dir() else []
+    wheels = Lists.wrap(names).filter(lambda a: a.endswith('.whl') and wheel_used(a, prefixes))
+    return wheels.map(lambda a: wheelhouse / a)
+
+
+def touch_wheels(wheelhouse: Path, site: Path) -> None:
+    '''mark the wheels of the distributions installed in `site` as used.
+    '''
+    prefixes = tuple(wheel_prefixes(site))
+    for entry in os.scandir(str(wheelhouse)):
+        if entry.name.endswith('.whl') and wheel_used(entry.name, prefixes):
+            os.utime(entry.path)
+
+
+def evict_wheels(wheelhouse: Path, max_size: int) -> List[str]:
+    '''remove the least recently used wheels until their total size is at most `max_size` bytes.
+    '''
+    entries = [a for a in os.scandir(str(wheelhouse)) if a.name.endswith('.whl')]
+    wheels = sorted(((a.stat().st_mtime, a.stat().st_size, a.path) for a in entries), reverse=True)
+    total = sum(size for mtime, size, path in wheels)
+    removed = []
+    while total > max_size and wheels:
+        mtime, size, path = wheels.pop()
+        os.unlink(path)
+        total -= size
+        removed.append(os.path.basename(path))
+    return Lists.wrap(removed)
+
+
+def abi_dirs(venv_dir: Path) -> List[Path]:
+    base = wheelhouse_base(venv_dir)
+    return Lists.wrap(sorted(base.iterdir())).filter(lambda a: a.is_dir()) if base.is_dir() else List()
+
+
+@do(IO[None])
+def touch_venv_wheels(venv_dir: Path, name: str) -> Do:
+    venv = cons_venv_under(venv_dir, name)
+    site = yield venv_site(venv)
+    wheelhouse = yield venv_wheelhouse(venv_dir, venv.meta.python_executable)
+    if wheelhouse.is_dir():
+        yield site.cata(lambda a: IO.pure(None), lambda a: IO.delay(touch_wheels, wheelhouse, a))
+
+
+def evict_all(venv_dir: Path, max_size: int) -> None:
+    for dir in abi_dirs(venv_dir):
+        removed = evict_wheels(dir, max_size)
+        if removed:
+            log.debug(f'evicted wheels from {dir}: {removed.join_comma}')
+
+
+@do(IO[None])
+def retain_wheels(venv_dir: Path, names: List[str], max_size: int) -> Do:
+    '''update the usage of the wheels installed into the venvs in `names`, then evict the least recently used ones.
+    '''
+    yield names.traverse(lambda a: touch_venv_wheels(venv_dir, a), IO)
+    yield IO.delay(evict_all, venv_dir, max_size)
+
+
+__all__ = ('wheelhouse_base', 'wheelhouse_dir', 'venv_wheelhouse', 'install_args', 'build_wheels', 'wheel_subprocess',
+           'wheel_files', 'evict_wheels', 'retain_wheels',)
@@ -0,0 +1,277 @@
+'''fork server for python rplugin hosts.
+This file is executed directly by the interpreters of the plugin venvs, which don't have chromatin installed, so it
+may only import from the standard library at module level.
+
+`connect` is run by neovim's `jobstart` in place of `ribosome_start_plugin`. It starts up without `site` and hands its
+stdio file descriptors to a zygote process, spawning the zygote first if none is listening for the current
+combination of neovim instance, interpreter and ribosome/amino versions.
+The zygote has amino, ribosome and msgpack imported and frozen, and forks a host for each request. The client stays
+alive until the host exits and forwards termination signals to it, so that `jobstop` and `jobpid` behave as with
+a regular host. The host sends its exit status to the client before it exits, which the client exits with.
+If the zygote cannot be reached, the client replaces itself with a regular `ribosome_start_plugin` process.
+'''
+
+import os
+import sys
+
+# the script's directory is chromatin's package directory, whose modules would shadow `logging` and `venv`
+sys.path[:] = [a for a in sys.path if os.path.abspath(a or '.') != os.path.dirname(os.path.abspath(__file__))]
+
+import json
+import array
+import signal
+import socket
+import hashlib
+import tempfile
+
+preload_modules = ['importlib.util', 'msgpack', 'amino', 'ribosome', 'ribosome.host', 'ribosome.rpc.start',
+                   'ribosome.rpc.io.start']
+shared_dists = ['ribosome', 'amino']
+# `.pth` file that adds the shared base layer to a venv, see `chromatin.layer`
+layer_pth = 'chromatin_base.pth'
+# venv metadata written by chromatin, see `chromatin.venv`
+metadata_name = 'chromatin.json'
+connect_timeout = 5.
+fd_count = 3
+lock_fd = -1
+
+
+def venv_site(venv: str) -> str:
+    try:
+        with open(os.path.join(venv, metadata_name)) as f:
+            return json.load(f)['site']
+    except (OSError, ValueError, KeyError):
+        pass
+    lib = os.path.join(venv, 'lib')
+    pythons = sorted(a for a in os.listdir(lib) if a.startswith('python')) if os.path.isdir(lib) else []
+    return os.path.join(lib, pythons[0], 'site-packages') if pythons else ''
+
+
+def site_layers(site: str) -> list:
+    pth = os.path.join(site, layer_pth)
+    if not os.path.isfile(pth):
+        return []
+    with open(pth) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def dist_versions(site: str) -> list:
+    entries = [a for dir in [site] + site_layers(site) if os.path.isdir(dir) for a in os.listdir(dir)]
+    return sorted(a for a in entries for d in shared_dists if a.lower().startswith(f'{d}-') and a.endswith('-info'))
+
+
+def pycache_options() -> list:
+    '''forward the client's `-X pycache_prefix` to the zygote and fallback host.
+    '''
+    prefix = getattr(sys, 'pycache_prefix', None)
+    return ['-X', f'pycache_prefix={prefix}'] if prefix else []
+
+
+def socket_path(site: str, nvim_pid: int) -> str:
+    key = json.dumps([os.path.realpath(sys.executable), nvim_pid, dist_versions(site),
+                      getattr(sys, 'pycache_prefix', None)])
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f'chromatin-zygote-{os.getuid()}-{digest}.sock')
+
+
+def send_request(sock: socket.socket, request: dict) -> None:
+    fds = array.array('i', range(fd_count))
+    sock.sendmsg([json.dumps(request).encode() + b'\n'], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)])
+
+
+def receive_request(conn: socket.socket) -> tuple:
+    fds = array.array('i')
+    data, ancdata, flags, addr = conn.recvmsg(65536, socket.CMSG_LEN(fd_count * fds.itemsize))
+    for level, tpe, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and tpe == socket.SCM_RIGHTS:
+            fds.frombytes(cmsg_data[:len(cmsg_data) - (len(cmsg_data) % fds.itemsize)])
+    return json.loads(data.decode()), list(fds)
+
+
+def try_connect(path: str) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        return sock
+    except OSError:
+        sock.close()
+        return None
+
+
+def spawn_zygote(path: str, nvim_pid: int) -> None:
+    import subprocess
+    script = os.path.abspath(__file__)
+    devnull = subprocess.DEVNULL
+    subprocess.Popen([sys.executable, '-E'] + pycache_options() + [script, 'serve', path, str(nvim_pid)],
+                     stdin=devnull, stdout=devnull, stderr=devnull, start_new_session=True, close_fds=True)
+
+
+def connect_zygote(path: str, nvim_pid: int) -> socket.socket:
+    import time
+    sock = try_connect(path)
+    if sock is None:
+        spawn_zygote(path, nvim_pid)
+        start = time.monotonic()
+        while sock is None and time.monotonic() - start < connect_timeout:
+            time.sleep(.005)
+            sock = try_connect(path)
+    return sock
+
+
+def fallback(bin_path: str, plugin: str, pythonpath: list) -> None:
+    if pythonpath:
+        os.environ['RIBOSOME_PYTHONPATH'] = ':'.join(pythonpath)
+    python = os.path.join(bin_path, 'python')
+    os.execv(python, [python, '-E'] + pycache_options() + [os.path.join(bin_path, 'ribosome_start_plugin'), plugin])
+
+
+def await_host(sock: socket.socket) -> int:
+    '''wait for the host to exit and return its exit status, which it sends before exiting.
+    '''
+    reader = sock.makefile('r')
+    pid_data = reader.readline()
+    pid = int(pid_data) if pid_data.strip().isdigit() else None
+    def forward(signum: int, frame: object) -> None:
+        if pid is not None:
+            try:
+                os.kill(pid, signum)
+            except OSError:
+                pass
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, forward)
+    status = reader.read().strip()
+    return int(status) if pid is not None and status.isdigit() else 1
+
+
+def connect(bin_path: str, plugin: str, pythonpath: list) -> int:
+    nvim_pid = os.getppid()
+    site = venv_site(os.path.dirname(os.path.abspath(bin_path)))
+    path = socket_path(site, nvim_pid)
+    sock = connect_zygote(path, nvim_pid)
+    if sock is None:
+        return fallback(bin_path, plugin, pythonpath)
+    send_request(sock, dict(plugin=plugin, site=site, pythonpath=pythonpath))
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    return await_host(sock)
+
+
+def exit_host(conn: socket.socket, code: object) -> None:
+    status = code if isinstance(code, int) else 0 if code is None else 1
+    try:
+        conn.sendall(f'{status}\n'.encode())
+    except OSError:
+        pass
+    os._exit(status)
+
+
+def run_host(server: socket.socket, conn: socket.socket, request: dict, fds: list, zygote_sites: list) -> None:
+    '''runs in the forked child and never returns.
+    The venv's site dir is added with `site.addsitedir`, so that its `.pth` files are processed as in a regular host.
+    '''
+    code = 1
+    try:
+        server.close()
+        os.close(lock_fd)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        import site
+        inherited = [a for a in sys.path if a not in zygote_sites]
+        sys.path[:] = [a for a in request['pythonpath'] if a] + inherited
+        if request['site']:
+            site.addsitedir(request['site'])
+        conn.sendall(f'{os.getpid()}\n'.encode())
+        from ribosome.host import start_file
+        code = start_file(request['plugin'])
+    except SystemExit as e:
+        code = e.code
+    except BaseException:
+        code = 1
+    finally:
+        exit_host(conn, code)
+
+
+def handle(server: socket.socket, conn: socket.socket, zygote_sites: list) -> None:
+    request, fds = receive_request(conn)
+    pid = os.fork()
+    if pid == 0:
+        run_host(server, conn, request, fds, zygote_sites)
+    for fd in fds:
+        os.close(fd)
+    conn.close()
+
+
+def nvim_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def acquire_lock(path: str) -> bool:
+    import fcntl
+    global lock_fd
+    lock_fd = os.open(f'{path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def serve(path: str, nvim_pid: int) -> int:
+    if not acquire_lock(path):
+        return 0
+    import gc
+    import site
+    import importlib
+    zygote_sites = site.getsitepackages() + [site.getusersitepackages()]
+    for mod in preload_modules:
+        importlib.import_module(mod)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+    server.bind(path)
+    server.listen(16)
+    server.settimeout(5.)
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    try:
+        while nvim_alive(nvim_pid):
+            try:
+                conn, addr = server.accept()
+            except socket.timeout:
+                continue
+            conn.settimeout(None)
+            handle(server, conn, zygote_sites)
+    finally:
+        server.close()
+        for file in (path, f'{path}.lock'):
+            try:
+                os.unlink(file)
+            except OSError:
+                pass
+    return 0
+
+
+def main(args: list) -> int:
+    cmd = args[0] if args else ''
+    return (
+        serve(args[1], int(args[2]))
+        if cmd == 'serve' and len(args) == 3 else
+        connect(args[1], args[2], args[3:])
+        if cmd == 'connect' and len(args) >= 3 else
+        2
+    )
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -6,13 +6,14 @@ from amino import List, Nil, Nothing, Map, Maybe
 from chromatin.model.rplugin import Rplugin, ActiveRpluginMeta
 from chromatin.model.venv import VenvMeta
 from chromatin.env import Env
+from chromatin.model.timing import Timing
 
 
 class LogBufferEnv(Env):
 
     @staticmethod
     def cons() -> 'LogBufferEnv':
-        return LogBufferEnv(Nil, Nothing, Nothing, Nil, Nil, Nil, Nil, Map(), Nil, log_buffer=Nil)
+        return LogBufferEnv(Nil, Nothing, Nothing, Nil, Nil, Nil, Nil, Map(), Nil, Nil, Nil, log_buffer=Nil)
 
     def __init__(
             self,
@@ -25,6 +26,8 @@ class LogBufferEnv(Env):
             uninitialized: List[ActiveRpluginMeta],
             triggers: Map[str, List[ActiveRpcTrigger]],
             errors: List[str],
+            timings: List[Timing],
+            rebuilding: List[str],
             log_buffer: List[Echo]=Nil,
     ) -> None:
         self.rplugins = rplugins
@@ -37,6 +40,8 @@ class LogBufferEnv(Env):
         self.triggers = triggers
         self.log_buffer = log_buffer
         self.errors = errors
+        self.timings = timings
+        self.rebuilding = rebuilding
 
 
 __all__ = ('LogBufferEnv',)
@@ -0,0 +1,3 @@
+import sys
+import status
+sys.exit(status.value)
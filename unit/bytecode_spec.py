@@ -0,0 +1,36 @@
+import sys
+import shutil
+
+from kallikrein import k, Expectation
+
+from amino import Path, Just, Right, List
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.bytecode import compile_venvs, pycache_dir
+from chromatin.host import host_cmdline
+
+
+class BytecodeSpec(SpecBase):
+    '''
+    byte-compile the site dir of a venv $compile
+    pass the pycache prefix to the host $prefix
+    '''
+
+    def compile(self) -> Expectation:
+        dir = temp_dir('bytecode', 'compile')
+        shutil.rmtree(str(dir))
+        site = temp_dir('bytecode', 'compile', 'flagellum', 'lib', 'python3.7', 'site-packages', 'flagellum')
+        (site / '__init__.py').write_text('value = 1\n')
+        (temp_dir('bytecode', 'compile', 'flagellum', 'bin') / 'python').symlink_to(sys.executable)
+        result = compile_venvs(dir, List('flagellum'), Just(pycache_dir(dir))).attempt
+        return k((result, (site / '__pycache__').exists() or pycache_dir(dir).exists())) == (Right(None), True)
+
+    def prefix(self) -> Expectation:
+        dir = Path('/venvs')
+        cmdline = host_cmdline(dir / 'bin' / 'python', dir / 'bin', dir / 'plugin.py', False, List(), False,
+                               Just(pycache_dir(dir)))
+        return k(cmdline[:4]) == ['/venvs/bin/python', '-E', '-X', 'pycache_prefix=/venvs/.pycache']
+
+
+__all__ = ('BytecodeSpec',)
@@ -0,0 +1,97 @@
+import threading
+from typing import Any, Callable, List as TList
+
+import msgpack
+
+from kallikrein import k, Expectation
+from kallikrein.matchers import contain
+
+from amino import IO, List, Right, do, Do
+from amino.test.spec import SpecBase
+
+from ribosome.rpc.comm import RpcComm
+from ribosome.nvim.io.state import NS
+from ribosome.nvim.io.api import N
+from ribosome.data.plugin_state import PS
+from ribosome.test.unit import unit_test
+
+from chromatin.cli import host, host_mode
+from chromatin.components.core.trans.setup import signal_ready
+
+from test.base import single_venv_config, test_function_handler
+
+rplugin, venv, conf = single_venv_config('flagellum', 'flagellum')
+undefined_conf = conf.copy(function_handler=test_function_handler(exists=0))
+
+
+class SyncNvim:
+    '''answers the requests of a plugin started with `start_plugin_sync`, reading variables from `vars`.
+    '''
+
+    def __init__(self, vars: dict) -> None:
+        self.vars = vars
+        self.requests: TList[tuple] = []
+        self.on_message: Callable[[bytes], IO[None]] = None
+
+    def start(self, on_message: Callable[[bytes], IO[None]], on_error: Any) -> IO[None]:
+        self.on_message = on_message
+        return IO.pure(None)
+
+    def respond(self, id: int, error: Any, result: Any) -> None:
+        self.on_message(msgpack.packb([1, id, error, result], use_bin_type=True)).attempt
+
+    def response(self, method: str, args: list) -> tuple:
+        if method == 'nvim_get_var':
+            return (None, self.vars[args[0]]) if args[0] in self.vars else ([0, 'Key not found'], None)
+        if method == 'nvim_get_api_info':
+            return None, [1, {}]
+        if method == 'nvim_call_atomic':
+            return None, [[None] * len(args[0]), None]
+        return None, None
+
+    def send(self, data: bytes) -> None:
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(data)
+        for message in unpacker:
+            if message[0] == 0:
+                method, args = message[2], message[3]
+                self.requests.append((method, args))
+                threading.Thread(target=self.respond, args=(message[1], *self.response(method, args))).start()
+            else:
+                self.requests.append((message[1], message[2]))
+
+    @property
+    def comm(self) -> RpcComm:
+        return RpcComm(self.start, lambda: IO.pure(None), self.send, lambda: IO.pure(None), lambda: None)
+
+
+@do(NS[PS, Expectation])
+def ready_spec() -> Do:
+    yield NS.lift(signal_ready())
+    log = yield NS.lift(N.wrap_either(lambda a: Right(a.request_log)))
+    commands = log.filter(lambda a: a[0] == 'nvim_command').map(lambda a: a[1].head.get_or_strict(''))
+    return k(commands.filter(lambda a: 'ChromatinReady' in a)) == List()
+
+
+class CliSpec(SpecBase):
+    '''
+    run chromatin's host in the bootstrap process $sync_host
+    don't run the ready autocmd if it isn't defined $ready
+    select the bootstrap mode with `--host` $mode
+    '''
+
+    def sync_host(self) -> Expectation:
+        nvim = SyncNvim(dict(chromatin_run_internal_init=False))
+        result = host(nvim.comm)
+        return (k(result) == 0) & k(nvim.requests).must(contain(('nvim_set_var', ['chromatin_started', True])))
+
+    def ready(self) -> Expectation:
+        return unit_test(undefined_conf, ready_spec)
+
+    def mode(self) -> Expectation:
+        args = ['crm_run', '/venv/bin/python', '/venv/bin', '0']
+        selected = (host_mode(args), host_mode(args + ['--host']), host_mode(args + ['host']))
+        return k(selected) == (False, True, False)
+
+
+__all__ = ('CliSpec',)
@@ -0,0 +1,50 @@
+import shutil
+
+from kallikrein import k, Expectation
+
+from amino import Path, List, Just, Nothing
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.doctor import diagnose
+from chromatin.model.venv import BrokenInterpreter, MissingPip, StaleConfig
+
+
+def venv(base: str) -> Path:
+    dir = temp_dir('doctor', base)
+    shutil.rmtree(str(dir))
+    bin_path = temp_dir('doctor', base, 'bin')
+    site = temp_dir('doctor', base, 'lib', 'python3.7', 'site-packages')
+    (site / 'pip').mkdir()
+    (bin_path / 'pip').touch()
+    (bin_path / 'python').symlink_to('/usr/bin/python3')
+    (dir / 'pyvenv.cfg').write_text('home = /usr/bin\n')
+    return dir
+
+
+class DoctorSpec(SpecBase):
+    '''
+    classify an intact venv $intact
+    classify a venv with a removed interpreter and pip $damaged
+    don't diagnose a directory without `pyvenv.cfg` $absent
+    '''
+
+    def intact(self) -> Expectation:
+        return k(diagnose(venv('intact'))) == Just(List())
+
+    def damaged(self) -> Expectation:
+        dir = venv('damaged')
+        python = dir / 'bin' / 'python'
+        python.unlink()
+        python.symlink_to('/nonexistent/python3')
+        (dir / 'pyvenv.cfg').write_text('home = /nonexistent\n')
+        shutil.rmtree(str(dir / 'lib' / 'python3.7' / 'site-packages' / 'pip'))
+        return k(diagnose(dir)) == Just(List(BrokenInterpreter(python), StaleConfig('/nonexistent'), MissingPip()))
+
+    def absent(self) -> Expectation:
+        dir = venv('absent')
+        (dir / 'pyvenv.cfg').unlink()
+        return k(diagnose(dir)) == Nothing
+
+
+__all__ = ('DoctorSpec',)
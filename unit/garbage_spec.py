@@ -0,0 +1,74 @@
+import os
+import shutil
+
+from kallikrein import k, Expectation
+from kallikrein.matchers import contain
+from kallikrein.matchers.maybe import be_just
+
+from amino import Path, List, Right, do, Do
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from ribosome.nvim.io.state import NS
+from ribosome.data.plugin_state import PS
+from ribosome.test.unit import unit_test
+from ribosome.test.prog import request
+
+from chromatin.garbage import scan_venvs, remove_venvs
+from chromatin.model.garbage import VenvUsage
+
+from test.base import single_venv_config
+
+
+def venv_dir(base: str) -> Path:
+    dir = temp_dir('garbage', base)
+    shutil.rmtree(str(dir))
+    store = temp_dir('garbage', base, '.store', 'ab')
+    used = temp_dir('garbage', base, 'used')
+    (used / 'mod.py').write_text('a' * 100)
+    (used / 'pyvenv.cfg').touch()
+    orphan = temp_dir('garbage', base, 'orphan')
+    (orphan / 'mod.py').write_text('b' * 300)
+    (orphan / 'pyvenv.cfg').touch()
+    (temp_dir('garbage', base, 'notes') / 'todo.txt').write_text('c' * 10)
+    os.link(str(orphan / 'mod.py'), str(store / 'abcd'))
+    os.link(str(orphan / 'mod.py'), str(orphan / 'copy.py'))
+    return dir
+
+
+@do(NS[PS, Expectation])
+def list_spec(dir: Path) -> Do:
+    yield request('gc')
+    log_buffer = yield NS.inspect(lambda a: a.data.log_buffer)
+    return (
+        k((dir / 'orphan').exists()).true &
+        k(log_buffer.head.map(lambda a: a.messages.head.get_or_strict(''))).must(be_just(contain('--force')))
+    )
+
+
+class GarbageSpec(SpecBase):
+    '''
+    measure the venvs and mark the unreferenced ones $scan
+    remove orphaned venvs and their store objects $remove
+    only list orphaned venvs without `--force` $list
+    '''
+
+    def scan(self) -> Expectation:
+        dir = venv_dir('scan')
+        return k(scan_venvs(dir, List('used')).attempt) == Right(List(
+            VenvUsage('orphan', 300, False),
+            VenvUsage('used', 100, True),
+        ))
+
+    def remove(self) -> Expectation:
+        dir = venv_dir('remove')
+        remove_venvs(dir, List('orphan')).attempt
+        return k((sorted(os.listdir(str(dir))), os.listdir(str(dir / '.store' / 'ab')))) == (['.store', 'notes', 'used'], [])
+
+    def list(self) -> Expectation:
+        dir = venv_dir('list')
+        conf = single_venv_config('used', 'used', chromatin_venv_dir=str(dir))[2]
+        return unit_test(conf, list_spec, dir)
+
+
+__all__ = ('GarbageSpec',)
@@ -0,0 +1,131 @@
+import sys
+import shutil
+
+from kallikrein import k, Expectation
+from kallikrein.matchers.either import be_right
+
+from amino import List, Just, Nothing, Path, IO, do, Do, Right
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from ribosome.nvim.io.state import NS
+from ribosome.nvim.io.api import N
+from ribosome.data.plugin_state import PS
+from ribosome.test.unit import unit_test, update_data
+from ribosome.test.prog import request
+
+from chromatin.model.rplugin import Rplugin, ActiveRpluginMeta, DirRplugin
+from chromatin.env import Env
+from chromatin.activate.host import HostSettings, HostCmdline, host_settings, start_hosts
+from chromatin.components.core.logic import host_command_ios
+
+from test.base import single_venv_config, test_function_handler
+
+first = ActiveRpluginMeta('first', 3, 1111)
+second = ActiveRpluginMeta('second', 3, 1111)
+small = Just('small')
+handler = test_function_handler(exists=1, eval='/tmp/nvim.sock', FirstRpcTriggers='[]', SecondRpcTriggers='[]')
+conf = single_venv_config('flagellum', 'flagellum')[2].copy(function_handler=handler)
+
+
+def rplugin_venv(base: Path, name: str, python: str) -> None:
+    temp_dir(str(base), name, 'lib', 'python3.7', 'site-packages')
+    (temp_dir(str(base), name, 'bin') / 'python').symlink_to(python)
+
+
+def group_rplugins(base: Path) -> List[Rplugin]:
+    other_python = base / 'python'
+    other_python.touch()
+    for name in ['first', 'second', 'debugged']:
+        rplugin_venv(base, name, sys.executable)
+    rplugin_venv(base, 'other', str(other_python))
+    rplugin_venv(base, 'single', sys.executable)
+    cons = lambda name, **kw: DirRplugin.cons(name, str(base / 'src'), **kw)
+    return List(
+        cons('first', host_group=small),
+        cons('single'),
+        cons('second', host_group=small),
+        cons('debugged', debug=True, host_group=small),
+        cons('other', host_group=small),
+    )
+
+
+def command_hosts(commands: List[HostCmdline]) -> List[tuple]:
+    hosts = commands.map(lambda a: (a.rplugins.map(lambda r: r.name), a.rpc))
+    return hosts.sort_by(lambda a: a[0].head.get_or_strict(''))
+
+
+@do(NS[PS, Expectation])
+def settings_spec() -> Do:
+    grouped = yield NS.lift(host_settings(True))
+    single = yield NS.lift(host_settings(False))
+    return k((grouped.address, single.address)) == (Just('/tmp/nvim.sock'), Nothing)
+
+
+@do(NS[PS, Expectation])
+def start_spec() -> Do:
+    group = HostCmdline(List(Rplugin.simple('first'), Rplugin.simple('second')), ['python', 'group'], False, False)
+    single = HostCmdline.single(Rplugin.simple('single'), ['python', 'single'], False)
+    active = yield NS.lift(start_hosts(List(group, single)))
+    log = yield NS.lift(N.wrap_either(lambda a: Right(a.request_log)))
+    jobs = log.filter(lambda a: a[1].head.contains('jobstart')).map(lambda a: a[1][1][1]['rpc'])
+    return (
+        (k(active.map(lambda a: a.name)) == List('first', 'second', 'single')) &
+        (k(jobs) == List(False, True))
+    )
+
+
+@do(NS[PS, Expectation])
+def stop_spec() -> Do:
+    rplugins = List(Rplugin.simple('first'), Rplugin.simple('second'))
+    yield update_data(rplugins=rplugins, active=List(first, second), ready=rplugins.map(lambda a: a.name))
+    yield request('deactivate', 'first')
+    first_log = yield NS.lift(N.wrap_either(lambda a: Right(a.request_log)))
+    yield request('deactivate', 'second')
+    second_log = yield NS.lift(N.wrap_either(lambda a: Right(a.request_log)))
+    stops = lambda log: log.filter(lambda a: a[1].head.contains('jobstop')).length
+    return k((stops(first_log), stops(second_log))) == (0, 1)
+
+
+class HostGroupSpec(SpecBase):
+    '''
+    read the host group from the plugin config $config
+    keep a shared host running until its last member is deactivated $deactivate
+    run the shareable members of a host group in one host per interpreter $commands
+    resolve the server address only if a plugin uses a host group $settings
+    start a host group as a single job without rpc $start
+    stop the job of a host group only when its last member is deactivated $stop
+    '''
+
+    def config(self) -> Expectation:
+        rplugin = Rplugin.from_config(dict(spec='first', host_group='small'))
+        return k(rplugin.map(lambda a: a.host_group)).must(be_right(Just('small')))
+
+    def deactivate(self) -> Expectation:
+        env = Env.cons(active=List(first, second)).deactivate_rplugin(first)
+        return k((env.channel_in_use(3), env.deactivate_rplugin(second).channel_in_use(3))) == (True, False)
+
+    def commands(self) -> Expectation:
+        shutil.rmtree(str(temp_dir('host_group', 'commands')))
+        base = temp_dir('host_group', 'commands')
+        settings = HostSettings(base, Nothing, False, Just('/tmp/nvim.sock'), Nothing)
+        ios = host_command_ios(settings, group_rplugins(base))
+        commands = ios.traverse(lambda a: a, IO).map(lambda a: a.join).attempt
+        return k(commands.map(command_hosts)) == Right(List(
+            (List('debugged'), True),
+            (List('first', 'second'), False),
+            (List('other'), True),
+            (List('single'), True),
+        ))
+
+    def settings(self) -> Expectation:
+        return unit_test(conf, settings_spec)
+
+    def start(self) -> Expectation:
+        return unit_test(conf, start_spec)
+
+    def stop(self) -> Expectation:
+        return unit_test(conf, stop_spec)
+
+
+__all__ = ('HostGroupSpec',)
@@ -0,0 +1,45 @@
+import re
+import sys
+import subprocess
+
+from kallikrein import k, Expectation
+from kallikrein.matchers.comparison import less
+
+from amino import List, Lists, Map
+from amino.test.spec import SpecBase
+
+# accumulated self time of chromatin's own modules in microseconds, excluding amino and ribosome.
+# the measured median is about 90ms, leaving some headroom for noisy machines.
+import_budget = 120000
+lazy_modules = List('pkg_resources', 'urllib.request', 'chromatin.activate.haskell', 'chromatin.install.haskell',
+                    'chromatin.store', 'chromatin.garbage', 'chromatin.doctor', 'chromatin.wheelhouse',
+                    'chromatin.lock', 'chromatin.schedule', 'chromatin.bytecode')
+import_time_rex = re.compile(r'import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|(?P<name>.*)$')
+
+
+def import_times(module: str) -> Map[str, int]:
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], stderr=subprocess.PIPE,
+                          universal_newlines=True)
+    if proc.returncode != 0:
+        raise Exception(f'importing `{module}` failed:\n{proc.stderr}')
+    matches = Lists.lines(proc.stderr).flat_map(lambda a: Lists.wrap(import_time_rex.findall(a)))
+    return Map(matches.map(lambda a: (a[2].strip(), int(a[0]))))
+
+
+class ImportTimeSpec(SpecBase):
+    '''
+    don't import modules that are only used by some plugin types $lazy
+    chromatin's own modules stay within the import time budget $budget
+    '''
+
+    def lazy(self) -> Expectation:
+        modules = import_times('chromatin.config.config')
+        return k(lazy_modules.filter(modules.has_key)) == List()
+
+    def budget(self) -> Expectation:
+        times = import_times('chromatin.config.config')
+        own = times.keyfilter(lambda a: a == 'chromatin' or a.startswith('chromatin.'))
+        return k(sum(own.v)).must(less(import_budget))
+
+
+__all__ = ('ImportTimeSpec',)
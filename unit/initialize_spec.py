@@ -0,0 +1,70 @@
+from kallikrein import k, Expectation
+
+from amino import List, do, Do, Right
+from amino.test.spec import SpecBase
+
+from ribosome.nvim.io.state import NS
+from ribosome.data.plugin_state import PS
+from ribosome.test.unit import unit_test, update_data
+from ribosome.test.prog import request
+from ribosome.nvim.io.api import N
+
+from chromatin.model.rplugin import ActiveRplugin, ActiveRpluginMeta, DistRplugin
+from chromatin.components.core.logic import initialize_plugins
+
+from test.base import single_venv_config, test_function_handler, present_venv
+
+name = 'flagellum'
+stalled_name = 'golgi'
+rplugin, venv, conf = single_venv_config(name, name)
+stalled_conf = conf.copy(function_handler=test_function_handler(exists=1, GolgiPoll=False))
+started_conf = conf.copy(function_handler=test_function_handler(exists=1, FlagellumPoll=False, eval=[1], wait=0))
+
+
+def active(name: str, channel: int) -> ActiveRplugin:
+    return ActiveRplugin(DistRplugin.cons(name, name), ActiveRpluginMeta(name, channel, 1111))
+
+
+@do(NS[PS, Expectation])
+def stalled_spec() -> Do:
+    failed, timings = yield NS.lift(initialize_plugins(List(active(name, 3), active(stalled_name, 4)), .1))
+    return k(failed) == List(stalled_name)
+
+
+@do(NS[PS, Expectation])
+def started_spec() -> Do:
+    failed, timings = yield NS.lift(initialize_plugins(List(active(name, 3)), .1))
+    phases = timings.filter(lambda a: a.rplugin.contains(name)).map(lambda a: a.phase)
+    return k((failed, phases)) == (List(), List('ready', 'stage 1', 'stage 2', 'stage 3', 'stage 4', 'stage 5'))
+
+
+@do(NS[PS, Expectation])
+def reactivate_spec() -> Do:
+    yield NS.lift(present_venv(name))
+    yield update_data(rplugins=List(rplugin), venvs=List(name), active=List(active(name, 3).meta), ready=List(name))
+    yield request('reboot', name)
+    log = yield NS.lift(N.wrap_either(lambda a: Right(a.request_log)))
+    calls = log.map(lambda a: a[1].head.get_or_strict(''))
+    unlet = calls.index_of(f'silent! unlet! g:{name}_started')
+    start = calls.index_where(lambda a: a == 'jobstart')
+    return k(unlet.zip(start).exists(lambda a: a[0] < a[1])).true
+
+
+class InitializeSpec(SpecBase):
+    '''
+    exclude a plugin that doesn't start in time from initialization $stalled
+    detect a started plugin by its `started` flag $started
+    reset the started flag before a plugin is activated again $reactivate
+    '''
+
+    def stalled(self) -> Expectation:
+        return unit_test(stalled_conf, stalled_spec)
+
+    def started(self) -> Expectation:
+        return unit_test(started_conf, started_spec)
+
+    def reactivate(self) -> Expectation:
+        return unit_test(started_conf, reactivate_spec)
+
+
+__all__ = ('InitializeSpec',)
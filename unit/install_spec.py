@@ -0,0 +1,51 @@
+from kallikrein import k, Expectation
+from kallikrein.matchers import contain
+
+from amino import List, Nothing, Just, Map, do, Do
+from amino.test.spec import SpecBase
+
+from ribosome.nvim.io.state import NS
+from ribosome.data.plugin_state import PS
+from ribosome.test.unit import unit_test
+
+from chromatin.model.rplugin import InstallableRplugin, VenvRplugin, DistVenvRplugin, DistRplugin
+from chromatin.model.lock import Lockfile, PluginLock
+from chromatin.install.main import install_rplugin_subproc
+from chromatin.wheelhouse import install_script
+
+from test.base import single_venv_config, present_venv
+
+name = 'flagellum'
+rplugin, venv, conf = single_venv_config(name, name)
+meta = VenvRplugin(DistVenvRplugin(name))
+installable = InstallableRplugin(meta, DistRplugin.cons(name, name))
+lock = Lockfile(Map({name: PluginLock(name, List(name), Nothing, List())}))
+
+
+@do(NS[PS, Expectation])
+def wheelhouse_spec() -> Do:
+    proc = yield NS.lift(install_rplugin_subproc(installable)(meta))
+    return k((proc.args.head, proc.args.drop(2))) == (Just(str(install_script)), List('install', name))
+
+
+@do(NS[PS, Expectation])
+def locked_spec() -> Do:
+    yield NS.lift(present_venv(name))
+    proc = yield NS.lift(install_rplugin_subproc(installable, lock=lock)(meta))
+    return k(proc.args).must(contain('--require-hashes'))
+
+
+class InstallSpec(SpecBase):
+    '''
+    install a python plugin through the wheelhouse $wheelhouse
+    install a locked python plugin from its pins $locked
+    '''
+
+    def wheelhouse(self) -> Expectation:
+        return unit_test(conf, wheelhouse_spec)
+
+    def locked(self) -> Expectation:
+        return unit_test(conf, locked_spec)
+
+
+__all__ = ('InstallSpec',)
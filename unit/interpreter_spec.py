@@ -0,0 +1,56 @@
+from kallikrein import k, Expectation
+
+from amino import Path, List, Just, Nothing, Right, Map
+from amino.test.spec import SpecBase
+
+from chromatin.util.interpreter import resolve_interpreter
+from chromatin.model.interpreter import Interpreter, InterpreterIndex
+
+
+def interpreter(path: str, *version: int) -> Interpreter:
+    return Interpreter(Path(path), Path(path), List(*version), f'cpython-{version[0]}{version[1]}')
+
+
+index = InterpreterIndex.cons(
+    interpreters=List(
+        interpreter('/usr/bin/python3', 3, 9, 2),
+        interpreter('/usr/bin/python3.9', 3, 9, 2),
+        interpreter('/usr/local/bin/python3.10', 3, 10, 1),
+        interpreter('/usr/local/bin/python3.11', 3, 11, 4),
+    ),
+    tools=Map(stack=Path('/usr/bin/stack')),
+)
+
+
+def resolve(spec: str) -> str:
+    return resolve_interpreter(index, Just(spec)).map(str).value_or(lambda a: 'error')
+
+
+class InterpreterSpec(SpecBase):
+    '''
+    resolve version specs $version
+    resolve executable names and paths $name
+    use `python3` by default $default
+    '''
+
+    def version(self) -> Expectation:
+        return k(List('3.10', '>=3.10', '<3.10', '>3.11', '3').map(resolve)) == List(
+            '/usr/local/bin/python3.10',
+            '/usr/local/bin/python3.11',
+            '/usr/bin/python3',
+            'error',
+            '/usr/local/bin/python3.11',
+        )
+
+    def name(self) -> Expectation:
+        return k(List('python3.9', 'python3.7', '/opt/python').map(resolve)) == List(
+            '/usr/bin/python3.9',
+            'error',
+            '/opt/python',
+        )
+
+    def default(self) -> Expectation:
+        return k(resolve_interpreter(index, Nothing)) == Right(Path('/usr/bin/python3'))
+
+
+__all__ = ('InterpreterSpec',)
@@ -0,0 +1,32 @@
+import shutil
+
+from kallikrein import k, Expectation
+
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.venv import cons_venv, venv_package_status, layer_pth
+
+name = 'flagellum'
+
+
+class LayerSpec(SpecBase):
+    '''
+    find a distribution that is installed in the base layer of a venv $layer
+    '''
+
+    def layer(self) -> Expectation:
+        dir = temp_dir('layer', 'venvs')
+        shutil.rmtree(str(dir))
+        site = temp_dir('layer', 'venvs', name, 'lib', 'python3.7', 'site-packages')
+        layer = temp_dir('layer', 'venvs', '.base', 'key', 'site')
+        dist_info = temp_dir('layer', 'venvs', '.base', 'key', 'site', 'ribosome-13.0.1.dist-info')
+        (dist_info / 'METADATA').write_text('Name: ribosome\nVersion: 13.0.1\n')
+        venv = cons_venv(dir / name, name)
+        (site / layer_pth).write_text(f'{layer}\n')
+        status = venv_package_status(venv, 'ribosome').attempt.map(lambda a: a.exists and a.version == '13.0.1')
+        absent = venv_package_status(venv, 'amino').attempt.map(lambda a: a.exists)
+        return k((status.get_or_strict(False), absent.get_or_strict(True))) == (True, False)
+
+
+__all__ = ('LayerSpec',)
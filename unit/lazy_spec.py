@@ -0,0 +1,73 @@
+from kallikrein import k, Expectation
+from kallikrein.matchers.either import be_right
+from kallikrein.matchers import contain
+
+from amino import List, Map, do, Do, Right
+from amino.test.spec import SpecBase
+
+from ribosome.nvim.io.state import NS
+from ribosome.nvim.io.api import N
+from ribosome.data.plugin_state import PS
+from ribosome.test.unit import unit_test
+
+from ribosome.rpc.data.rpc_method import CommandMethod, FunctionMethod
+from ribosome.components.internal.prog import RpcTrigger
+
+from chromatin.model.rplugin import Rplugin, LazyTriggers
+from chromatin.activate.lazy import lazy_stubs, stub_commands, redispatch_command
+from chromatin.handlers import handler_commands
+
+from test.base import single_venv_config, test_function_handler
+
+rplugin = Rplugin.from_config(dict(spec='flagellum', on_cmd=['FlagCmd'], on_ft=['python'])).get_or_raise()
+conf = single_venv_config('flagellum', 'flagellum')[2].copy(function_handler=test_function_handler(exists=2))
+
+
+@do(NS[PS, Expectation])
+def redispatch_spec() -> Do:
+    yield NS.lift(redispatch_command('flagellum', '1', '3', '5', 'FlagCmd!', 'a  "b c" \\x'))
+    log = yield NS.lift(N.wrap_either(lambda a: Right(a.request_log)))
+    return k(log.map(lambda a: a[1].head.get_or_strict(''))).must(contain('3,5FlagCmd! a  "b c" \\x'))
+
+
+class LazySpec(SpecBase):
+    '''
+    read the lazy triggers from the plugin config $config
+    define stubs for configured and cached commands and for filetypes $stubs
+    cache only the plugin's own commands $handlers
+    run the triggering command again with its verbatim arguments $redispatch
+    '''
+
+    def config(self) -> Expectation:
+        return k(Rplugin.from_config(dict(spec='flagellum', on_event=['BufEnter *.py'])).map(lambda a: a.lazy)).must(
+            be_right(LazyTriggers.cons(events=List('BufEnter *.py'))))
+
+    def stubs(self) -> Expectation:
+        commands = stub_commands(Map(flagellum=List('FlagCmd', 'FlagOther')), rplugin)
+        return k(lazy_stubs(rplugin, commands)) == List(
+            'command! -nargs=* -range -bang FlagCmd execute \'CrmLazyCommand flagellum <range> <line1> <line2> '
+            'FlagCmd<bang> \' . escape(<q-args>, "\\\\ \\t")',
+            'command! -nargs=* -range -bang FlagOther execute \'CrmLazyCommand flagellum <range> <line1> <line2> '
+            'FlagOther<bang> \' . escape(<q-args>, "\\\\ \\t")',
+            'augroup CrmLazyFlagellum',
+            'autocmd!',
+            'augroup END',
+            "autocmd CrmLazyFlagellum FileType python execute 'CrmLazyEvent flagellum FileType ' . "
+            "fnameescape(expand('<amatch>'))",
+        )
+
+    def handlers(self) -> Expectation:
+        triggers = List(
+            RpcTrigger('FlagCmd', CommandMethod.cons()),
+            RpcTrigger('FlagCmd', FunctionMethod()),
+            RpcTrigger('FlagellumStage1', CommandMethod.cons()),
+            RpcTrigger('FlagellumPoll', CommandMethod.cons()),
+            RpcTrigger('FlagellumAdd', CommandMethod.cons()),
+        )
+        return k(handler_commands('flagellum', triggers)) == List('FlagCmd', 'FlagellumAdd')
+
+    def redispatch(self) -> Expectation:
+        return unit_test(conf, redispatch_spec)
+
+
+__all__ = ('LazySpec',)
@@ -0,0 +1,59 @@
+import shutil
+import hashlib
+
+from kallikrein import k, Expectation
+
+from amino import List, Just
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.lock import installed_dists, locked_dist, lock_requirements, layer_dists
+from chromatin.venv import layer_pth
+from chromatin.model.lock import PluginLock, LockedDist
+
+
+class LockSpec(SpecBase):
+    '''
+    read the pinned distributions from a venv $dists
+    pin distributions with the hashes of their wheels $requirements
+    skip the pins of distributions that the base layer provides $layer
+    '''
+
+    def dists(self) -> Expectation:
+        dir = temp_dir('lock', 'dists')
+        shutil.rmtree(str(dir))
+        site = temp_dir('lock', 'dists', 'site')
+        for name in ['Flagellum_Core-1.0.dist-info', 'amino-13.0.0.dist-info', 'pip-23.0.dist-info', 'amino']:
+            (site / name).mkdir()
+        return k(installed_dists(site)) == List(('amino', '13.0.0'), ('flagellum-core', '1.0'))
+
+    def requirements(self) -> Expectation:
+        dir = temp_dir('lock', 'requirements')
+        shutil.rmtree(str(dir))
+        wheelhouse = temp_dir('lock', 'requirements', 'wheels')
+        (wheelhouse / 'Flagellum_Core-1.0-py3-none-any.whl').write_bytes(b'wheel')
+        (wheelhouse / 'flagellum_core-1.1-py3-none-any.whl').write_bytes(b'newer')
+        digest = hashlib.sha256(b'wheel').hexdigest()
+        dist = locked_dist(wheelhouse, 'flagellum-core', '1.0')
+        lock = PluginLock('flagellum', List('flagellum'), Just('cp37'), List(dist))
+        return k(lock_requirements(lock)) == f'flagellum-core==1.0 --hash=sha256:{digest}\n'
+
+    def layer(self) -> Expectation:
+        dir = temp_dir('lock', 'layer')
+        shutil.rmtree(str(dir))
+        site = temp_dir('lock', 'layer', 'site')
+        base = temp_dir('lock', 'layer', 'base')
+        (site / 'flagellum-1.0.dist-info').mkdir()
+        (base / 'amino-13.0.0.dist-info').mkdir()
+        (base / 'ribosome-13.0.0.dist-info').mkdir()
+        (site / layer_pth).write_text(f'{base}\n')
+        dists = List(('amino', '13.0.0'), ('flagellum', '1.0'), ('ribosome', '12.0.0'))
+        lock = PluginLock('flagellum', List('flagellum'), Just('cp37'), dists.map(lambda a: LockedDist(*a, List('x'))))
+        return (
+            (k(installed_dists(site)) == List(('amino', '13.0.0'), ('flagellum', '1.0'), ('ribosome', '13.0.0'))) &
+            (k(lock_requirements(lock, layer_dists(site))) ==
+             'flagellum==1.0 --hash=sha256:x\nribosome==12.0.0 --hash=sha256:x\n')
+        )
+
+
+__all__ = ('LockSpec',)
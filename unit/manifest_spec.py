@@ -0,0 +1,62 @@
+import os
+import sys
+import shutil
+from typing import Tuple
+
+from kallikrein import k, Expectation
+from kallikrein.matchers.either import be_right
+from kallikrein.matchers.maybe import be_just
+
+from amino import List, Path, do, Do, IO
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.model.rplugin import DistRplugin
+from chromatin.rplugin import cons_installable_rplugin
+from chromatin.manifest import record_manifest, trusted_rplugins, read_manifest
+
+name = 'flagellum'
+
+
+def manifest_venv(base: str) -> Tuple[Path, Path]:
+    dir = temp_dir('manifest', base)
+    shutil.rmtree(str(dir))
+    site = temp_dir('manifest', base, name, 'lib', 'python3.7', 'site-packages')
+    temp_dir('manifest', base, name, 'lib', 'python3.7', 'site-packages', f'{name}-0.1.0.dist-info')
+    bin_path = temp_dir('manifest', base, name, 'bin')
+    (bin_path / 'python').symlink_to(sys.executable)
+    return dir, site
+
+
+rplugin = cons_installable_rplugin.match(DistRplugin.cons(name, name)).get_or_fail('not installable')
+
+
+class ManifestSpec(SpecBase):
+    '''
+    trust a plugin with an unchanged manifest entry $trust
+    distrust a plugin after its site dir was modified $modified
+    '''
+
+    def trust(self) -> Expectation:
+        dir, site = manifest_venv('trust')
+        @do(IO[Expectation])
+        def run() -> Do:
+            yield record_manifest(dir, List(rplugin))
+            manifest = yield read_manifest(dir)
+            trusted = yield trusted_rplugins(dir, List(rplugin))
+            version = manifest.entry(name).flat_map(lambda a: a.version)
+            return (k(trusted) == List(name)) & k(version).must(be_just('0.1.0'))
+        return run().attempt.get_or(lambda err: k(err).must(be_right))
+
+    def modified(self) -> Expectation:
+        dir, site = manifest_venv('modified')
+        @do(IO[Expectation])
+        def run() -> Do:
+            yield record_manifest(dir, List(rplugin))
+            yield IO.delay(os.utime, str(site), (0, 0))
+            trusted = yield trusted_rplugins(dir, List(rplugin))
+            return k(trusted) == List()
+        return run().attempt.get_or(lambda err: k(err).must(be_right))
+
+
+__all__ = ('ManifestSpec',)
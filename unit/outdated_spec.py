@@ -0,0 +1,45 @@
+import pkg_resources
+
+from kallikrein import k, Expectation
+
+from amino import List, Just, Nothing
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.outdated import parse_index, wheel_versions, newest_version, is_outdated
+from chromatin.model.outdated import PackageVersion
+
+index_page = '''<html><body>
+<a href="../../packages/flagellum-1.0.0.tar.gz#sha256=00">flagellum-1.0.0.tar.gz</a>
+<a href="../../packages/flagellum-1.1.0-py3-none-any.whl#sha256=01">flagellum-1.1.0-py3-none-any.whl</a>
+<a href="../../packages/flagellum-2.0.0a1-py3-none-any.whl#sha256=02">flagellum-2.0.0a1-py3-none-any.whl</a>
+<a href="../../packages/flagellum_ext-3.0.0.tar.gz#sha256=03">flagellum_ext-3.0.0.tar.gz</a>
+</body></html>
+'''
+
+
+class OutdatedSpec(SpecBase):
+    '''
+    parse the versions of a project from a simple index page $index
+    consider a newer wheel in the wheelhouse as an update $wheelhouse
+    '''
+
+    def index(self) -> Expectation:
+        return k(parse_index('flagellum', 'text/html', index_page)) == List('1.0.0', '1.1.0', '2.0.0a1')
+
+    def wheelhouse(self) -> Expectation:
+        wheelhouse = temp_dir('outdated', 'wheelhouse')
+        (wheelhouse / 'flagellum-1.2.0-py3-none-any.whl').touch()
+        (wheelhouse / 'cilia-5.0.0-py3-none-any.whl').touch()
+        versions = List('1.1.0', '2.0.0a1') + wheel_versions(wheelhouse, 'flagellum')
+        latest = newest_version(versions, pkg_resources.Requirement.parse('flagellum'), Just('1.1.0'))
+        current = PackageVersion('flagellum', 'flagellum', Just('1.2.0'), latest)
+        return (
+            (k(latest) == Just('1.2.0')) &
+            k(is_outdated(PackageVersion('flagellum', 'flagellum', Just('1.1.0'), latest))).true &
+            k(is_outdated(current)).false &
+            k(is_outdated(current.copy(latest=Nothing))).true
+        )
+
+
+__all__ = ('OutdatedSpec',)
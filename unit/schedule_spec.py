@@ -0,0 +1,49 @@
+import time
+import threading
+
+from kallikrein import k, Expectation
+
+from amino import List, Map, Just
+from amino.test.spec import SpecBase
+
+from ribosome.process import Subprocess
+
+from chromatin.schedule import Slots, default_classes, run_process
+
+mebibyte = 1 << 20
+
+
+class ScheduleSpec(SpecBase):
+    '''
+    start waiting jobs in order of priority $priority
+    limit jobs by cores and memory $limits
+    kill a job after its timeout $timeout
+    '''
+
+    def priority(self) -> Expectation:
+        slots = Slots(1)
+        started = []
+        slots.acquire(0)
+        def job(name: str, priority: int) -> None:
+            slots.acquire(priority)
+            started.append(name)
+            slots.release()
+        threads = [threading.Thread(target=job, args=a) for a in [('update', 1), ('cram', 0)]]
+        for thread in threads:
+            thread.start()
+            time.sleep(.05)
+        slots.release()
+        for thread in threads:
+            thread.join(1)
+        return k(started) == ['cram', 'update']
+
+    def limits(self) -> Expectation:
+        classes = default_classes(16, 3000 * mebibyte)
+        return k(classes.valmap(lambda a: a.limit)) == Map(venv=16, pip=11, haskell=1)
+
+    def timeout(self) -> Expectation:
+        result = run_process(Subprocess('sleep', List('5'), 'flagellum', timeout=None), .1)
+        return k((result.retval, result.stderr.last)) == (-1, Just('killed after 0 seconds'))
+
+
+__all__ = ('ScheduleSpec',)
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+from kallikrein import k, Expectation
+
+from amino import List, Path
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.model.store import StoreStats
+from chromatin.store import link_venvs, read_store_stats
+
+content = 'x' * 100
+
+
+def venv(base: Path, name: str, extra: str) -> Path:
+    site = temp_dir(str(base), name, 'lib', 'python3.7', 'site-packages')
+    (site / 'shared.py').write_text(content)
+    (site / 'own.py').write_text(extra)
+    dir = site.parent.parent.parent
+    (dir / 'pyvenv.cfg').write_text(content)
+    (temp_dir(str(base), name, 'bin') / 'pip').write_text(content)
+    return dir
+
+
+class StoreSpec(SpecBase):
+    '''
+    hardlink identical files of two venvs to the same store object $link
+    don't link the files that are rewritten in place $rewritten
+    '''
+
+    def link(self) -> Expectation:
+        base = temp_dir('store', 'venvs')
+        shutil.rmtree(str(base))
+        first = venv(base, 'first', 'first')
+        second = venv(base, 'second', 'second')
+        shared = link_venvs(base, List(first, second)).attempt.get_or_strict(0)
+        stats = read_store_stats(base).attempt.get_or_strict(StoreStats.cons())
+        def inode(venv: Path) -> int:
+            return os.stat(str(venv / 'lib' / 'python3.7' / 'site-packages' / 'shared.py')).st_ino
+        return k((shared, inode(first) == inode(second), stats)) == (100, True, StoreStats(3, 111, 4, 100, 0))
+
+    def rewritten(self) -> Expectation:
+        base = temp_dir('store', 'rewritten')
+        shutil.rmtree(str(base))
+        first = venv(base, 'first', 'first')
+        second = venv(base, 'second', 'second')
+        link_venvs(base, List(first, second)).attempt
+        def links(path: str) -> int:
+            return os.stat(str(first / path)).st_nlink
+        return k((links('pyvenv.cfg'), links('bin/pip'))) == (1, 1)
+
+
+__all__ = ('StoreSpec',)
@@ -0,0 +1,85 @@
+import os
+import sys
+import shutil
+
+from kallikrein import k, Expectation
+from kallikrein.matchers import equal
+
+from amino import Path
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.template import clone_tree, templates_dir, template_key, prune_templates
+
+
+def template(base: str) -> Path:
+    dir = temp_dir('template', base)
+    shutil.rmtree(str(dir))
+    bin_path = temp_dir('template', base, 'tpl', 'bin')
+    site = temp_dir('template', base, 'tpl', 'lib', 'python3.7', 'site-packages')
+    tpl = bin_path.parent
+    (bin_path / 'pip').write_text(f'#!{tpl}/bin/python\n')
+    (bin_path / 'python').symlink_to('/usr/bin/python3')
+    (tpl / 'lib64').symlink_to('lib')
+    (tpl / 'pyvenv.cfg').write_text(f'home = /usr/bin\ncommand = /usr/bin/python3 -m venv {tpl}\n')
+    (site / 'mod.py').write_text(f'# {tpl}\n')
+    (tpl / '.complete').touch()
+    return tpl
+
+
+class TemplateSpec(SpecBase):
+    '''
+    clone a template venv, rewriting the paths in its scripts $clone
+    copy files instead of hardlinking them unless requested $copy
+    remove the templates of interpreters that don't exist anymore $prune
+    '''
+
+    def clone(self) -> Expectation:
+        tpl = template('clone')
+        target = tpl.parent / 'plugin'
+        clone_tree(str(tpl), str(target))
+        mod = target / 'lib' / 'python3.7' / 'site-packages' / 'mod.py'
+        return k((
+            (target / 'bin' / 'pip').read_text(),
+            (target / 'pyvenv.cfg').read_text().endswith(f'venv {target}\n'),
+            os.readlink(str(target / 'bin' / 'python')),
+            (target / 'lib64').is_symlink(),
+            mod.read_text(),
+            (target / '.complete').exists(),
+        )) == (f'#!{target}/bin/python\n', True, '/usr/bin/python3', True, f'# {tpl}\n', False)
+
+    def copy(self) -> Expectation:
+        tpl = template('copy')
+        copied = tpl.parent / 'copied'
+        linked = tpl.parent / 'linked'
+        clone_tree(str(tpl), str(copied))
+        clone_tree(str(tpl), str(linked), True)
+        site = Path('lib') / 'python3.7' / 'site-packages' / 'mod.py'
+        inode = lambda a: os.stat(str(a / site)).st_ino
+        return (k(inode(copied)) != inode(tpl)) & (k(inode(linked)) == inode(tpl))
+
+    def prune(self) -> Expectation:
+        base = temp_dir('template', 'prune')
+        shutil.rmtree(str(base))
+        dir = templates_dir(base)
+        interpreter = Path(sys.executable)
+        def make(key: str, python: Path) -> Path:
+            tpl = temp_dir(str(dir / key), 'bin').parent
+            (tpl / 'bin' / 'python').symlink_to(python)
+            (tpl / '.complete').touch()
+            (dir / f'{key}.lock').touch()
+            return tpl
+        current = make(template_key(interpreter), interpreter)
+        removed = make('0' * 16, base / 'missing' / 'python3')
+        upgraded = make('1' * 16, interpreter)
+        building = temp_dir(str(dir / ('2' * 16)), 'bin').parent
+        count = prune_templates(base)
+        return (
+            (k(count) == 2) &
+            k((current.exists(), removed.exists(), upgraded.exists(), building.exists())).must(
+                equal((True, False, False, True))) &
+            k((dir / f'{removed.name}.lock').exists()).false
+        )
+
+
+__all__ = ('TemplateSpec',)
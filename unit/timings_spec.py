@@ -0,0 +1,86 @@
+from kallikrein import k, Expectation
+from kallikrein.matchers import contain
+
+from ribosome.compute.output import Echo
+from ribosome.nvim.io.state import NS
+from ribosome.data.plugin_state import PS
+from ribosome.test.unit import update_data, unit_test
+from ribosome.test.prog import request
+
+from test.base import single_venv_config, present_venv, test_function_handler
+
+from amino import List, do, Do, Just
+from amino.test.spec import SpecBase
+
+from chromatin.util import resources
+from chromatin.model.timing import Timing
+from chromatin.model.rplugin import ActiveRpluginMeta
+from chromatin.timing import critical_path
+
+name = 'flagellum'
+slow_name = 'golgi'
+rplugin, venv, conf = single_venv_config(name, name)
+started_conf = conf.copy(function_handler=test_function_handler(exists=1, FlagellumPoll=False, eval=[1], wait=0))
+timings = List(
+    Timing.cons('activate', 0., 1.),
+    Timing.cons('activate', .1, .3, name),
+    Timing.cons('activate', .1, .8, slow_name),
+    Timing.cons('ready', 1., 3.),
+    Timing.cons('ready', 1., 2.5, name),
+    Timing.cons('ready', 1., 1.5, slow_name),
+)
+
+
+@do(NS[PS, Expectation])
+def show_spec() -> Do:
+    yield update_data(timings=timings)
+    yield request('timings')
+    log_buffer = yield NS.inspect(lambda a: a.data.log_buffer)
+    return k(log_buffer).must(contain(Echo.info(resources.show_timings(timings))))
+
+
+@do(NS[PS, Expectation])
+def reboot_spec() -> Do:
+    yield NS.lift(present_venv(name))
+    yield update_data(rplugins=List(rplugin), venvs=List(name), active=List(ActiveRpluginMeta(name, 3, 1111)),
+                      ready=List(name), timings=timings)
+    yield request('reboot', name)
+    recorded = yield NS.inspect(lambda a: a.data.timings)
+    return (
+        (k(recorded.filter(timings.contains)) == List()) &
+        (k(recorded.filter(lambda a: a.rplugin.empty).map(lambda a: a.phase)) == List('activate'))
+    )
+
+
+@do(NS[PS, Expectation])
+def rebuild_spec() -> Do:
+    yield update_data(rebuilding=List(name), timings=timings)
+    yield request('rebuilt', name, '0', '4.0', '6.5')
+    recorded = yield NS.inspect(lambda a: a.data.timings)
+    rebuild = List(Timing.cons('rebuild', 4., 6.5), Timing.cons('rebuild', 4., 6.5, name))
+    return k(recorded) == timings + rebuild
+
+
+class TimingsSpec(SpecBase):
+    '''
+    find the plugin that completes each phase last $critical
+    show the recorded timings $show
+    discard the timings of the previous run when plugins are rebooted $reboot
+    record a background rebuild as a phase of the current run $rebuild
+    '''
+
+    def critical(self) -> Expectation:
+        critical = critical_path(timings).map(lambda a: (a[0].phase, a[1].flat_map(lambda t: t.rplugin)))
+        return k(critical) == List(('activate', Just(slow_name)), ('ready', Just(name)))
+
+    def show(self) -> Expectation:
+        return unit_test(conf, show_spec)
+
+    def reboot(self) -> Expectation:
+        return unit_test(started_conf, reboot_spec)
+
+    def rebuild(self) -> Expectation:
+        return unit_test(conf, rebuild_spec)
+
+
+__all__ = ('TimingsSpec',)
@@ -9,12 +9,14 @@ from ribosome.data.plugin_state import PS
 
 from test.base import rplugin_dir, single_venv_config, present_venv
 
-from amino import Map, List, do, Do
+from amino import Map, List, do, Do, Nothing, Path
 from amino.test.spec import SpecBase
 from amino.lenses.lens import lens
 
 from chromatin.model.rplugin import ActiveRpluginMeta
 from chromatin.util import resources
+from chromatin.model.lock import Lockfile, PluginLock
+from chromatin.lock import write_lock
 
 name = 'flagellum'
 spec = rplugin_dir(name)
@@ -36,13 +38,36 @@ def one_spec() -> Do:
     return k(log_buffer).must(contain(Echo.info(resources.updated_plugin(rplugin.name))))
 
 
+@do(NS[PS, Expectation])
+def locked_spec() -> Do:
+    yield NS.lift(present_venv(name))
+    yield NS.from_io(write_lock(Path(conf.vars['chromatin_venv_dir']),
+                                Lockfile(Map({name: PluginLock(name, List(spec), Nothing, List())}))))
+    yield update_data(
+        rplugins=List(rplugin),
+        venvs=List(name),
+        active=List(active_rplugin),
+        ready=List(name),
+    )
+    yield request('update', 'flagellum')
+    log_buffer = yield NS.inspect(lambda a: a.data.log_buffer)
+    return (
+        k(log_buffer).must(contain(Echo.info(resources.pinned_plugins(List(name))))) &
+        k(log_buffer.contains(Echo.info(resources.updated_plugin(rplugin.name)))).false
+    )
+
+
 class UpdateSpec(SpecBase):
     '''
     update one plugin $one
+    skip a locked plugin unless relocking $locked
     '''
 
     def one(self) -> Expectation:
         return unit_test(conf, one_spec)
 
+    def locked(self) -> Expectation:
+        return unit_test(conf, locked_spec)
+
 
 __all__ = ('UpdateSpec',)
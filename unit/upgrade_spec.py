@@ -0,0 +1,57 @@
+import os
+import shutil
+
+from kallikrein import k, Expectation
+
+from amino import Path, List, Just, Nothing, Map
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.upgrade import interpreter_changed
+from chromatin.model.manifest import ManifestEntry
+from chromatin.model.interpreter import Interpreter, InterpreterIndex
+
+
+def venv(base: str) -> Path:
+    dir = temp_dir('upgrade', base)
+    shutil.rmtree(str(dir))
+    bin_path = temp_dir('upgrade', base, 'venv', 'bin')
+    real = temp_dir('upgrade', base, 'usr') / 'python3.7'
+    real.touch()
+    (bin_path / 'python').symlink_to(str(real))
+    return bin_path.parent
+
+
+def entry(interpreter: Path, abi: str) -> ManifestEntry:
+    return ManifestEntry('flagellum', 'flagellum', Nothing, interpreter, Just(abi), Path('/site'), Map())
+
+
+def index(interpreter: Path, abi: str) -> InterpreterIndex:
+    return InterpreterIndex.cons(interpreters=List(Interpreter(interpreter, interpreter, List(3, 7, 0), abi)))
+
+
+class UpgradeSpec(SpecBase):
+    '''
+    accept an unchanged interpreter $unchanged
+    detect a removed interpreter $removed
+    detect an ABI change of the interpreter $abi
+    '''
+
+    def unchanged(self) -> Expectation:
+        dir = venv('unchanged')
+        python = Path(os.path.realpath(str(dir / 'bin' / 'python')))
+        return k(interpreter_changed(dir, entry(python, 'cp37'), index(python, 'cp37'))).false
+
+    def removed(self) -> Expectation:
+        dir = venv('removed')
+        python = Path(os.path.realpath(str(dir / 'bin' / 'python')))
+        python.unlink()
+        return k(interpreter_changed(dir, entry(python, 'cp37'), index(python, 'cp37'))).true
+
+    def abi(self) -> Expectation:
+        dir = venv('abi')
+        python = Path(os.path.realpath(str(dir / 'bin' / 'python')))
+        return k(interpreter_changed(dir, entry(python, 'cp37'), index(python, 'cp38'))).true
+
+
+__all__ = ('UpgradeSpec',)
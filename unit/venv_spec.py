@@ -0,0 +1,41 @@
+import shutil
+
+from kallikrein import k, Expectation
+
+from amino import Path, Just, Right
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.venv import cons_venv, venv_site, venv_package_status, write_venv_metadata
+from chromatin.model.venv import VenvMetadata, VenvPackageExistent
+
+
+def venv(base: str) -> Path:
+    dir = temp_dir('venv', base)
+    shutil.rmtree(str(dir))
+    temp_dir('venv', base, 'lib', 'python3.12', 'site-packages', 'flagellum')
+    return dir
+
+
+class VenvSpec(SpecBase):
+    '''
+    find the site dir of a venv without metadata $probe
+    use the recorded version for the package status $recorded
+    '''
+
+    def probe(self) -> Expectation:
+        dir = venv('probe')
+        return k(venv_site(cons_venv(dir, 'flagellum')).attempt) == Right(Right(
+            dir / 'lib' / 'python3.12' / 'site-packages'))
+
+    def recorded(self) -> Expectation:
+        dir = venv('recorded')
+        site = dir / 'lib' / 'python3.12' / 'site-packages'
+        plugin_path = site / 'flagellum' / '__init__.py'
+        plugin_path.touch()
+        v = cons_venv(dir, 'flagellum')
+        write_venv_metadata(v, VenvMetadata(site, Just('3.12.1'), plugin_path, Just('1.0.0'))).attempt
+        return k(venv_package_status(v, 'flagellum').attempt) == Right(VenvPackageExistent(v, '1.0.0'))
+
+
+__all__ = ('VenvSpec',)
@@ -0,0 +1,44 @@
+import os
+import shutil
+
+from kallikrein import k, Expectation
+
+from amino import List
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.wheelhouse import evict_wheels, touch_wheels
+
+
+def wheelhouse(base: str) -> str:
+    dir = temp_dir('wheelhouse', base)
+    shutil.rmtree(str(dir))
+    wheels = temp_dir('wheelhouse', base, 'wheels')
+    for i, name in enumerate(['amino-13.0.0-py3-none-any.whl', 'Flagellum_Core-1.0-py3-none-any.whl',
+                              'msgpack-1.0.0-cp37-cp37m-linux_x86_64.whl']):
+        path = wheels / name
+        path.write_bytes(b'x' * 100)
+        os.utime(str(path), (1000 + i, 1000 + i))
+    return wheels
+
+
+class WheelhouseSpec(SpecBase):
+    '''
+    evict the least recently used wheels $evict
+    mark the wheels of installed distributions as used $touch
+    '''
+
+    def evict(self) -> Expectation:
+        return k(evict_wheels(wheelhouse('evict'), 150)) == List('amino-13.0.0-py3-none-any.whl',
+                                                               'Flagellum_Core-1.0-py3-none-any.whl')
+
+    def touch(self) -> Expectation:
+        wheels = wheelhouse('touch')
+        site = temp_dir('wheelhouse', 'touch', 'site')
+        (site / 'flagellum_core-1.0.dist-info').mkdir()
+        touch_wheels(wheels, site)
+        return k(evict_wheels(wheels, 150)) == List('amino-13.0.0-py3-none-any.whl',
+                                                    'msgpack-1.0.0-cp37-cp37m-linux_x86_64.whl')
+
+
+__all__ = ('WheelhouseSpec',)
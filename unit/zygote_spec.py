@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+
+from kallikrein import k, Expectation
+from kallikrein.matchers import contain
+
+from amino import Path, List
+from amino.test import temp_dir
+from amino.test.spec import SpecBase
+
+from chromatin.host import host_cmdline, zygote_script
+from chromatin import zygote
+
+python = Path('/venv/bin/python')
+bin_path = Path('/venv/bin')
+plugin = Path('/plugin/__init__.py')
+
+
+def fork_venv(base: Path) -> Path:
+    '''a venv whose plugin exits with a status read from a module that is only reachable through a `.pth` file.
+    '''
+    site = temp_dir(str(base), 'venv', 'lib', 'python3.7', 'site-packages')
+    src = temp_dir(str(base), 'src')
+    (src / 'status.py').write_text('value = 7\n')
+    (site / 'src.pth').write_text(f'{src}\n')
+    (base / 'venv' / 'chromatin.json').write_text(json.dumps(dict(site=str(site))))
+    (base / 'plugin.py').write_text('import sys\nimport status\nsys.exit(status.value)\n')
+    return temp_dir(str(base), 'venv', 'bin')
+
+
+class ZygoteSpec(SpecBase):
+    '''
+    start python hosts through the zygote client $cmdline
+    start regular hosts in debug mode $debug
+    use separate zygotes for separate neovim instances $socket
+    fork a host through the zygote and exit with its status $fork
+    '''
+
+    def cmdline(self) -> Expectation:
+        cmdline = host_cmdline(python, bin_path, plugin, False, List('/extra'), True)
+        return k(cmdline) == [str(python), '-S', '-E', str(zygote_script), 'connect', str(bin_path), str(plugin),
+                              '/extra']
+
+    def debug(self) -> Expectation:
+        cmdline = host_cmdline(python, bin_path, plugin, True, List(), True)
+        return k(cmdline).must(contain(str(bin_path / 'ribosome_start_plugin')))
+
+    def socket(self) -> Expectation:
+        return k(zygote.socket_path('/venv/site', 1)) != zygote.socket_path('/venv/site', 2)
+
+    def fork(self) -> Expectation:
+        base = temp_dir('zygote', 'fork')
+        shutil.rmtree(str(base))
+        bin_path = fork_venv(base)
+        client = [sys.executable, '-S', '-E', str(zygote_script), 'connect', str(bin_path), str(base / 'plugin.py')]
+        # the shell stands in for neovim, so that the zygote shuts down once the client has exited
+        shell = subprocess.Popen(['sh', '-c', '"$@"; echo $?', 'sh'] + client, stdout=subprocess.PIPE,
+                                 stdin=subprocess.DEVNULL)
+        status = shell.communicate(timeout=30)[0].decode().strip()
+        path = zygote.socket_path(str(bin_path.parent / 'lib' / 'python3.7' / 'site-packages'), shell.pid)
+        start = time.monotonic()
+        while os.path.exists(path) and time.monotonic() - start < 10:
+            time.sleep(.1)
+        return k((status, os.path.exists(path), os.path.exists(f'{path}.lock'))) == ('7', False, False)
+
+
+__all__ = ('ZygoteSpec',)